@@ -0,0 +1,74 @@
+"""Benchmark decoding of malformed Bulk API batch results
+
+Compares the previous repair loop, which re-parsed the whole payload once
+per missing delimiter, with the single pass `BulkResultParser`.
+
+Usage: python benchmarks/bench_bulk_results.py [--rows N] [--defect-every N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import re
+import timeit
+
+from simple_salesforce.bulk import _load_batch_results
+
+
+def make_payload(rows, defect_every):
+    """Builds a pretty printed result array of `rows` rows in which every
+    `defect_every`-th row is missing its separating comma
+    """
+    parts = []
+    for i in range(rows):
+        row = json.dumps({'success': True, 'created': True,
+                          'id': '001%015d' % i, 'errors': []}, indent=2)
+        if i:
+            parts.append('\n' if defect_every and i % defect_every == 0
+                         else ',\n')
+        parts.append(row)
+    return '[' + ''.join(parts) + ']'
+
+
+def legacy_load(text):
+    """The repair loop previously used by SFBulkType._get_batch_results"""
+    pattern = re.compile(r"Expecting ',' delimiter: line [0-9]* column "
+                         r"[0-9]* .char ([0-9]*).")
+    while True:
+        try:
+            return json.loads(text)
+        except ValueError as e:
+            match = pattern.fullmatch(str(e))
+            if match is None:
+                raise
+            pos = int(match.group(1))
+            text = "{},{}".format(text[:pos], text[pos:])
+
+
+def main():
+    """Runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--defect-every', type=int, default=1000,
+                        help='drop the comma before every N-th row (0: none)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_payload(args.rows, args.defect_every)
+    defects = args.rows // args.defect_every if args.defect_every else 0
+    print('{} rows, {:.1f} MB, {} missing delimiters'.format(
+        args.rows, len(text) / 1e6, defects))
+
+    assert legacy_load(text) == _load_batch_results(text)
+
+    for name, func in (('legacy repair loop', legacy_load),
+                       ('single pass parser', _load_batch_results)):
+        best = min(timeit.repeat(lambda: func(text), number=1,
+                                 repeat=args.repeat))
+        print('{:<20} {:8.3f} s  ({:,.0f} rows/s)'.format(
+            name, best, args.rows / best))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Benchmark the client's main code paths against a local fake Salesforce
+
+Every path runs in a fresh interpreter holding a `FakeSalesforce` server
+(see `simple_salesforce/tests/server.py`) populated with Contact records,
+so that peak memory is measured per path. No network is used, which makes
+the benchmark suitable for CI. For each path it reports the records
+processed per second, the requests sent, the bytes sent and received, and
+the peak resident set size of the interpreter, server included, before
+and after running the path.
+
+Usage: python benchmarks/bench_end_to_end.py [--records N] [--latency S]
+       [--paths query_all,bulk_query,...]
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import subprocess
+import sys
+from time import time
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# the records handled one call at a time by the slow paths
+CRUD_RECORDS = 200
+
+
+def polling():
+    """Returns the strategy checking on bulk batches, which the server
+    completes straight away
+    """
+    from simple_salesforce.bulk import PollingStrategy
+
+    return PollingStrategy(min_interval=0.01, max_interval=0.5)
+
+
+def peak_rss():
+    """Returns the peak resident set size of this process in MB, or None"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024.0 * 1024 if sys.platform == 'darwin' else 1024.0)
+
+
+def run_query_all(sf, _):
+    """query_all over every record"""
+    return len(sf.query_all('SELECT Id, LastName, Email FROM Contact')
+               ['records'])
+
+
+def run_query_iter(sf, _):
+    """query_iter over every record"""
+    return sum(1 for _ in sf.query_iter(
+        'SELECT Id, LastName, Email FROM Contact'))
+
+
+def run_query_all_parallel(sf, _):
+    """query_all_parallel over every record, in 4 Id ranges"""
+    return sum(1 for _ in sf.query_all_parallel(
+        'SELECT Id, LastName, Email FROM Contact', partitions=4))
+
+
+def run_crud(sf, _):
+    """create, get, update and delete, one record per call"""
+    for i in range(CRUD_RECORDS):
+        record_id = sf.Contact.create({'LastName': 'Jones {}'.format(i)})['id']
+        sf.Contact.get(record_id)
+        sf.Contact.update(record_id, {'LastName': 'Brown {}'.format(i)})
+        sf.Contact.delete(record_id)
+    return CRUD_RECORDS
+
+
+def run_get_many(sf, ids):
+    """get_many of every record"""
+    return len(sf.Contact.get_many(ids, fields=['LastName', 'Email']))
+
+
+def run_bulk_insert(sf, ids):
+    """bulk insert of as many records as were loaded"""
+    return len(sf.bulk.Contact.insert(
+        [{'LastName': 'Jones {}'.format(i)} for i in range(len(ids))],
+        polling=polling()))
+
+
+def run_bulk_query(sf, _):
+    """bulk query over every record"""
+    return len(sf.bulk.Contact.query(
+        'SELECT Id, LastName, Email FROM Contact', polling=polling()))
+
+
+def run_bulk_query_chunked(sf, ids):
+    """PK chunked bulk query over every record, in 8 chunks"""
+    return sum(1 for _ in sf.bulk.Contact.query_chunked(
+        'SELECT Id, LastName, Email FROM Contact',
+        chunk_size=max(len(ids) // 8, 1), polling=polling()))
+
+
+PATHS = {
+    'query_all': run_query_all,
+    'query_iter': run_query_iter,
+    'query_all_parallel': run_query_all_parallel,
+    'crud': run_crud,
+    'get_many': run_get_many,
+    'bulk_insert': run_bulk_insert,
+    'bulk_query': run_bulk_query,
+    'bulk_query_chunked': run_bulk_query_chunked,
+}
+
+
+def run_path(name, args):
+    """Runs one path against a new server, and returns its measurements"""
+    from simple_salesforce import Salesforce
+    from simple_salesforce.tests.server import FakeSalesforce, make_records
+
+    with FakeSalesforce(latency=args.latency) as server:
+        ids = server.add_records('Contact', make_records(
+            args.records, field_size=args.field_size))
+        sf = Salesforce(username='user@example.com', password='password',
+                        security_token='token', session=server.session(),
+                        version='42.0')
+        baseline = peak_rss()
+        server.reset_stats()
+
+        started = time()
+        records = PATHS[name](sf, ids)
+        elapsed = time() - started
+        return {'records': records, 'seconds': elapsed,
+                'requests': server.requests, 'bytes_in': server.bytes_in,
+                'bytes_out': server.bytes_out, 'baseline_rss': baseline,
+                'peak_rss': peak_rss()}
+
+
+def _megabytes(value):
+    """Formats a size in MB that may be unknown"""
+    return '-' if value is None else '{:.0f}'.format(value)
+
+
+def main():
+    """Runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=20000,
+                        help='Contact records loaded into the server')
+    parser.add_argument('--field-size', type=int, default=20,
+                        help='characters of each text field of a record')
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds every response is delayed by')
+    parser.add_argument('--paths', default=','.join(sorted(PATHS)),
+                        help='comma separated paths to run')
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_path(args.run, args)))
+        return
+
+    print('Python {}, {} records, {} s latency'.format(
+        sys.version.split()[0], args.records, args.latency))
+    print('{:<20} {:>12} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+        'path', 'records/s', 'requests', 'sent MB', 'recv MB', 'base MB',
+        'peak MB'))
+    for name in args.paths.split(','):
+        output = subprocess.check_output(
+            [sys.executable, __file__, '--run', name,
+             '--records', str(args.records),
+             '--field-size', str(args.field_size),
+             '--latency', str(args.latency)])
+        result = json.loads(output.decode('utf-8').splitlines()[-1])
+        print('{:<20} {:>12,.0f} {:>9} {:>9.2f} {:>9.2f} {:>9} {:>9}'.format(
+            name, result['records'] / result['seconds'], result['requests'],
+            result['bytes_in'] / 1e6, result['bytes_out'] / 1e6,
+            _megabytes(result['baseline_rss']),
+            _megabytes(result['peak_rss'])))
+
+
+if __name__ == '__main__':
+    main()
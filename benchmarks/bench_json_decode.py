@@ -0,0 +1,91 @@
+"""Benchmark decoding of REST query pages with the available JSON codecs
+
+Decodes a realistic page of 2,000 Contact records, as returned by
+`Salesforce.query`, with the default `OrderedDict` decoding and with plain
+dict decoding on every installed backend.
+
+Usage: python benchmarks/bench_json_decode.py [--records N] [--repeat N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import sys
+import timeit
+
+from simple_salesforce.codec import FAST_BACKENDS, JSONCodec
+
+
+def make_page(records):
+    """Builds the JSON body of a query page holding `records` records"""
+    rows = []
+    for i in range(records):
+        rows.append({
+            'attributes': {
+                'type': 'Contact',
+                'url': '/services/data/v42.0/sobjects/Contact/003%015d' % i},
+            'Id': '003%015d' % i,
+            'FirstName': u'J\u00f6rg',
+            'LastName': 'Smith %d' % i,
+            'Email': 'smith%d@example.com' % i,
+            'Phone': '+1 415 555 %04d' % (i % 10000),
+            'MailingStreet': '%d Market Street\nSuite 300' % i,
+            'MailingCity': 'San Francisco',
+            'MailingPostalCode': '94105',
+            'HasOptedOutOfEmail': i % 7 == 0,
+            'NumberOfEmployees__c': i,
+            'AnnualRevenue__c': i * 1000.5,
+            'Description': None,
+            'CreatedDate': '2026-10-14T10:00:00.000+0000',
+            'Account': {
+                'attributes': {'type': 'Account',
+                               'url': '/services/data/v42.0/sobjects/Account/'
+                                      '001%015d' % (i // 10)},
+                'Name': 'Acme %d' % (i // 10)},
+        })
+    return json.dumps({'totalSize': records, 'done': False,
+                       'nextRecordsUrl': '/services/data/v42.0/query/01g-2000',
+                       'records': rows}).encode('utf-8')
+
+
+def codecs_to_compare():
+    """Returns (name, codec) for every codec available here"""
+    candidates = [('json, OrderedDict (default)', JSONCodec()),
+                  ('json, dict', JSONCodec(ordered=False))]
+    for backend in FAST_BACKENDS:
+        try:
+            candidates.append(('{}, dict'.format(backend),
+                               JSONCodec(backend=backend, ordered=False)))
+        except ImportError:
+            print('{} is not installed, skipping it'.format(backend))
+    return candidates
+
+
+def main():
+    """Runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--records', type=int, default=2000)
+    parser.add_argument('--number', type=int, default=20,
+                        help='pages decoded per measurement')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    page = make_page(args.records)
+    print('{} records per page, {:.2f} MB, Python {}'.format(
+        args.records, len(page) / 1e6, sys.version.split()[0]))
+
+    baseline = None
+    for name, codec in codecs_to_compare():
+        assert codec.loads(page)['records'][-1]['Id'] == \
+            '003%015d' % (args.records - 1)
+        best = min(timeit.repeat(lambda: codec.loads(page),
+                                 number=args.number,
+                                 repeat=args.repeat)) / args.number
+        baseline = baseline or best
+        print('{:<28} {:8.2f} ms/page  ({:,.0f} records/s, {:.1f}x)'.format(
+            name, best * 1000, args.records / best, baseline / best))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark importing the package and creating clients
+
+Measures `import simple_salesforce` in fresh interpreters, which is what
+command line tools and serverless handlers pay on every cold start, and the
+construction of clients that don't log in: from a session ID, and with a
+lazy password login. No request is sent.
+
+Usage: python benchmarks/bench_startup.py [--imports N] [--number N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import subprocess
+import sys
+import timeit
+
+IMPORT_SCRIPT = '''
+from time import time
+started = time()
+import simple_salesforce
+print(time() - started)
+print(" ".join(sorted(sys.modules)))
+'''
+
+
+def measure_import(runs):
+    """Returns the fastest import time over `runs` interpreters, and the
+    modules loaded by the import
+    """
+    best, modules = None, []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', 'import sys' + IMPORT_SCRIPT])
+        elapsed, modules = output.decode('utf-8').splitlines()
+        best = float(elapsed) if best is None else min(best, float(elapsed))
+    return best, modules.split()
+
+
+def main():
+    """Runs the benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--imports', type=int, default=10,
+                        help='fresh interpreters importing the package')
+    parser.add_argument('--number', type=int, default=1000,
+                        help='clients created per measurement')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    elapsed, modules = measure_import(args.imports)
+    print('Python {}'.format(sys.version.split()[0]))
+    print('{:<32} {:8.1f} ms  ({} modules)'.format(
+        'import simple_salesforce', elapsed * 1000, len(modules)))
+    for module in ('requests', 'simple_salesforce.login',
+                   'simple_salesforce.bulk', 'xml.dom.minidom'):
+        print('  {:<30} {}'.format(
+            module, 'imported' if module in modules else 'deferred'))
+
+    # pylint: disable=unused-variable
+    from simple_salesforce import Salesforce
+    import requests
+    session = requests.Session()
+
+    constructors = [
+        ('Salesforce(session_id=...)',
+         lambda: Salesforce(session_id='00D', instance='na1.salesforce.com',
+                            session=session)),
+        ('Salesforce(lazy_login=True)',
+         lambda: Salesforce(username='user@example.com', password='password',
+                            security_token='token', session=session,
+                            lazy_login=True)),
+    ]
+    for name, construct in constructors:
+        best = min(timeit.repeat(construct, number=args.number,
+                                 repeat=args.repeat)) / args.number
+        print('{:<32} {:8.1f} us'.format(name, best * 1e6))
+
+
+if __name__ == '__main__':
+    main()
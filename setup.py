@@ -29,6 +29,13 @@ setup(
     install_requires=[
         'requests[security]'
     ] + pyver_install_requires,
+    extras_require={
+        'async': ['aiohttp>=3.0'],
+        'fast-json': ['orjson'],
+        'columnar': ['numpy', 'pyarrow'],
+        'prometheus': ['prometheus_client'],
+        'opentelemetry': ['opentelemetry-api'],
+    },
     tests_require=[
         'nose>=1.3.0',
         'pytz>=2014.1.1',
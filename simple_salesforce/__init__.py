@@ -1,11 +1,12 @@
 """Simple-Salesforce Package"""
 # flake8: noqa
 
+import sys
+
 from simple_salesforce.api import (
     Salesforce,
     SalesforceAPI,
     SFType,
-    SFBulkHandler,
     SalesforceError,
     SalesforceMoreThanOneRecord,
     SalesforceExpiredSession,
@@ -15,6 +16,30 @@ from simple_salesforce.api import (
     SalesforceMalformedRequest
 )
 
-from simple_salesforce.login import (
-    SalesforceLogin, SalesforceAuthenticationFailed
-)
+from simple_salesforce.codec import JSONCodec
+
+from simple_salesforce.credentials import CredentialProvider
+
+from simple_salesforce.limits import ApiUsage
+
+from simple_salesforce.retry import RetryPolicy
+
+from simple_salesforce.util import lazy_getattr
+
+# imported on first use, see simple_salesforce.api
+_LAZY_IMPORTS = {
+    'DescribeCache': 'simple_salesforce.cache',
+    'Hooks': 'simple_salesforce.hooks',
+    'Profiler': 'simple_salesforce.profiler',
+    'SessionStore': 'simple_salesforce.store',
+    'FileSessionStore': 'simple_salesforce.store',
+    'SFBulkHandler': 'simple_salesforce.bulk',
+    'SFBulk2Handler': 'simple_salesforce.bulk2',
+    'ChangeSync': 'simple_salesforce.sync',
+    'SalesforceLogin': 'simple_salesforce.login',
+    'SalesforceAuthenticationFailed': 'simple_salesforce.login',
+}
+__getattr__ = lazy_getattr(__name__, _LAZY_IMPORTS)
+if sys.version_info < (3, 7):
+    for _name in _LAZY_IMPORTS:
+        __getattr__(_name)
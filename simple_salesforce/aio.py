@@ -0,0 +1,690 @@
+"""Asyncio counterparts of the Salesforce, SFType and bulk classes
+
+These mirror the blocking classes in `simple_salesforce.api` and
+`simple_salesforce.bulk`, but every call is a coroutine running on a pooled
+`aiohttp.ClientSession`. They require Python 3.6+ and the optional `aiohttp`
+dependency (``pip install simple-salesforce[async]``).
+"""
+
+import asyncio
+import functools
+import json
+import logging
+from collections import OrderedDict
+from urllib.parse import urlparse, urljoin
+
+import aiohttp
+
+from simple_salesforce.api import (
+    DEFAULT_API_VERSION,
+    RESPONSE_CODE_EXPIRED_SESSION,
+    AUTH_TYPE_PASSWORD,
+    AUTH_TYPE_IP_FILTER,
+    AUTH_TYPE_DIRECT,
+    AUTH_TYPE_DIRECT_WITH_REFRESH
+)
+from simple_salesforce.bulk import load_batch_results
+from simple_salesforce.login import SalesforceLogin
+from simple_salesforce.util import date_to_iso8601, exception_handler
+
+# pylint: disable=invalid-name
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONNECTIONS = 100
+
+
+class BufferedResponse(object):
+    """A fully read aiohttp response
+
+    Exposes the subset of the `requests.Response` interface relied upon by
+    simple_salesforce, so that results can be routed through the same
+    `exception_handler` as the blocking client.
+    """
+
+    def __init__(self, status_code, url, headers, content):
+        self.status_code = status_code
+        self.url = url
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        """The response body decoded as text"""
+        return self.content.decode('utf-8')
+
+    def json(self, **kwargs):
+        """Decodes the response body as JSON; kwargs go to `json.loads`"""
+        return json.loads(self.text, **kwargs)
+
+
+# pylint: disable=too-many-instance-attributes
+class AsyncSalesforce(object):
+    """Asyncio Salesforce Instance
+
+    Same interface as `Salesforce`, except that every API call is a
+    coroutine. Password and IP filter logins are deferred until the first
+    call (or an explicit `await login()`), since they can't run inside
+    `__init__`.
+
+    The `Salesforce` options driving its blocking call path are not
+    supported: `json_codec` (responses are decoded with the standard
+    library `json`), `retry_policy`, `hooks`, `api_usage`, `describe_cache`,
+    `session_store` and a shared `credentials` provider. The session is
+    refreshed by the client itself, once for all its handles.
+    """
+    # pylint: disable=too-many-arguments,too-many-locals
+    def __init__(
+            self, username=None, password=None, security_token=None,
+            session_id=None, instance=None, instance_url=None,
+            refresh_token=None, consumer_id=None, consumer_secret=None,
+            organizationId=None, sandbox=False, version=DEFAULT_API_VERSION,
+            proxy=None, session=None, client_id=None,
+            max_connections=DEFAULT_MAX_CONNECTIONS):
+        """Initialize the instance with the given parameters.
+
+        Accepts the same authentication kwargs as `Salesforce`. In addition:
+
+            * proxy -- the optional URL of a proxy server, passed to aiohttp
+            * session -- Custom `aiohttp.ClientSession`, created in calling
+                         code. When omitted, a session is created on first
+                         use and closed by `close()`.
+            * max_connections -- size of the connection pool used when no
+                                 custom session is given
+        """
+        self.sf_version = version
+        self.sandbox = sandbox
+        self.proxy = proxy
+        self.session = session
+        self._owns_session = session is None
+        self.max_connections = max_connections
+        self._login_kwargs = None
+        self._auth_lock = None
+        self.session_id = self.sf_instance = None
+        self.headers = self.bulk_headers = None
+        self.base_url = self.apex_url = self.bulk_url = None
+
+        if all(arg is not None for arg in (
+                username, password, security_token)):
+            self.auth_type = AUTH_TYPE_PASSWORD
+            self._login_kwargs = dict(
+                username=username, password=password,
+                security_token=security_token, client_id=client_id)
+
+        elif all(arg is not None for arg in (
+                session_id, instance or instance_url)):
+            self.auth_type = AUTH_TYPE_DIRECT
+            if instance_url is not None:
+                instance = urlparse(instance_url).hostname
+            self._set_session(session_id, instance)
+
+            if all(arg is not None for arg in (
+                    refresh_token, consumer_id, consumer_secret)):
+
+                self.auth_type = AUTH_TYPE_DIRECT_WITH_REFRESH
+                self.refresh_token = refresh_token
+                self.consumer_id = consumer_id
+                self.consumer_secret = consumer_secret
+
+        elif all(arg is not None for arg in (
+                username, password, organizationId)):
+            self.auth_type = AUTH_TYPE_IP_FILTER
+            self._login_kwargs = dict(
+                username=username, password=password,
+                organizationId=organizationId, client_id=client_id)
+
+        else:
+            raise TypeError(
+                'You must provide login information or an instance and token'
+            )
+
+    def _set_session(self, session_id, sf_instance):
+        """Stores a new session ID/instance and rebuilds dependent state"""
+        self.session_id = session_id
+        self.sf_instance = sf_instance
+
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Authorization': 'Bearer ' + self.session_id,
+            'X-PrettyPrint': '1'
+        }
+        self.bulk_headers = {
+            'Content-Type': 'application/json',
+            'X-SFDC-Session': self.session_id,
+            'X-PrettyPrint': '1'
+        }
+
+        self.base_url = ('https://{instance}/services/data/v{version}/'
+                         .format(instance=self.sf_instance,
+                                 version=self.sf_version))
+        self.apex_url = ('https://{instance}/services/apexrest/'
+                         .format(instance=self.sf_instance))
+        self.bulk_url = ('https://{instance}/services/async/{version}/'
+                         .format(instance=self.sf_instance,
+                                 version=self.sf_version))
+
+    async def _run_login(self, **kwargs):
+        """Runs the blocking `SalesforceLogin` in the default executor"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, functools.partial(
+            SalesforceLogin, sandbox=self.sandbox, sf_version=self.sf_version,
+            **kwargs))
+
+    def _get_auth_lock(self):
+        """Lazily creates the lock so it binds to the running loop"""
+        if self._auth_lock is None:
+            self._auth_lock = asyncio.Lock()
+        return self._auth_lock
+
+    async def login(self):
+        """Performs the deferred username/password login, if still needed"""
+        if self.session_id is not None:
+            return
+        async with self._get_auth_lock():
+            # another task may have logged in while we waited for the lock
+            if self.session_id is None:
+                session_id, sf_instance = await self._run_login(
+                    **self._login_kwargs)
+                self._set_session(session_id, sf_instance)
+
+    async def _refresh_session(self, stale_session_id):
+        """Refreshes the access token, once, for all concurrent callers
+
+        Returns True if a usable (possibly already refreshed) session is
+        available.
+        """
+        async with self._get_auth_lock():
+            if self.session_id != stale_session_id:
+                return True
+            session_id, sf_instance = await self._run_login(
+                refresh_token=self.refresh_token,
+                consumer_id=self.consumer_id,
+                consumer_secret=self.consumer_secret)
+            if not (session_id and sf_instance):
+                return False
+            self._set_session(session_id, sf_instance)
+            return True
+
+    def _get_session(self):
+        """Returns the aiohttp session, creating a pooled one if needed"""
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections))
+        return self.session
+
+    async def close(self):
+        """Closes the aiohttp session if it was created by this instance"""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        await self.login()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def __getattr__(self, name):
+        """Returns an `AsyncSFType` instance for the given Salesforce object
+        type (given in `name`), or the async bulk handler for `bulk`.
+
+        Arguments:
+
+        * name -- the name of a Salesforce object type, e.g. Lead or Contact
+        """
+        if name.startswith('__'):
+            return super(AsyncSalesforce, self).__getattr__(name)
+
+        if name == 'bulk':
+            return AsyncSFBulkHandler(self)
+
+        return AsyncSFType(name, self)
+
+    async def describe(self):
+        """Describes all available objects
+        """
+        await self.login()
+        result = await self.send_request('GET', self.base_url + 'sobjects')
+        json_result = result.json(object_pairs_hook=OrderedDict)
+        if len(json_result) == 0:
+            return None
+        return json_result
+
+    async def restful(self, path, params=None, method='GET', data=None):
+        """Allows you to make a direct REST call if you know the path
+
+        Arguments:
+
+        * path: The path of the request
+            Example: sobjects/User/ABC123/password'
+        * params: dict of parameters to pass to the path
+        * method: HTTP request method, default GET
+        * data -- A dict of parameters to send in a POST / PUT request
+        """
+        await self.login()
+        result = await self.send_request(
+            method, self.base_url + path, params=params,
+            data=json.dumps(data))
+        json_result = result.json(object_pairs_hook=OrderedDict)
+        if len(json_result) == 0:
+            return None
+        return json_result
+
+    async def search(self, search):
+        """Returns the result of a Salesforce search as a dict decoded from
+        the Salesforce response JSON payload.
+
+        Arguments:
+
+        * search -- the fully formatted SOSL search string, e.g.
+                    `FIND {Waldo}`
+        """
+        await self.login()
+        result = await self.send_request(
+            'GET', self.base_url + 'search/', params={'q': search})
+        json_result = result.json(object_pairs_hook=OrderedDict)
+        if len(json_result) == 0:
+            return None
+        return json_result
+
+    async def quick_search(self, search):
+        """Returns the result of a Salesforce search for the non-SOSL
+        `search` string, wrapped to read `FIND {search}`.
+        """
+        search_string = u'FIND {{{search_string}}}'.format(search_string=search)
+        return await self.search(search_string)
+
+    async def query(self, query, **kwargs):
+        """Return the result of a Salesforce SOQL query as a dict decoded from
+        the Salesforce response JSON payload.
+
+        Arguments:
+
+        * query -- the SOQL query to send to Salesforce, e.g.
+                   SELECT Id FROM Lead WHERE Email = "waldo@somewhere.com"
+        """
+        await self.login()
+        result = await self.send_request(
+            'GET', self.base_url + 'query/', params={'q': query}, **kwargs)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def query_more(
+            self, next_records_identifier, identifier_is_url=False, **kwargs):
+        """Retrieves more results from a query that returned more results
+        than the batch maximum.
+
+        Arguments:
+
+        * next_records_identifier -- either the Id of the next Salesforce
+                                     object in the result, or a URL to the
+                                     next record in the result.
+        * identifier_is_url -- True if `next_records_identifier` should be
+                               treated as a URL, False if
+                               `next_records_identifier` should be treated as
+                               an Id.
+        """
+        await self.login()
+        if identifier_is_url:
+            url = (u'https://{instance}{next_record_url}'
+                   .format(instance=self.sf_instance,
+                           next_record_url=next_records_identifier))
+        else:
+            url = self.base_url + 'query/{next_record_id}'.format(
+                next_record_id=next_records_identifier)
+        result = await self.send_request('GET', url, **kwargs)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def query_iter(self, query, **kwargs):
+        """Asynchronously yields every record for the `query`, following
+        `nextRecordsUrl` one page at a time.
+        """
+        result = await self.query(query, **kwargs)
+        while True:
+            for record in result['records']:
+                yield record
+            if result['done']:
+                break
+            result = await self.query_more(result['nextRecordsUrl'], True)
+
+    async def query_all(self, query, **kwargs):
+        """Returns the full set of results for the `query`, in the same shape
+        as `Salesforce.query_all(...)`.
+        """
+        result = await self.query(query, **kwargs)
+        all_records = []
+
+        while True:
+            all_records.extend(result['records'])
+            if result['done']:
+                break
+            result = await self.query_more(result['nextRecordsUrl'], True)
+
+        result['records'] = all_records
+        return result
+
+    async def apexecute(self, action, method='GET', data=None, **kwargs):
+        """Makes an HTTP request to an APEX REST endpoint
+
+        Arguments:
+
+        * action -- The REST endpoint for the request.
+        * method -- HTTP method for the request (default GET)
+        * data -- A dict of parameters to send in a POST / PUT request
+        * kwargs -- Additional kwargs to pass to `aiohttp`
+        """
+        await self.login()
+        result = await self.send_request(
+            method, self.apex_url + action, data=json.dumps(data), **kwargs)
+
+        if result.status_code == 200:
+            try:
+                response_content = result.json()
+            # pylint: disable=broad-except
+            except Exception:
+                response_content = result.text
+            return response_content
+
+    async def send_request(self, method, url, name='', bulk=False,
+                           headers=None, **kwargs):
+        """Performs an HTTP call to Salesforce with the client's session,
+        the coroutine counterpart of `util.send_request`. The handles of the
+        client call through it.
+
+        Retries once after refreshing an expired session when a refresh
+        token is available, and maps failures to the same exceptions as the
+        blocking client.
+
+        Returns a `BufferedResponse` object.
+        """
+        await self.login()
+
+        # Under some conditions, we'll allow the retrying of the call after an
+        # attempt to fix what's wrong. E.g. expired session token
+        retries_remaining = 1
+
+        while True:
+            session_id = self.session_id
+            request_headers = dict(
+                self.bulk_headers if bulk else self.headers)
+            request_headers.update(headers or {})
+
+            async with self._get_session().request(
+                    method, url, headers=request_headers, proxy=self.proxy,
+                    **kwargs) as response:
+                content = await response.read()
+            result = BufferedResponse(
+                response.status, str(response.url), response.headers, content)
+
+            if result.status_code < 300:
+                return result
+
+            if retries_remaining > 0 \
+                and result.status_code == RESPONSE_CODE_EXPIRED_SESSION \
+                    and self.auth_type == AUTH_TYPE_DIRECT_WITH_REFRESH:
+                retries_remaining -= 1
+                old_instance = self.sf_instance
+                if await self._refresh_session(session_id):
+                    url = url.replace(old_instance, self.sf_instance)
+                    continue
+
+            exception_handler(result, name)
+
+
+class AsyncSFType(object):
+    """An asyncio interface to a specific type of SObject"""
+
+    def __init__(self, object_name, salesforce):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * object_name -- the name of the type of SObject this represents,
+                         e.g. `Lead` or `Contact`
+        * salesforce -- the `AsyncSalesforce` instance whose session,
+                        credentials and connection pool are used
+        """
+        self.name = object_name
+        self.salesforce = salesforce
+
+    @property
+    def base_url(self):
+        """The sobject URL, following the owning client's current instance"""
+        return (u'https://{instance}/services/data/v{sf_version}/sobjects'
+                '/{object_name}/'.format(instance=self.salesforce.sf_instance,
+                                         object_name=self.name,
+                                         sf_version=self.salesforce.sf_version))
+
+    async def _call_salesforce(self, method, url_part, **kwargs):
+        """Performs a call relative to `base_url` through the owning client"""
+        await self.salesforce.login()
+        return await self.salesforce.send_request(
+            method, urljoin(self.base_url, url_part), name=self.name,
+            **kwargs)
+
+    async def metadata(self, headers=None):
+        """Returns the result of a GET to `.../{object_name}/`"""
+        result = await self._call_salesforce('GET', '', headers=headers)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def describe(self, headers=None):
+        """Returns the result of a GET to `.../{object_name}/describe`"""
+        result = await self._call_salesforce(
+            'GET', 'describe', headers=headers)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def describe_layout(self, record_id, headers=None):
+        """Returns the result of a GET to
+        `.../{object_name}/describe/layouts/<recordid>`
+        """
+        result = await self._call_salesforce(
+            'GET', 'describe/layouts/{record_id}'.format(record_id=record_id),
+            headers=headers)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def get(self, record_id, headers=None):
+        """Returns the result of a GET to `.../{object_name}/{record_id}`"""
+        result = await self._call_salesforce('GET', record_id, headers=headers)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def get_by_custom_id(self, custom_id_field, custom_id, headers=None):
+        """Returns the result of a GET to
+        `.../{object_name}/{custom_id_field}/{custom_id}`
+        """
+        result = await self._call_salesforce(
+            'GET', '{custom_id_field}/{custom_id}'.format(
+                custom_id_field=custom_id_field, custom_id=custom_id),
+            headers=headers)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def create(self, data, headers=None):
+        """Creates a new SObject using a POST to `.../{object_name}/`"""
+        result = await self._call_salesforce(
+            'POST', '', data=json.dumps(data), headers=headers)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def upsert(self, record_id, data, raw_response=False, headers=None):
+        """Creates or updates an SObject using a PATCH to
+        `.../{object_name}/{record_id}`.
+
+        Returns the status code, or the `BufferedResponse` if `raw_response`
+        is set.
+        """
+        result = await self._call_salesforce(
+            'PATCH', record_id, data=json.dumps(data), headers=headers)
+        return result if raw_response else result.status_code
+
+    async def update(self, record_id, data, raw_response=False, headers=None):
+        """Updates an SObject using a PATCH to
+        `.../{object_name}/{record_id}`.
+
+        Returns the status code, or the `BufferedResponse` if `raw_response`
+        is set.
+        """
+        result = await self._call_salesforce(
+            'PATCH', record_id, data=json.dumps(data), headers=headers)
+        return result if raw_response else result.status_code
+
+    async def delete(self, record_id, raw_response=False, headers=None):
+        """Deletes an SObject using a DELETE to
+        `.../{object_name}/{record_id}`.
+
+        Returns the status code, or the `BufferedResponse` if `raw_response`
+        is set.
+        """
+        result = await self._call_salesforce(
+            'DELETE', record_id, headers=headers)
+        return result if raw_response else result.status_code
+
+    async def deleted(self, start, end, headers=None):
+        """Gets a list of deleted records between the `start` and `end`
+        datetimes
+        """
+        result = await self._call_salesforce(
+            'GET', 'deleted/?start={start}&end={end}'.format(
+                start=date_to_iso8601(start), end=date_to_iso8601(end)),
+            headers=headers)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def updated(self, start, end, headers=None):
+        """Gets a list of updated records between the `start` and `end`
+        datetimes
+        """
+        result = await self._call_salesforce(
+            'GET', 'updated/?start={start}&end={end}'.format(
+                start=date_to_iso8601(start), end=date_to_iso8601(end)),
+            headers=headers)
+        return result.json(object_pairs_hook=OrderedDict)
+
+
+class AsyncSFBulkHandler(object):
+    """Asyncio Bulk API request handler, allowing calls such as
+    `await sf.bulk.Contact.insert(...)`
+    """
+
+    def __init__(self, salesforce):
+        self.salesforce = salesforce
+
+    def __getattr__(self, name):
+        return AsyncSFBulkType(object_name=name, salesforce=self.salesforce)
+
+
+class AsyncSFBulkType(object):
+    """Asyncio interface to Bulk/Async API functions"""
+
+    def __init__(self, object_name, salesforce):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * object_name -- the name of the type of SObject this represents,
+                         e.g. `Lead` or `Contact`
+        * salesforce -- the owning `AsyncSalesforce` instance
+        """
+        self.object_name = object_name
+        self.salesforce = salesforce
+
+    async def _call_salesforce(self, method, url_part, **kwargs):
+        """Performs a bulk call relative to the client's `bulk_url`"""
+        await self.salesforce.login()
+        result = await self.salesforce.send_request(
+            method, self.salesforce.bulk_url + url_part, bulk=True, **kwargs)
+        return result
+
+    async def _create_job(self, operation, external_id_field=None):
+        """ Create a bulk job """
+        payload = {
+            'operation': operation,
+            'object': self.object_name,
+            'contentType': 'JSON'
+        }
+        if operation == 'upsert':
+            payload['externalIdFieldName'] = external_id_field
+
+        result = await self._call_salesforce(
+            'POST', 'job', data=json.dumps(payload))
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def _close_job(self, job_id):
+        """ Close a bulk job """
+        result = await self._call_salesforce(
+            'POST', 'job/{}'.format(job_id),
+            data=json.dumps({'state': 'Closed'}))
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def _add_batch(self, job_id, data, operation):
+        """ Add a set of data as a batch to an existing job """
+        if operation != 'query':
+            data = json.dumps(data)
+        result = await self._call_salesforce(
+            'POST', 'job/{}/batch'.format(job_id), data=data)
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def _get_batch(self, job_id, batch_id):
+        """ Get an existing batch to check the status """
+        result = await self._call_salesforce(
+            'GET', 'job/{}/batch/{}'.format(job_id, batch_id))
+        return result.json(object_pairs_hook=OrderedDict)
+
+    async def _get_batch_results(self, job_id, batch_id, operation):
+        """ retrieve a set of results from a completed job """
+        url_part = 'job/{}/batch/{}/result'.format(job_id, batch_id)
+        result = await self._call_salesforce('GET', url_part)
+
+        if operation == 'query':
+            records = []
+            for result_id in result.json():
+                query_result = await self._call_salesforce(
+                    'GET', '{}/{}'.format(url_part, result_id))
+                records.extend(query_result.json())
+            return records
+
+        return load_batch_results(result.text)
+
+    async def _bulk_operation(self, operation, data, external_id_field=None,
+                              wait=5):
+        """ String together helper coroutines to create a complete
+        end-to-end bulk API request, sleeping `wait` seconds between batch
+        status checks without blocking the event loop
+        """
+        job = await self._create_job(operation=operation,
+                                     external_id_field=external_id_field)
+        batch = await self._add_batch(job_id=job['id'], data=data,
+                                      operation=operation)
+        await self._close_job(job_id=job['id'])
+
+        batch_status = (await self._get_batch(
+            job_id=batch['jobId'], batch_id=batch['id']))['state']
+
+        while batch_status not in ['Completed', 'Failed', 'Not Processed']:
+            await asyncio.sleep(wait)
+            batch_status = (await self._get_batch(
+                job_id=batch['jobId'], batch_id=batch['id']))['state']
+
+        return await self._get_batch_results(
+            job_id=batch['jobId'], batch_id=batch['id'], operation=operation)
+
+    async def delete(self, data):
+        """ soft delete records """
+        return await self._bulk_operation(operation='delete', data=data)
+
+    async def insert(self, data):
+        """ insert records """
+        return await self._bulk_operation(operation='insert', data=data)
+
+    async def upsert(self, data, external_id_field):
+        """ upsert records based on a unique identifier """
+        return await self._bulk_operation(
+            operation='upsert', external_id_field=external_id_field,
+            data=data)
+
+    async def update(self, data):
+        """ update records """
+        return await self._bulk_operation(operation='update', data=data)
+
+    async def hard_delete(self, data):
+        """ hard delete records """
+        return await self._bulk_operation(operation='hardDelete', data=data)
+
+    async def query(self, data):
+        """ bulk query """
+        return await self._bulk_operation(operation='query', data=data)
@@ -5,6 +5,7 @@
 DEFAULT_API_VERSION = '29.0'
 
 RESPONSE_CODE_EXPIRED_SESSION = 401
+RESPONSE_CODE_NOT_MODIFIED = 304
 
 AUTH_TYPE_PASSWORD = 'password'
 AUTH_TYPE_IP_FILTER = 'ipfilter'
@@ -12,28 +13,73 @@ AUTH_TYPE_DIRECT = 'direct'
 AUTH_TYPE_DIRECT_WITH_REFRESH = 'direct_with_refresh'
 
 import logging
+import sys
 import warnings
+from functools import partial
+
 import requests
-import json
 
 try:
     from urlparse import urlparse, urljoin
 except ImportError:
     # Python 3+
     from urllib.parse import urlparse, urljoin
-from simple_salesforce.login import SalesforceLogin
-from simple_salesforce.util import date_to_iso8601, SalesforceError
-from simple_salesforce.bulk import SFBulkHandler
-
-try:
-    from collections import OrderedDict
-except ImportError:
-    # Python < 2.7
-    from ordereddict import OrderedDict
+from simple_salesforce.util import (
+    date_to_iso8601,
+    exception_handler,
+    lazy_getattr,
+    send_request,
+    SalesforceGeneralError
+)
+# pylint: disable=unused-import
+# re-exported, the exceptions remain importable from here
+from simple_salesforce.util import (
+    SalesforceError,
+    SalesforceMoreThanOneRecord,
+    SalesforceMalformedRequest,
+    SalesforceExpiredSession,
+    SalesforceRefusedRequest,
+    SalesforceResourceNotFound
+)
+# pylint: enable=unused-import
+from simple_salesforce.codec import DEFAULT_CODEC
+from simple_salesforce.credentials import (
+    CredentialProvider,
+    CredentialsMixin,
+    call_with_credentials
+)
+from simple_salesforce.composite import CollectionsMixin, CompositeMixin
+from simple_salesforce.limits import ApiUsage
+from simple_salesforce.profiler import measure
+from simple_salesforce.query import QueryMixin
 
 #pylint: disable=invalid-name
 logger = logging.getLogger(__name__)
 
+# The login and bulk machinery is imported on first use, so that importing
+# the package and creating a client stay fast. The names remain importable
+# from here for backwards compatibility.
+_LAZY_IMPORTS = {
+    'SalesforceLogin': 'simple_salesforce.login',
+    'SFBulkHandler': 'simple_salesforce.bulk',
+    'SFBulk2Handler': 'simple_salesforce.bulk2',
+}
+__getattr__ = lazy_getattr(__name__, _LAZY_IMPORTS)
+if sys.version_info < (3, 7):
+    for _name in _LAZY_IMPORTS:
+        __getattr__(_name)
+
+# kept importable from here for backwards compatibility
+_exception_handler = exception_handler
+
+
+def _login(**kwargs):
+    """Logs in with `SalesforceLogin`"""
+    # pylint: disable=redefined-outer-name
+    from simple_salesforce.login import SalesforceLogin
+
+    return SalesforceLogin(**kwargs)
+
 
 def _warn_request_deprecation():
     """Deprecation for (Salesforce/SFType).request attribute"""
@@ -45,7 +91,7 @@ def _warn_request_deprecation():
 
 
 # pylint: disable=too-many-instance-attributes
-class Salesforce(object):
+class Salesforce(CredentialsMixin, QueryMixin, CompositeMixin):
     """Salesforce Instance
 
     An instance of Salesforce is a handy way to wrap a Salesforce session
@@ -57,7 +103,10 @@ class Salesforce(object):
             session_id=None, instance=None, instance_url=None,
             refresh_token=None, consumer_id=None, consumer_secret=None,
             organizationId=None, sandbox=False, version=DEFAULT_API_VERSION,
-            proxies=None, session=None, client_id=None):
+            proxies=None, session=None, client_id=None, describe_cache=None,
+            json_codec=None, api_usage=None, retry_policy=None,
+            credentials=None, session_lifetime=None, session_store=None,
+            lazy_login=False, hooks=None):
         """Initialize the instance with the given parameters.
 
         Available kwargs
@@ -91,6 +140,12 @@ class Salesforce(object):
                     response to your app's OAuth authentication process.
 
 
+        Shared Credentials:
+
+            * credentials -- the `CredentialProvider` of another instance,
+                to share its session and its refreshes
+
+
         Universal Kwargs:
             * version -- the version of the Salesforce API to use, for example
                         `29.0`
@@ -98,6 +153,28 @@ class Salesforce(object):
             * session -- Custom requests session, created in calling code. This
                         enables the use of requets Session features not
                         otherwiseexposed by simple_salesforce.
+            * describe_cache -- a `DescribeCache` keeping the results of
+                        `describe()` and of `SFType.describe()` and
+                        `SFType.metadata()` between calls
+            * json_codec -- the `JSONCodec` encoding payloads and decoding
+                        responses, by default the standard library `json`
+                        decoding into `OrderedDict`s
+            * api_usage -- an `ApiUsage` recording the org's API usage from
+                        every response and optionally pacing calls. One
+                        tracking usage only is created by default.
+            * retry_policy -- a `RetryPolicy` sending calls that failed for
+                        transient reasons again (default None, no retries)
+            * session_lifetime -- the org's session timeout in seconds. The
+                        session is refreshed shortly before it expires
+                        instead of after a call fails. SOAP logins report
+                        it themselves, so it is only needed for others.
+            * session_store -- a `SessionStore` through which clients of
+                        the same user share sessions instead of each
+                        logging in (password and IP filtered logins only)
+            * lazy_login -- log in when the session is first needed, usually
+                        by the first call, instead of right away
+            * hooks -- a `Hooks` whose listeners are told of every attempt
+                        of a call, retry, login and bulk poll
 
         """
 
@@ -105,6 +182,16 @@ class Salesforce(object):
         # kwargs
         self.sf_version = version
         self.sandbox = sandbox
+        self._base_url = self._apex_url = self._bulk_url = None
+        self._headers = {
+            'Content-Type': 'application/json',
+            'X-PrettyPrint': '1'
+        }
+        self.describe_cache = describe_cache
+        self.json_codec = json_codec or DEFAULT_CODEC
+        self.api_usage = api_usage or ApiUsage()
+        self.retry_policy = retry_policy
+        self.hooks = hooks
         self.session = session or requests.Session()
         self.proxies = self.session.proxies
         # override custom session proxies dance
@@ -119,12 +206,18 @@ class Salesforce(object):
 
         # Determine if the user wants to use our username/password auth or pass
         # in their own information
-        if all(arg is not None for arg in (
+        refresh = sf_instance = login = None
+        if credentials is not None:
+            self.auth_type = AUTH_TYPE_DIRECT
+
+        elif all(arg is not None for arg in (
                 username, password, security_token)):
             self.auth_type = AUTH_TYPE_PASSWORD
 
-            # Pass along the username/password to our login helper
-            self.session_id, self.sf_instance = SalesforceLogin(
+            # Pass along the username/password to our login helper, and keep
+            # it to log in again when the session expires
+            refresh = partial(
+                _login,
                 session=self.session,
                 username=username,
                 password=password,
@@ -132,19 +225,27 @@ class Salesforce(object):
                 sandbox=self.sandbox,
                 sf_version=self.sf_version,
                 proxies=self.proxies,
-                client_id=client_id)
+                client_id=client_id,
+                hooks=hooks)
+            if session_store is not None:
+                from simple_salesforce.store import StoredLogin, login_key
+                refresh = StoredLogin(session_store,
+                                      login_key(username, self.sandbox),
+                                      refresh)
+            if not lazy_login:
+                login = refresh()
+                session_id, sf_instance = login
 
         elif all(arg is not None for arg in (
                 session_id, instance or instance_url)):
             self.auth_type = AUTH_TYPE_DIRECT
-            self.session_id = session_id
 
             # If the user provides the full url (as returned by the OAuth
             # interface for example) extract the hostname (which we rely on)
             if instance_url is not None:
-                self.sf_instance = urlparse(instance_url).hostname
+                sf_instance = urlparse(instance_url).hostname
             else:
-                self.sf_instance = instance
+                sf_instance = instance
 
             # If the user provided a refresh token AND client id and secret,
             # then this session/access_token is refreshable and we may need to
@@ -156,14 +257,25 @@ class Salesforce(object):
                 self.refresh_token = refresh_token
                 self.consumer_id = consumer_id
                 self.consumer_secret = consumer_secret
-
+                refresh = partial(
+                    _login,
+                    session=self.session,
+                    refresh_token=refresh_token,
+                    consumer_id=consumer_id,
+                    consumer_secret=consumer_secret,
+                    sandbox=self.sandbox,
+                    sf_version=self.sf_version,
+                    proxies=self.proxies,
+                    hooks=hooks)
 
         elif all(arg is not None for arg in (
                 username, password, organizationId)):
             self.auth_type = AUTH_TYPE_IP_FILTER
 
-            # Pass along the username/password to our login helper
-            self.session_id, self.sf_instance = SalesforceLogin(
+            # Pass along the username/password to our login helper, and keep
+            # it to log in again when the session expires
+            refresh = partial(
+                _login,
                 session=self.session,
                 username=username,
                 password=password,
@@ -171,13 +283,32 @@ class Salesforce(object):
                 sandbox=self.sandbox,
                 sf_version=self.sf_version,
                 proxies=self.proxies,
-                client_id=client_id)
+                client_id=client_id,
+                hooks=hooks)
+            if session_store is not None:
+                from simple_salesforce.store import StoredLogin, login_key
+                refresh = StoredLogin(
+                    session_store,
+                    login_key(username, self.sandbox, organizationId),
+                    refresh)
+            if not lazy_login:
+                login = refresh()
+                session_id, sf_instance = login
 
         else:
             raise TypeError(
                 'You must provide login information or an instance and token'
             )
 
+        # Every handle given out by this instance reads the session from
+        # here, so that it is refreshed once for all of them
+        self.credentials = credentials or CredentialProvider(
+            session_id, sf_instance, refresh=refresh,
+            session_lifetime=session_lifetime,
+            session_seconds_valid=getattr(login, 'session_seconds_valid',
+                                          None),
+            issued_at=getattr(refresh, 'issued_at', None), hooks=hooks)
+
         if self.sandbox:
             self.auth_site = 'https://test.salesforce.com'
         else:
@@ -187,40 +318,78 @@ class Salesforce(object):
         self.request = session or requests.Session()
         self.request.proxies = self.proxies
 
-        self._build_headers()
+    @property
+    def headers(self):
+        """The headers we add to each request, including the access token.
+        Headers set on the returned dict are sent with every call.
+        """
+        self._headers['Authorization'] = 'Bearer ' + self.session_id
+        return self._headers
+
+    @headers.setter
+    def headers(self, headers):
+        """Replaces the headers we add to each request"""
+        self._headers = headers
 
-        self.base_url = ('https://{instance}/services/data/v{version}/'
-                         .format(instance=self.sf_instance,
-                                 version=self.sf_version))
-        self.apex_url = ('https://{instance}/services/apexrest/'
-                         .format(instance=self.sf_instance))
-        self.bulk_url = ('https://{instance}/services/async/{version}/'
-                         .format(instance=self.sf_instance,
-                                 version=self.sf_version))
+    @property
+    def base_url(self):
+        """The REST API endpoint of the current instance, unless another
+        URL was assigned
+        """
+        return self._base_url or (
+            'https://{instance}/services/data/v{version}/'
+            .format(instance=self.sf_instance, version=self.sf_version))
 
+    @base_url.setter
+    def base_url(self, url):
+        """Uses `url` as the REST API endpoint"""
+        self._base_url = url
 
-    def _build_headers(self):
+    @property
+    def apex_url(self):
+        """The Apex REST endpoint of the current instance, unless another
+        URL was assigned
         """
-        Build the headers we add to each request that includes access token
+        return self._apex_url or (
+            'https://{instance}/services/apexrest/'
+            .format(instance=self.sf_instance))
+
+    @apex_url.setter
+    def apex_url(self, url):
+        """Uses `url` as the Apex REST endpoint"""
+        self._apex_url = url
+
+    @property
+    def bulk_url(self):
+        """The bulk API endpoint of the current instance, unless another
+        URL was assigned
         """
-        self.headers = {
-            'Content-Type': 'application/json',
-            'Authorization': 'Bearer ' + self.session_id,
-            'X-PrettyPrint': '1'
-        }
+        return self._bulk_url or (
+            'https://{instance}/services/async/{version}/'
+            .format(instance=self.sf_instance, version=self.sf_version))
 
+    @bulk_url.setter
+    def bulk_url(self, url):
+        """Uses `url` as the bulk API endpoint"""
+        self._bulk_url = url
 
     def describe(self):
         """Describes all available objects
         """
         url = self.base_url + "sobjects"
-        result = self._call_salesforce('GET', url)
-        if result.status_code != 200:
-            raise SalesforceGeneralError(url,
-                                         'describe',
-                                         result.status_code,
-                                         result.content)
-        json_result = result.json(object_pairs_hook=OrderedDict)
+
+        def fetch(headers):
+            """Performs the (possibly conditional) describe call"""
+            result = self._call_salesforce('GET', url, headers=headers,
+                                           allow_not_modified=bool(headers))
+            if result.status_code not in (200, RESPONSE_CODE_NOT_MODIFIED):
+                raise SalesforceGeneralError(url, 'describe',
+                                             result.status_code, result.content)
+            return result
+
+        from simple_salesforce.cache import cached_get
+        json_result = cached_get(self.describe_cache, url, fetch,
+                                 self.json_codec)
         if len(json_result) == 0:
             return None
         else:
@@ -248,12 +417,32 @@ class Salesforce(object):
 
         if name == 'bulk':
             # Deal with bulk API functions
+            from simple_salesforce.bulk import SFBulkHandler
             return SFBulkHandler(self.session_id, self.bulk_url, self.proxies,
-                                 self.session)
-
+                                 self.session, json_codec=self.json_codec,
+                                 api_usage=self.api_usage,
+                                 retry_policy=self.retry_policy,
+                                 credentials=self.credentials,
+                                 hooks=self.hooks)
+
+        if name == 'bulk2':
+            # Bulk API 2.0 jobs live under the REST API
+            from simple_salesforce.bulk2 import SFBulk2Handler
+            return SFBulk2Handler(self.session_id, self.base_url + 'jobs/',
+                                  self.proxies, self.session,
+                                  api_usage=self.api_usage,
+                                  retry_policy=self.retry_policy,
+                                  credentials=self.credentials,
+                                  hooks=self.hooks)
+
+        # don't log in a lazy client until the first call
         return SFType(
-            name, self.session_id, self.sf_instance, sf_version=self.sf_version,
-            proxies=self.proxies, session=self.session)
+            name, self.credentials.session_id, self.credentials.sf_instance,
+            sf_version=self.sf_version,
+            proxies=self.proxies, session=self.session,
+            describe_cache=self.describe_cache, json_codec=self.json_codec,
+            api_usage=self.api_usage, retry_policy=self.retry_policy,
+            credentials=self.credentials, hooks=self.hooks)
 
     # User utility methods
     def set_password(self, user, password):
@@ -271,7 +460,8 @@ class Salesforce(object):
         url = self.base_url + 'sobjects/User/%s/password' % user
         params = {'NewPassword': password}
 
-        result = self._call_salesforce('POST', url, data=json.dumps(params))
+        result = self._call_salesforce('POST', url,
+                                       data=self.json_codec.dumps(params))
 
         # salesforce return 204 No Content when the request is successful
         if result.status_code != 200 and result.status_code != 204:
@@ -279,7 +469,7 @@ class Salesforce(object):
                                          'User',
                                          result.status_code,
                                          result.content)
-        json_result = result.json(object_pairs_hook=OrderedDict)
+        json_result = self.json_codec.decode(result)
         if len(json_result) == 0:
             return None
         else:
@@ -318,13 +508,14 @@ class Salesforce(object):
         """
 
         url = self.base_url + path
-        result = self._call_salesforce(method, url, params=params, data=json.dumps(data))
+        result = self._call_salesforce(method, url, params=params,
+                                       data=self.json_codec.dumps(data))
         if result.status_code != 200:
             raise SalesforceGeneralError(url,
                                          path,
                                          result.status_code,
                                          result.content)
-        json_result = result.json(object_pairs_hook=OrderedDict)
+        json_result = self.json_codec.decode(result)
         if len(json_result) == 0:
             return None
         else:
@@ -350,7 +541,7 @@ class Salesforce(object):
                                          'search',
                                          result.status_code,
                                          result.content)
-        json_result = result.json(object_pairs_hook=OrderedDict)
+        json_result = self.json_codec.decode(result)
         if len(json_result) == 0:
             return None
         else:
@@ -369,88 +560,6 @@ class Salesforce(object):
         search_string = u'FIND {{{search_string}}}'.format(search_string=search)
         return self.search(search_string)
 
-    # Query Handler
-    def query(self, query, **kwargs):
-        """Return the result of a Salesforce SOQL query as a dict decoded from
-        the Salesforce response JSON payload.
-
-        Arguments:
-
-        * query -- the SOQL query to send to Salesforce, e.g.
-                   SELECT Id FROM Lead WHERE Email = "waldo@somewhere.com"
-        """
-        url = self.base_url + 'query/'
-        params = {'q': query}
-        # `requests` will correctly encode the query string passed as `params`
-        result = self._call_salesforce('GET', url, params=params, **kwargs)
-
-        if result.status_code != 200:
-            _exception_handler(result)
-
-        return result.json(object_pairs_hook=OrderedDict)
-
-    def query_more(
-            self, next_records_identifier, identifier_is_url=False, **kwargs):
-        """Retrieves more results from a query that returned more results
-        than the batch maximum. Returns a dict decoded from the Salesforce
-        response JSON payload.
-
-        Arguments:
-
-        * next_records_identifier -- either the Id of the next Salesforce
-                                     object in the result, or a URL to the
-                                     next record in the result.
-        * identifier_is_url -- True if `next_records_identifier` should be
-                               treated as a URL, False if
-                               `next_records_identifier` should be treated as
-                               an Id.
-        """
-        if identifier_is_url:
-            # Don't use `self.base_url` here because the full URI is provided
-            url = (u'https://{instance}{next_record_url}'
-                   .format(instance=self.sf_instance,
-                           next_record_url=next_records_identifier))
-        else:
-            url = self.base_url + 'query/{next_record_id}'
-            url = url.format(next_record_id=next_records_identifier)
-        result = self._call_salesforce('GET', url, **kwargs)
-
-        if result.status_code != 200:
-            _exception_handler(result)
-
-        return result.json(object_pairs_hook=OrderedDict)
-
-    def query_all(self, query, **kwargs):
-        """Returns the full set of results for the `query`. This is a
-        convenience
-        wrapper around `query(...)` and `query_more(...)`.
-
-        The returned dict is the decoded JSON payload from the final call to
-        Salesforce, but with the `totalSize` field representing the full
-        number of results retrieved and the `records` list representing the
-        full list of records retrieved.
-
-        Arguments
-
-        * query -- the SOQL query to send to Salesforce, e.g.
-                   SELECT Id FROM Lead WHERE Email = "waldo@somewhere.com"
-        """
-
-        result = self.query(query, **kwargs)
-        all_records = []
-
-        while True:
-            all_records.extend(result['records'])
-            # fetch next batch if we're not done else break out of loop
-            if not result['done']:
-                result = self.query_more(result['nextRecordsUrl'],
-                                         True)
-            else:
-                break
-
-        result['records'] = all_records
-        return result
-
     def apexecute(self, action, method='GET', data=None, **kwargs):
         """Makes an HTTP request to an APEX REST endpoint
 
@@ -462,69 +571,46 @@ class Salesforce(object):
         * kwargs -- Additional kwargs to pass to `requests.request`
         """
         result = self._call_salesforce(method, self.apex_url + action,
-                                       data=json.dumps(data), **kwargs)
+                                       data=self.json_codec.dumps(data),
+                                       **kwargs)
 
         if result.status_code == 200:
-            try:
-                response_content = result.json()
-            # pylint: disable=broad-except
-            except Exception:
-                response_content = result.text
+            with measure(result, 'decode'):
+                try:
+                    response_content = result.json()
+                # pylint: disable=broad-except
+                except Exception:
+                    response_content = result.text
             return response_content
 
-
-    def _call_salesforce(self, method, url, **kwargs):
+    def _call_salesforce(self, method, url, allow_not_modified=False,
+                         **kwargs):
         """Utility method for performing HTTP call to Salesforce.
 
         Returns a `requests.result` object.
         """
 
-        # Under some conditions, we'll allow the retrying of the call after an
-        # attempt to fix what's wrong. E.g. expired session token
-        retries_remaining = 1
-
-        while retries_remaining >= 0:
-            retries_remaining = retries_remaining - 1
-
-            # Make the call
-            result = self.request.request(
-                method, url, headers=self.headers, **kwargs)
-
-            # If we had trouble
-            if result.status_code >= 300:
-
-                # Was it an expired session error AND do we have what we need
-                # to attempt a refresh?
-                if result.status_code == RESPONSE_CODE_EXPIRED_SESSION \
-                    and self.auth_type == AUTH_TYPE_DIRECT_WITH_REFRESH:
-
-                    # Let's try to refresh the access_token
-                    session_id, sf_instance = SalesforceLogin(
-                        refresh_token=self.refresh_token,
-                        consumer_id=self.consumer_id,
-                        consumer_secret=self.consumer_secret)
-
-                    # If it looks like things went well:
-                    if session_id and sf_instance:
-                        # Store the new session ID and rebuild the headers
-                        # to use it
-                        self.session_id = session_id
-                        self._build_headers()
-                        # Replace the old instance URL with the new one for this
-                        # call and then store it internally for future calls
-                        url = url.replace(self.sf_instance, sf_instance)
-                        self.sf_instance = sf_instance
-
-                        # Continue through the loop again, hopefully
-                        # with success
-                        continue
-
-                # If we got here, it's a plain fat old exception
-                _exception_handler(result)
-
-            # All good, so return the result
-            return result
+        additional_headers = kwargs.pop('headers', None)
+
+        def send(url, session_id):
+            """Makes the call with the session `session_id`"""
+            headers = dict(self._headers, **(additional_headers or {}))
+            headers['Authorization'] = 'Bearer ' + session_id
+            return send_request(
+                self.session, method, url, api_usage=self.api_usage,
+                retry_policy=self.retry_policy, hooks=self.hooks,
+                headers=headers, **kwargs)
 
+        # An expired session is refreshed, once for every handle sharing the
+        # credentials, and the call made again
+        result = call_with_credentials(self.credentials, url, send)
+
+        # A 304 only answers the conditional requests of the describe cache
+        if result.status_code >= 300 and (not allow_not_modified or
+                result.status_code != RESPONSE_CODE_NOT_MODIFIED):
+            exception_handler(result)
+
+        return result
 
     @property
     def request(self):
@@ -539,13 +625,15 @@ class Salesforce(object):
         self.session = session
 
 
-class SFType(object):
+class SFType(CredentialsMixin, CollectionsMixin):
     """An interface to a specific type of SObject"""
 
     # pylint: disable=too-many-arguments
     def __init__(
             self, object_name, session_id, sf_instance,
-            sf_version=DEFAULT_API_VERSION, proxies=None, session=None):
+            sf_version=DEFAULT_API_VERSION, proxies=None, session=None,
+            describe_cache=None, json_codec=None, api_usage=None,
+            retry_policy=None, credentials=None, hooks=None):
         """Initialize the instance with the given parameters.
 
         Arguments:
@@ -559,19 +647,47 @@ class SFType(object):
         * session -- Custom requests session, created in calling code. This
                      enables the use of requests Session features not otherwise
                      exposed by simple_salesforce.
+        * describe_cache -- the optional `DescribeCache` of `describe()` and
+                            `metadata()` results
+        * json_codec -- the `JSONCodec` encoding payloads and decoding
+                        responses
+        * api_usage -- the optional `ApiUsage` tracking and pacing calls
+        * retry_policy -- the optional `RetryPolicy` of failed calls
+        * credentials -- the optional `CredentialProvider` shared with the
+                         client, in which case the session it holds is used
+                         and refreshed instead of `session_id`
+        * hooks -- the optional `Hooks` told of every attempt of a call
         """
-        self.session_id = session_id
+        self.credentials = credentials or CredentialProvider(
+            session_id, sf_instance)
+        self.sf_version = sf_version
+        self._base_url = None
         self.name = object_name
+        self.describe_cache = describe_cache
+        self.json_codec = json_codec or DEFAULT_CODEC
+        self.api_usage = api_usage
+        self.retry_policy = retry_policy
+        self.hooks = hooks
         self.session = session or requests.Session()
         # don't wipe out original proxies with None
         if not session and proxies is not None:
             self.session.proxies = proxies
 
-        self.base_url = (
+    @property
+    def base_url(self):
+        """The endpoint of this type on the current instance, unless
+        another URL was assigned
+        """
+        return self._base_url or (
             u'https://{instance}/services/data/v{sf_version}/sobjects'
-            '/{object_name}/'.format(instance=sf_instance,
-                                     object_name=object_name,
-                                     sf_version=sf_version))
+            '/{object_name}/'.format(instance=self.credentials.get()[1],
+                                     object_name=self.name,
+                                     sf_version=self.sf_version))
+
+    @base_url.setter
+    def base_url(self, url):
+        """Uses `url` as the endpoint of this type"""
+        self._base_url = url
 
     def metadata(self, headers=None):
         """Returns the result of a GET to `.../{object_name}/` as a dict
@@ -581,8 +697,7 @@ class SFType(object):
 
         * headers -- a dict with additional request headers.
         """
-        result = self._call_salesforce('GET', self.base_url, headers=headers)
-        return result.json(object_pairs_hook=OrderedDict)
+        return self._cached_get(self.base_url, headers)
 
     def describe(self, headers=None):
         """Returns the result of a GET to `.../{object_name}/describe` as a
@@ -592,11 +707,7 @@ class SFType(object):
 
         * headers -- a dict with additional request headers.
         """
-        result = self._call_salesforce(
-            method='GET', url=urljoin(self.base_url, 'describe'),
-            headers=headers
-        )
-        return result.json(object_pairs_hook=OrderedDict)
+        return self._cached_get(urljoin(self.base_url, 'describe'), headers)
 
     def describe_layout(self, record_id, headers=None):
         """Returns the layout of the object
@@ -618,7 +729,7 @@ class SFType(object):
             url=urljoin(self.base_url, custom_url_part),
             headers=headers
         )
-        return result.json(object_pairs_hook=OrderedDict)
+        return self.json_codec.decode(result)
 
     def get(self, record_id, headers=None):
         """Returns the result of a GET to `.../{object_name}/{record_id}` as a
@@ -633,7 +744,7 @@ class SFType(object):
             method='GET', url=urljoin(self.base_url, record_id),
             headers=headers
         )
-        return result.json(object_pairs_hook=OrderedDict)
+        return self.json_codec.decode(result)
 
     def get_by_custom_id(self, custom_id_field, custom_id, headers=None):
         """Return an ``SFType`` by custom ID
@@ -657,7 +768,7 @@ class SFType(object):
         result = self._call_salesforce(
             method='GET', url=custom_url, headers=headers
         )
-        return result.json(object_pairs_hook=OrderedDict)
+        return self.json_codec.decode(result)
 
     def create(self, data, headers=None):
         """Creates a new SObject using a POST to `.../{object_name}/`.
@@ -672,9 +783,9 @@ class SFType(object):
         """
         result = self._call_salesforce(
             method='POST', url=self.base_url,
-            data=json.dumps(data), headers=headers
+            data=self.json_codec.dumps(data), headers=headers
         )
-        return result.json(object_pairs_hook=OrderedDict)
+        return self.json_codec.decode(result)
 
     def upsert(self, record_id, data, raw_response=False, headers=None):
         """Creates or updates an SObject using a PATCH to
@@ -696,7 +807,7 @@ class SFType(object):
         """
         result = self._call_salesforce(
             method='PATCH', url=urljoin(self.base_url, record_id),
-            data=json.dumps(data), headers=headers
+            data=self.json_codec.dumps(data), headers=headers
         )
         return self._raw_response(result, raw_response)
 
@@ -719,7 +830,7 @@ class SFType(object):
         """
         result = self._call_salesforce(
             method='PATCH', url=urljoin(self.base_url, record_id),
-            data=json.dumps(data), headers=headers
+            data=self.json_codec.dumps(data), headers=headers
         )
         return self._raw_response(result, raw_response)
 
@@ -762,7 +873,7 @@ class SFType(object):
             )
         )
         result = self._call_salesforce(method='GET', url=url, headers=headers)
-        return result.json(object_pairs_hook=OrderedDict)
+        return self.json_codec.decode(result)
 
     def updated(self, start, end, headers=None):
         # pylint: disable=line-too-long
@@ -783,24 +894,49 @@ class SFType(object):
             )
         )
         result = self._call_salesforce(method='GET', url=url, headers=headers)
-        return result.json(object_pairs_hook=OrderedDict)
+        return self.json_codec.decode(result)
 
-    def _call_salesforce(self, method, url, **kwargs):
+    def _cached_get(self, url, headers=None):
+        """GETs `url` through the describe cache, revalidating stale
+        results with `If-Modified-Since`
+        """
+        from simple_salesforce.cache import cached_get
+        def fetch(conditional_headers):
+            """Performs the (possibly conditional) call"""
+            return self._call_salesforce(
+                method='GET', url=url,
+                headers=dict(headers or {}, **conditional_headers),
+                allow_not_modified=bool(conditional_headers))
+
+        return cached_get(self.describe_cache, url, fetch, self.json_codec)
+
+    def _call_salesforce(self, method, url, allow_not_modified=False,
+                         **kwargs):
         """Utility method for performing HTTP call to Salesforce.
 
         Returns a `requests.result` object.
         """
-        headers = {
-            'Content-Type': 'application/json',
-            'Authorization': 'Bearer ' + self.session_id,
-            'X-PrettyPrint': '1'
-        }
         additional_headers = kwargs.pop('headers', dict())
-        headers.update(additional_headers or dict())
-        result = self.session.request(method, url, headers=headers, **kwargs)
 
-        if result.status_code >= 300:
-            _exception_handler(result, self.name)
+        def send(url, session_id):
+            """Makes the call with the session `session_id`"""
+            headers = {
+                'Content-Type': 'application/json',
+                'Authorization': 'Bearer ' + session_id,
+                'X-PrettyPrint': '1'
+            }
+            headers.update(additional_headers or dict())
+            return send_request(self.session, method, url,
+                                api_usage=self.api_usage,
+                                retry_policy=self.retry_policy,
+                                hooks=self.hooks, object_name=self.name,
+                                headers=headers, **kwargs)
+
+        result = call_with_credentials(self.credentials, url, send)
+
+        if result.status_code >= 300 and (not allow_not_modified or
+                result.status_code != RESPONSE_CODE_NOT_MODIFIED):
+            exception_handler(result, self.name)
 
         return result
 
@@ -861,81 +997,3 @@ class SalesforceAPI(Salesforce):
                                             security_token=security_token,
                                             sandbox=sandbox,
                                             version=sf_version)
-
-def _exception_handler(result, name=""):
-    """Exception router. Determines which error to raise for bad results"""
-    try:
-        response_content = result.json()
-    # pylint: disable=broad-except
-    except Exception:
-        response_content = result.text
-
-    exc_map = {
-        300: SalesforceMoreThanOneRecord,
-        400: SalesforceMalformedRequest,
-        401: SalesforceExpiredSession,
-        403: SalesforceRefusedRequest,
-        404: SalesforceResourceNotFound,
-    }
-    exc_cls = exc_map.get(result.status_code, SalesforceGeneralError)
-
-    raise exc_cls(result.url, result.status_code, name, response_content)
-
-
-class SalesforceMoreThanOneRecord(SalesforceError):
-    """
-    Error Code: 300
-    The value returned when an external ID exists in more than one record. The
-    response body contains the list of matching records.
-    """
-    message = u"More than one record for {url}. Response content: {content}"
-
-
-class SalesforceMalformedRequest(SalesforceError):
-    """
-    Error Code: 400
-    The request couldn't be understood, usually because the JSON or XML body
-    contains an error.
-    """
-    message = u"Malformed request {url}. Response content: {content}"
-
-
-class SalesforceExpiredSession(SalesforceError):
-    """
-    Error Code: 401
-    The session ID or OAuth token used has expired or is invalid. The response
-    body contains the message and errorCode.
-    """
-    message = u"Expired session for {url}. Response content: {content}"
-
-
-class SalesforceRefusedRequest(SalesforceError):
-    """
-    Error Code: 403
-    The request has been refused. Verify that the logged-in user has
-    appropriate permissions.
-    """
-    message = u"Request refused for {url}. Response content: {content}"
-
-
-class SalesforceResourceNotFound(SalesforceError):
-    """
-    Error Code: 404
-    The requested resource couldn't be found. Check the URI for errors, and
-    verify that there are no sharing issues.
-    """
-    message = u'Resource {name} Not Found. Response content: {content}'
-
-    def __str__(self):
-        return self.message.format(name=self.resource_name,
-                                   content=self.content)
-
-
-class SalesforceGeneralError(SalesforceError):
-    """
-    A non-specific Salesforce error.
-    """
-    message = u'Error Code {status}. Response content: {content}'
-
-    def __str__(self):
-        return self.message.format(status=self.status, content=self.content)
@@ -1,16 +1,124 @@
 """ Classes for interacting with Salesforce Bulk API """
 
+import json
+import os
+import random
+import requests
+from multiprocessing.pool import ThreadPool
+from time import sleep, time
 try:
-    from collections import OrderedDict
+    from urlparse import urlparse
 except ImportError:
-    # Python < 2.7
-    from ordereddict import OrderedDict
+    # Python 3+
+    from urllib.parse import urlparse
+from simple_salesforce.codec import DEFAULT_CODEC
+from simple_salesforce.credentials import (
+    CredentialProvider,
+    InstanceURL,
+    call_with_credentials
+)
+from simple_salesforce.bulk_results import (
+    decode_utf8,
+    iter_batch_results,
+    load_batch_results
+)
+from simple_salesforce.hooks import BULK_BATCH_COMPLETE, BULK_POLL
+from simple_salesforce.pk_chunking import (
+    FINAL_BATCH_STATES,
+    PKChunkingMixin
+)
+from simple_salesforce.profiler import measure
+from simple_salesforce.util import (
+    exception_handler,
+    send_request,
+    SalesforceError
+)
+# pylint: disable=unused-import
+# defined here before they moved to util, kept importable from here for
+# backwards compatibility
+from simple_salesforce.util import (
+    SalesforceMoreThanOneRecord,
+    SalesforceMalformedRequest,
+    SalesforceExpiredSession,
+    SalesforceRefusedRequest,
+    SalesforceResourceNotFound,
+    SalesforceGeneralError
+)
+# defined here before it moved to bulk_results
+from simple_salesforce.bulk_results import BulkResultParser
+# pylint: enable=unused-import
+_exception_handler = exception_handler
+
+# Salesforce limits a single batch to 10,000 records and 10MB of data
+DEFAULT_BATCH_SIZE = 10000
+DEFAULT_BATCH_BYTES = 10000000
+DEFAULT_MAX_WORKERS = 4
+# bytes read at a time when streaming query results
+STREAM_CHUNK_SIZE = 65536
+
+def _call_salesforce(url, method, session, headers, **kwargs):
+    """ Performs a call with the bulk API `headers`, without refreshing
+    expired sessions. Kept for backwards compatibility, the handlers call
+    through `SFBulkType._call_salesforce`.
+    """
+    headers = dict(headers, **(kwargs.pop('additional_headers', None) or {}))
+    result = session.request(method, url, headers=headers, **kwargs)
+    if result.status_code >= 300:
+        exception_handler(result)
+    return result
+
+
+class PollingStrategy(object):
+    """ Schedule used to check on bulk batches until they finish
+
+    Polls start `min_interval` seconds apart and back off exponentially up to
+    `max_interval`, with random jitter so that concurrent jobs don't poll in
+    lock step. While more than `job_status_threshold` batches are still in
+    flight, a single GET of the job's batch counters replaces the individual
+    batch GETs.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, min_interval=0.5, max_interval=30, factor=2,
+                 jitter=0.25, timeout=None, job_status_threshold=5):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * min_interval -- seconds to wait before the first status check
+        * max_interval -- upper bound for the wait between status checks
+        * factor -- multiplier applied to the wait after every check
+        * jitter -- fraction of the wait added or removed at random
+        * timeout -- seconds after which to give up waiting, raising
+                     `SalesforceBulkTimeout` (default None, wait forever)
+        * job_status_threshold -- number of pending batches above which
+                                  job-level status is polled instead
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+        self.jitter = jitter
+        self.timeout = timeout
+        self.job_status_threshold = job_status_threshold
+
+    @classmethod
+    def fixed(cls, interval):
+        """ Returns a strategy sleeping exactly `interval` seconds between
+        status checks, as the original `wait` argument did
+        """
+        return cls(min_interval=interval, max_interval=interval, factor=1,
+                   jitter=0)
+
+    def delays(self):
+        """ Yields the successive number of seconds to sleep between checks
+        """
+        interval = self.min_interval
+        while True:
+            spread = interval * self.jitter
+            delay = random.uniform(interval - spread, interval + spread)
+            yield min(max(delay, self.min_interval), self.max_interval)
+            interval = min(interval * self.factor, self.max_interval)
 
-import json
-import requests
-import re
-from time import sleep
-from simple_salesforce.util import SalesforceError
 
 class SFBulkHandler(object):
     """ Bulk API request handler
@@ -20,7 +128,10 @@ class SFBulkHandler(object):
     to allow the above syntax
     """
 
-    def __init__(self, session_id, bulk_url, proxies=None, session=None):
+    # pylint: disable=too-many-arguments
+    def __init__(self, session_id, bulk_url, proxies=None, session=None,
+                 json_codec=None, api_usage=None, retry_policy=None,
+                 credentials=None, hooks=None):
         """Initialize the instance with the given parameters.
 
         Arguments:
@@ -31,10 +142,23 @@ class SFBulkHandler(object):
         * session -- Custom requests session, created in calling code. This
                      enables the use of requests Session features not otherwise
                      exposed by simple_salesforce.
+        * json_codec -- the `JSONCodec` encoding batches and decoding
+                        responses
+        * api_usage -- the optional `ApiUsage` tracking and pacing calls
+        * retry_policy -- the optional `RetryPolicy` of failed calls
+        * credentials -- the optional `CredentialProvider` shared with the
+                         client, refreshing expired sessions
+        * hooks -- the optional `Hooks` told of calls and batch progress
         """
         self.session_id = session_id
+        self.credentials = credentials or CredentialProvider(
+            session_id, urlparse(bulk_url).hostname)
+        self.json_codec = json_codec or DEFAULT_CODEC
+        self.api_usage = api_usage
+        self.retry_policy = retry_policy
+        self.hooks = hooks
         self.session = session or requests.Session()
-        self.bulk_url = bulk_url
+        self._bulk_url = InstanceURL(self.credentials, bulk_url)
         # don't wipe out original proxies with None
         if not session and proxies is not None:
             self.session.proxies = proxies
@@ -47,14 +171,32 @@ class SFBulkHandler(object):
             'X-PrettyPrint': '1'
         }
 
+    @property
+    def bulk_url(self):
+        """ The bulk API endpoint, on the instance of the current session """
+        return self._bulk_url.get()
+
+    @bulk_url.setter
+    def bulk_url(self, url):
+        """ Uses `url` as the bulk API endpoint """
+        self._bulk_url = InstanceURL(self.credentials, url)
+
     def __getattr__(self, name):
         return SFBulkType(object_name=name, bulk_url=self.bulk_url,
-                          headers=self.headers, session=self.session)
-
-class SFBulkType(object):
+                          headers=self.headers, session=self.session,
+                          json_codec=self.json_codec,
+                          api_usage=self.api_usage,
+                          retry_policy=self.retry_policy,
+                          credentials=self.credentials,
+                          hooks=self.hooks)
+
+class SFBulkType(PKChunkingMixin):
     """ Interface to Bulk/Async API functions"""
 
-    def __init__(self, object_name, bulk_url, headers, session):
+    # pylint: disable=too-many-arguments
+    def __init__(self, object_name, bulk_url, headers, session,
+                 json_codec=None, api_usage=None, retry_policy=None,
+                 credentials=None, hooks=None):
         """Initialize the instance with the given parameters.
 
         Arguments:
@@ -66,13 +208,65 @@ class SFBulkType(object):
         * session -- Custom requests session, created in calling code. This
                      enables the use of requests Session features not otherwise
                      exposed by simple_salesforce.
+        * json_codec -- the `JSONCodec` encoding batches and decoding
+                        responses
+        * api_usage -- the optional `ApiUsage` tracking and pacing calls
+        * retry_policy -- the optional `RetryPolicy` of failed calls
+        * credentials -- the optional `CredentialProvider` whose session
+                         replaces the one in `headers`, refreshing expired
+                         sessions
+        * hooks -- the optional `Hooks` told of calls and batch progress
         """
         self.object_name = object_name
-        self.bulk_url = bulk_url
+        self.credentials = credentials
+        self._bulk_url = InstanceURL(credentials, bulk_url)
         self.session = session
         self.headers = headers
-
-    def _create_job(self, operation, object_name, external_id_field=None):
+        self.json_codec = json_codec or DEFAULT_CODEC
+        self.api_usage = api_usage
+        self.retry_policy = retry_policy
+        self.hooks = hooks
+
+    @property
+    def bulk_url(self):
+        """ The bulk API endpoint, on the instance of the current session """
+        return self._bulk_url.get()
+
+    @bulk_url.setter
+    def bulk_url(self, url):
+        """ Uses `url` as the bulk API endpoint """
+        self._bulk_url = InstanceURL(self.credentials, url)
+
+    def _call_salesforce(self, url, method, **kwargs):
+        """ Performs a call with the bulk API headers, pacing and retries,
+        refreshing the session once if it expired
+        """
+        additional_headers = kwargs.pop('additional_headers', None)
+
+        def send(url, session_id):
+            """ Makes the call with the session `session_id` """
+            headers = dict(self.headers, **(additional_headers or {}))
+            if session_id is not None:
+                headers['X-SFDC-Session'] = session_id
+            return send_request(self.session, method, url,
+                                api_usage=self.api_usage,
+                                retry_policy=self.retry_policy,
+                                hooks=self.hooks,
+                                object_name=self.object_name,
+                                headers=headers, **kwargs)
+
+        result = call_with_credentials(self.credentials, url, send)
+        if result.status_code >= 300:
+            exception_handler(result)
+        return result
+
+    def _emit(self, name, **fields):
+        """ Fires a `name` event about this object on the hooks, if any """
+        if self.hooks is not None:
+            self.hooks.emit(name, object_name=self.object_name, **fields)
+
+    def _create_job(self, operation, object_name, external_id_field=None,
+                    pk_chunking=None):
         """ Create a bulk job
 
         Arguments:
@@ -80,6 +274,9 @@ class SFBulkType(object):
         * operation -- Bulk operation to be performed by job
         * object_name -- SF object
         * external_id_field -- unique identifier field for upsert operations
+        * pk_chunking -- the value of the `Sforce-Enable-PKChunking` header
+                         splitting a query job into batches by record ID,
+                         see `pk_chunking._pk_chunking_header`
         """
 
         payload = {
@@ -93,10 +290,14 @@ class SFBulkType(object):
 
         url = "{}{}".format(self.bulk_url, 'job')
 
-        result = _call_salesforce(url=url, method='POST', session=self.session,
-                                  headers=self.headers,
-                                  data=json.dumps(payload))
-        return result.json(object_pairs_hook=OrderedDict)
+        additional_headers = None
+        if pk_chunking:
+            additional_headers = {'Sforce-Enable-PKChunking': pk_chunking}
+
+        result = self._call_salesforce(url=url, method='POST',
+                                       data=self.json_codec.dumps(payload),
+                                       additional_headers=additional_headers)
+        return self.json_codec.decode(result)
 
     def _close_job(self, job_id):
         """ Close a bulk job """
@@ -107,19 +308,30 @@ class SFBulkType(object):
 
         url = "{}{}{}".format(self.bulk_url, 'job/', job_id)
 
-        result = _call_salesforce(url=url, method='POST', session=self.session,
-                                  headers=self.headers,
-                                  data=json.dumps(payload))
-        return result.json(object_pairs_hook=OrderedDict)
+        result = self._call_salesforce(url=url, method='POST',
+                                       data=self.json_codec.dumps(payload))
+        return self.json_codec.decode(result)
+
+    def _abort_job(self, job_id):
+        """ Abort a bulk job, stopping the processing of its batches """
+
+        payload = {
+            'state': 'Aborted'
+        }
+
+        url = "{}{}{}".format(self.bulk_url, 'job/', job_id)
+
+        result = self._call_salesforce(url=url, method='POST',
+                                       data=self.json_codec.dumps(payload))
+        return self.json_codec.decode(result)
 
     def _get_job(self, job_id):
         """ Get an existing job to check the status """
 
         url = "{}{}{}".format(self.bulk_url, 'job/', job_id)
 
-        result = _call_salesforce(url=url, method='GET', session=self.session,
-                                  headers=self.headers)
-        return result.json(object_pairs_hook=OrderedDict)
+        result = self._call_salesforce(url=url, method='GET')
+        return self.json_codec.decode(result)
 
     def _add_batch(self, job_id, data, operation):
         """ Add a set of data as a batch to an existing job
@@ -127,14 +339,19 @@ class SFBulkType(object):
         implementations involving multiple batches
         """
 
-        url = "{}{}{}{}".format(self.bulk_url, 'job/', job_id, '/batch')
-
         if operation != 'query':
-            data = json.dumps(data)
+            data = self.json_codec.dumps(data)
+
+        return self._post_batch(job_id=job_id, payload=data)
 
-        result = _call_salesforce(url=url, method='POST', session=self.session,
-                                  headers=self.headers, data=data)
-        return result.json(object_pairs_hook=OrderedDict)
+    def _post_batch(self, job_id, payload):
+        """ Add an already serialized batch to an existing job """
+
+        url = "{}{}{}{}".format(self.bulk_url, 'job/', job_id, '/batch')
+
+        result = self._call_salesforce(url=url, method='POST',
+                                       data=payload)
+        return self.json_codec.decode(result)
 
     def _get_batch(self, job_id, batch_id):
         """ Get an existing batch to check the status """
@@ -142,9 +359,18 @@ class SFBulkType(object):
         url = "{}{}{}{}{}".format(self.bulk_url, 'job/',
                                   job_id, '/batch/', batch_id)
 
-        result = _call_salesforce(url=url, method='GET', session=self.session,
-                                  headers=self.headers)
-        return result.json(object_pairs_hook=OrderedDict)
+        result = self._call_salesforce(url=url, method='GET')
+        return self.json_codec.decode(result)
+
+    def _get_job_batches(self, job_id):
+        """ Get the state of every batch of a job, including the batches
+        Salesforce created itself
+        """
+
+        url = "{}{}{}{}".format(self.bulk_url, 'job/', job_id, '/batch')
+
+        result = self._call_salesforce(url=url, method='GET')
+        return self.json_codec.decode(result)['batchInfo']
 
     def _get_batch_results(self, job_id, batch_id, operation):
         """ retrieve a set of results from a completed job """
@@ -152,205 +378,363 @@ class SFBulkType(object):
         url = "{}{}{}{}{}{}".format(self.bulk_url, 'job/', job_id, '/batch/',
                                     batch_id, '/result')
 
-        result = _call_salesforce(url=url, method='GET', session=self.session,
-                                  headers=self.headers)
+        result = self._call_salesforce(url=url, method='GET')
 
         if operation == 'query':
-            result_data = result.json()
-            if len(result_data) > 0:
-                url_query_results = "{}{}{}".format(url, '/', result.json()[0])
-                query_result = _call_salesforce(url=url_query_results, method='GET',
-                                            session=self.session,
-                                            headers=self.headers)
-                return query_result.json()
-            else:
-                return result_data
+            # the result list holds the ids of the query result chunks
+            return list(self._iter_query_results(
+                job_id=job_id, batch_id=batch_id,
+                result_ids=self.json_codec.decode(result)))
+
+        with measure(result, 'decode'):
+            return load_batch_results(result.text,
+                                       loads=self.json_codec.loads)
+
+    def _stream_query_result(self, job_id, batch_id, result_id):
+        """ Yields the raw bytes of one query result chunk as they are
+        downloaded, without buffering the whole chunk in memory
+        """
+
+        url = "{}{}{}{}{}{}{}".format(self.bulk_url, 'job/', job_id,
+                                      '/batch/', batch_id, '/result/',
+                                      result_id)
+
+        result = self._call_salesforce(url=url, method='GET', stream=True)
+        try:
+            chunks = result.iter_content(chunk_size=STREAM_CHUNK_SIZE)
+            while True:
+                # the body is read as the chunks are consumed
+                with measure(result, 'download'):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            result.close()
+
+    def _iter_query_results(self, job_id, batch_id, result_ids):
+        """ Lazily yields the records of every query result chunk, decoding
+        each chunk incrementally as it streams in
+        """
+        for result_id in result_ids:
+            chunks = decode_utf8(self._stream_query_result(
+                job_id=job_id, batch_id=batch_id, result_id=result_id))
+            for record in iter_batch_results(chunks):
+                yield record
+
+    def _download_query_results(self, job_id, batch_id, path):
+        """ Writes every raw result chunk of a completed query batch to a
+        `{batch_id}_{result_id}.json` file in the `path` directory, returning
+        the file paths in result order
+        """
+        file_paths = []
+        for result_id in self._get_query_result_ids(job_id=job_id,
+                                                    batch_id=batch_id):
+            file_path = os.path.join(path, '{}_{}.json'.format(batch_id,
+                                                               result_id))
+            with open(file_path, 'wb') as result_file:
+                for chunk in self._stream_query_result(job_id=job_id,
+                                                       batch_id=batch_id,
+                                                       result_id=result_id):
+                    result_file.write(chunk)
+            file_paths.append(file_path)
+        return file_paths
+
+    def _get_query_result_ids(self, job_id, batch_id):
+        """ Get the ids of the result chunks of a completed query batch """
 
-        j = result
+        url = "{}{}{}{}{}{}".format(self.bulk_url, 'job/', job_id, '/batch/',
+                                    batch_id, '/result')
 
-        text = result.text
-        pattern = re.compile(r"Expecting ',' delimiter: line [0-9]* column [0-9]* .char ([0-9]*).")
+        result = self._call_salesforce(url=url, method='GET')
+        return self.json_codec.decode(result)
 
-        while True:
-            try:
-                j = json.loads(text)
-                break
-            except ValueError as e:
-                print(e)
-                match = pattern.fullmatch(str(e))
-                if match is not None:
-                    pos = int(match.group(1))
-                    text = "{},{}".format(text[:pos], text[pos:])
-        return j
+    def _run_query(self, data, polling=None):
+        """ Creates a bulk query job for the SOQL `data`, waits for its batch
+        to finish and returns the batch
+        """
+        job = self._create_job(object_name=self.object_name,
+                               operation='query')
+        batch = self._add_batch(job_id=job['id'], data=data,
+                                operation='query')
+        self._close_job(job_id=job['id'])
+        self._wait_for_batches(job_id=job['id'], batches=[batch],
+                               polling=polling or PollingStrategy())
+        return batch
 
+    # pylint: disable=too-many-arguments,too-many-locals
     def _bulk_operation(self, object_name, operation, data,
-                        external_id_field=None, wait=5): #pylint: disable=R0913
+                        external_id_field=None, wait=None,
+                        batch_size=DEFAULT_BATCH_SIZE,
+                        batch_bytes=DEFAULT_BATCH_BYTES,
+                        max_workers=DEFAULT_MAX_WORKERS, polling=None):
         """ String together helper functions to create a complete
         end-to-end bulk API request
 
+        Records are split into as many batches of the job as needed to stay
+        within `batch_size` and `batch_bytes`. Batches are uploaded, polled
+        and their results downloaded concurrently, and the results are
+        returned in the same order as `data`.
+
         Arguments:
 
         * object_name -- SF object
         * operation -- Bulk operation to be performed by job
-        * data -- list of dict to be passed as a batch
+        * data -- list of dict to be passed as batches, or the SOQL string
+                  for a query
         * external_id_field -- unique identifier field for upsert operations
-        * wait -- seconds to sleep between checking batch status
+        * wait -- fixed number of seconds to sleep between checking batch
+                  status, overriding the default backoff schedule
+        * batch_size -- maximum number of records per batch
+        * batch_bytes -- maximum size of the serialized records per batch
+        * max_workers -- number of batches transferred concurrently
+        * polling -- `PollingStrategy` used to wait for the batches
         """
+        if polling is None:
+            polling = (PollingStrategy() if wait is None
+                       else PollingStrategy.fixed(wait))
 
         job = self._create_job(object_name=object_name, operation=operation,
                                external_id_field=external_id_field)
 
-        batch = self._add_batch(job_id=job['id'], data=data,
-                                operation=operation)
-
-        self._close_job(job_id=job['id'])
+        if operation == 'query':
+            payloads = [data]
+        else:
+            payloads = _split_batches(data, batch_size, batch_bytes,
+                                      dumps=self.json_codec.dumps)
 
-        batch_status = self._get_batch(job_id=batch['jobId'],
-                                       batch_id=batch['id'])['state']
+        pool = ThreadPool(max_workers)
+        try:
+            try:
+                batches = pool.map(
+                    lambda payload: self._post_batch(job_id=job['id'],
+                                                     payload=payload),
+                    payloads)
+            except Exception:
+                # the batches already added would otherwise be left in an
+                # open job
+                self._abort_job(job_id=job['id'])
+                raise
+
+            self._close_job(job_id=job['id'])
+
+            self._wait_for_batches(job_id=job['id'], batches=batches,
+                                   polling=polling, pool=pool)
+
+            results = pool.map(
+                lambda batch: self._get_batch_results(job_id=batch['jobId'],
+                                                      batch_id=batch['id'],
+                                                      operation=operation),
+                batches)
+        finally:
+            pool.close()
+            pool.join()
+
+        if len(results) == 1:
+            return results[0]
+
+        merged = []
+        for batch_results in results:
+            merged.extend(batch_results)
+        return merged
+
+    def _poll_batches(self, job_id, batches, batch_map, started):
+        """ Requests the states of `batches` through `batch_map`, reports
+        the ones that reached a final state, and returns the others
+        """
+        states = batch_map(
+            lambda batch: self._get_batch(job_id=batch['jobId'],
+                                          batch_id=batch['id']),
+            batches)
+        pending = []
+        for batch, state in zip(batches, states):
+            if state['state'] in FINAL_BATCH_STATES:
+                self._emit(BULK_BATCH_COMPLETE, elapsed=time() - started,
+                           job_id=job_id, batch_id=batch['id'],
+                           state=state['state'])
+            else:
+                pending.append(batch)
+        return pending
 
-        while batch_status not in ['Completed', 'Failed', 'Not Processed']:
-            sleep(wait)
-            batch_status = self._get_batch(job_id=batch['jobId'],
-                                           batch_id=batch['id'])['state']
+    def _wait_for_batches(self, job_id, batches, polling, pool=None):
+        """ Blocks until every batch of the job has reached a final state,
+        checking on them according to the `polling` strategy. Batch states
+        are requested through `pool` when one is given.
+        """
+        batch_map = pool.map if pool is not None else \
+            lambda func, items: [func(item) for item in items]
+        started = time()
+        deadline = None if polling.timeout is None else time() + polling.timeout
+        delays = polling.delays()
+        pending = list(batches)
 
-        results = self._get_batch_results(job_id=batch['jobId'],
-                                          batch_id=batch['id'],
-                                          operation=operation)
-        return results
+        while True:
+            if len(pending) > polling.job_status_threshold:
+                job = self._get_job(job_id=job_id)
+                remaining = int(job['numberBatchesQueued']) + \
+                    int(job['numberBatchesInProgress'])
+                self._emit(BULK_POLL, elapsed=time() - started, job_id=job_id,
+                           pending=remaining)
+                if int(job['numberBatchesTotal']) >= len(batches) and \
+                        remaining == 0:
+                    # the batches are all final, their states are requested
+                    # once to report them
+                    self._poll_batches(job_id, pending, batch_map, started)
+                    return
+            else:
+                pending = self._poll_batches(job_id, pending, batch_map,
+                                             started)
+                self._emit(BULK_POLL, elapsed=time() - started, job_id=job_id,
+                           pending=len(pending))
+                if not pending:
+                    return
+
+            delay = next(delays)
+            if deadline is not None:
+                remaining = deadline - time()
+                if remaining <= 0:
+                    raise SalesforceBulkTimeout(
+                        "{}{}{}".format(self.bulk_url, 'job/', job_id),
+                        None, self.object_name,
+                        [batch['id'] for batch in pending])
+                delay = min(delay, remaining)
+            sleep(delay)
 
     # _bulk_operation wrappers to expose supported Salesforce bulk operations
-    def delete(self, data):
+    def delete(self, data, batch_size=DEFAULT_BATCH_SIZE,
+               batch_bytes=DEFAULT_BATCH_BYTES,
+               max_workers=DEFAULT_MAX_WORKERS, polling=None):
         """ soft delete records """
         results = self._bulk_operation(object_name=self.object_name,
-                                       operation='delete', data=data)
+                                       operation='delete', data=data,
+                                       batch_size=batch_size,
+                                       batch_bytes=batch_bytes,
+                                       max_workers=max_workers,
+                                       polling=polling)
         return results
 
-    def insert(self, data):
+    def insert(self, data, batch_size=DEFAULT_BATCH_SIZE,
+               batch_bytes=DEFAULT_BATCH_BYTES,
+               max_workers=DEFAULT_MAX_WORKERS, polling=None):
         """ insert records """
         results = self._bulk_operation(object_name=self.object_name,
-                                       operation='insert', data=data)
+                                       operation='insert', data=data,
+                                       batch_size=batch_size,
+                                       batch_bytes=batch_bytes,
+                                       max_workers=max_workers,
+                                       polling=polling)
         return results
 
-    def upsert(self, data, external_id_field):
+    def upsert(self, data, external_id_field, batch_size=DEFAULT_BATCH_SIZE,
+               batch_bytes=DEFAULT_BATCH_BYTES,
+               max_workers=DEFAULT_MAX_WORKERS, polling=None):
         """ upsert records based on a unique identifier """
         results = self._bulk_operation(object_name=self.object_name,
                                        operation='upsert',
                                        external_id_field=external_id_field,
-                                       data=data)
+                                       data=data, batch_size=batch_size,
+                                       batch_bytes=batch_bytes,
+                                       max_workers=max_workers,
+                                       polling=polling)
         return results
 
-    def update(self, data):
+    def update(self, data, batch_size=DEFAULT_BATCH_SIZE,
+               batch_bytes=DEFAULT_BATCH_BYTES,
+               max_workers=DEFAULT_MAX_WORKERS, polling=None):
         """ update records """
         results = self._bulk_operation(object_name=self.object_name,
-                                       operation='update', data=data)
+                                       operation='update', data=data,
+                                       batch_size=batch_size,
+                                       batch_bytes=batch_bytes,
+                                       max_workers=max_workers,
+                                       polling=polling)
         return results
 
-    def hard_delete(self, data):
+    def hard_delete(self, data, batch_size=DEFAULT_BATCH_SIZE,
+                    batch_bytes=DEFAULT_BATCH_BYTES,
+                    max_workers=DEFAULT_MAX_WORKERS, polling=None):
         """ hard delete records """
         results = self._bulk_operation(object_name=self.object_name,
-                                       operation='hardDelete', data=data)
+                                       operation='hardDelete', data=data,
+                                       batch_size=batch_size,
+                                       batch_bytes=batch_bytes,
+                                       max_workers=max_workers,
+                                       polling=polling)
         return results
 
-    def query(self, data):
-        """ bulk query """
+    def query(self, data, polling=None):
+        """ bulk query, returning the records of every result chunk """
         results = self._bulk_operation(object_name=self.object_name,
-                                       operation='query', data=data)
+                                       operation='query', data=data,
+                                       polling=polling)
         return results
 
-# TODO: refactor _call_salesforce, _exception_handler,
-#       and exception classes into util.py for common
-#       access between different API handlers
-
-def _call_salesforce(url, method, session, headers, **kwargs):
-    """Utility method for performing HTTP call to Salesforce.
-
-    Returns a `requests.result` object.
-    """
-
-    additional_headers = kwargs.pop('additional_headers', dict())
-    headers.update(additional_headers or dict())
-    result = session.request(method, url, headers=headers, **kwargs)
-
-    if result.status_code >= 300:
-        _exception_handler(result)
-
-    return result
-
-
-def _exception_handler(result, name=""):
-    """Exception router. Determines which error to raise for bad results"""
-    try:
-        response_content = result.json()
-    # pylint: disable=broad-except
-    except Exception:
-        response_content = result.text
-
-    exc_map = {
-        300: SalesforceMoreThanOneRecord,
-        400: SalesforceMalformedRequest,
-        401: SalesforceExpiredSession,
-        403: SalesforceRefusedRequest,
-        404: SalesforceResourceNotFound,
-    }
-    exc_cls = exc_map.get(result.status_code, SalesforceGeneralError)
-
-    raise exc_cls(result.url, result.status_code, name, response_content)
-
-
-class SalesforceMoreThanOneRecord(SalesforceError):
-    """
-    Error Code: 300
-    The value returned when an external ID exists in more than one record. The
-    response body contains the list of matching records.
-    """
-    message = u"More than one record for {url}. Response content: {content}"
-
-
-class SalesforceMalformedRequest(SalesforceError):
-    """
-    Error Code: 400
-    The request couldn't be understood, usually becaue the JSON or XML body
-    contains an error.
-    """
-    message = u"Malformed request {url}. Response content: {content}"
-
-
-class SalesforceExpiredSession(SalesforceError):
-    """
-    Error Code: 401
-    The session ID or OAuth token used has expired or is invalid. The response
-    body contains the message and errorCode.
-    """
-    message = u"Expired session for {url}. Response content: {content}"
+    def query_iter(self, data, polling=None):
+        """ bulk query, lazily yielding records as each result chunk is
+        streamed and decoded, so that only a small window of the results is
+        held in memory at once
+        """
+        batch = self._run_query(data=data, polling=polling)
+        result_ids = self._get_query_result_ids(job_id=batch['jobId'],
+                                                batch_id=batch['id'])
+        for record in self._iter_query_results(job_id=batch['jobId'],
+                                               batch_id=batch['id'],
+                                               result_ids=result_ids):
+            yield record
+
+    def download(self, data, path, polling=None):
+        """ bulk query, writing every raw result chunk straight to a file in
+        the `path` directory instead of decoding it. Returns the list of
+        file paths written, in result order.
 
+        Arguments:
 
-class SalesforceRefusedRequest(SalesforceError):
-    """
-    Error Code: 403
-    The request has been refused. Verify that the logged-in user has
-    appropriate permissions.
+        * data -- the SOQL query
+        * path -- existing directory receiving one
+                  `{batch_id}_{result_id}.json` file per result chunk
+        * polling -- `PollingStrategy` used to wait for the query batch
+        """
+        batch = self._run_query(data=data, polling=polling)
+        return self._download_query_results(job_id=batch['jobId'],
+                                            batch_id=batch['id'], path=path)
+
+def _split_batches(data, batch_size, batch_bytes, dumps=json.dumps):
+    """Serializes `data` with `dumps` into a list of JSON array payloads,
+    each holding at most `batch_size` records and, unless a single record is
+    larger on its own, at most `batch_bytes` bytes
     """
-    message = u"Request refused for {url}. Response content: {content}"
-
-
-class SalesforceResourceNotFound(SalesforceError):
+    payloads = []
+    current = []
+    current_bytes = 2  # the enclosing brackets
+
+    for record in data:
+        encoded = dumps(record)
+        # the separating comma is counted against every record
+        record_bytes = len(encoded) + 1
+        if current and (len(current) >= batch_size or
+                        current_bytes + record_bytes > batch_bytes):
+            payloads.append('[' + ','.join(current) + ']')
+            current = []
+            current_bytes = 2
+        current.append(encoded)
+        current_bytes += record_bytes
+
+    if current or not payloads:
+        payloads.append('[' + ','.join(current) + ']')
+    return payloads
+
+
+class SalesforceBulkTimeout(SalesforceError):
     """
-    Error Code: 404
-    The requested resource couldn't be found. Check the URI for errors, and
-    verify that there are no sharing issues.
+    The batches of a bulk job did not all finish before the polling
+    strategy's timeout elapsed. The content lists the pending batch IDs.
     """
-    message = u'Resource {name} Not Found. Response content: {content}'
-
-    def __str__(self):
-        return self.message.format(name=self.resource_name,
-                                   content=self.content)
+    message = u'Bulk job {url} timed out waiting for batches: {content}'
 
 
-class SalesforceGeneralError(SalesforceError):
+class SalesforceBulkBatchFailed(SalesforceError):
     """
-    A non-specific Salesforce error.
+    A batch of a bulk job failed as a whole. The content is the batch's
+    state message.
     """
-    message = u'Error Code {status}. Response content: {content}'
-
-    def __str__(self):
-        return self.message.format(status=self.status, content=self.content)
+    message = u'Bulk batch {url} failed: {content}'
@@ -0,0 +1,537 @@
+""" Classes for interacting with Salesforce Bulk API 2.0
+
+Bulk API 2.0 jobs live under the REST API (`.../services/data/vXX.X/jobs/`)
+and exchange CSV. Ingest jobs require API version 41.0 or later and query
+jobs version 47.0 or later.
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+from time import sleep, time
+
+import requests
+
+try:
+    from urlparse import urlparse
+except ImportError:
+    # Python 3+
+    from urllib.parse import urlparse
+
+from simple_salesforce.bulk import (
+    PollingStrategy,
+    SalesforceBulkTimeout,
+    STREAM_CHUNK_SIZE
+)
+from simple_salesforce.bulk_results import decode_utf8
+from simple_salesforce.credentials import (
+    CredentialProvider,
+    InstanceURL,
+    call_with_credentials
+)
+from simple_salesforce.hooks import BULK_BATCH_COMPLETE, BULK_POLL
+from simple_salesforce.util import exception_handler, send_request
+
+# the csv module of Python 2 only reads and writes byte strings, so text is
+# encoded to UTF-8 before it and decoded after it
+_CSV_BYTES = str is bytes
+_TEXT_TYPE = type(u'')  # pylint: disable=invalid-name
+# Salesforce accepts up to 150MB of base64 encoded data per ingest job,
+# which leaves room for roughly 100MB of raw CSV
+DEFAULT_MAX_BYTES = 100000000
+
+JOB_FINAL_STATES = ['JobComplete', 'Failed', 'Aborted']
+
+
+class SFBulk2Handler(object):
+    """ Bulk API 2.0 request handler
+    Intermediate class which allows us to use commands,
+     such as 'sf.bulk2.Contacts.insert(...)'
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, session_id, bulk2_url, proxies=None, session=None,
+                 api_usage=None, retry_policy=None, credentials=None,
+                 hooks=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * session_id -- the session ID for authenticating to Salesforce
+        * bulk2_url -- the `.../services/data/vXX.X/jobs/` endpoint of the
+                       Salesforce instance
+        * proxies -- the optional map of scheme to proxy server
+        * session -- Custom requests session, created in calling code. This
+                     enables the use of requests Session features not otherwise
+                     exposed by simple_salesforce.
+        * api_usage -- the optional `ApiUsage` tracking and pacing calls
+        * retry_policy -- the optional `RetryPolicy` of failed calls
+        * credentials -- the optional `CredentialProvider` shared with the
+                         client, refreshing expired sessions
+        * hooks -- the optional `Hooks` told of calls and job progress
+        """
+        self.session_id = session_id
+        self.credentials = credentials or CredentialProvider(
+            session_id, urlparse(bulk2_url).hostname)
+        self.session = session or requests.Session()
+        self._bulk2_url = InstanceURL(self.credentials, bulk2_url)
+        self.api_usage = api_usage
+        self.retry_policy = retry_policy
+        self.hooks = hooks
+        # don't wipe out original proxies with None
+        if not session and proxies is not None:
+            self.session.proxies = proxies
+
+        self.headers = {
+            'Content-Type': 'application/json',
+            'Authorization': 'Bearer ' + self.session_id,
+            'X-PrettyPrint': '1'
+        }
+
+    @property
+    def bulk2_url(self):
+        """ The Bulk API 2.0 endpoint, on the instance of the current session
+        """
+        return self._bulk2_url.get()
+
+    @bulk2_url.setter
+    def bulk2_url(self, url):
+        """ Uses `url` as the Bulk API 2.0 endpoint """
+        self._bulk2_url = InstanceURL(self.credentials, url)
+
+    def __getattr__(self, name):
+        return SFBulk2Type(object_name=name, bulk2_url=self.bulk2_url,
+                           headers=self.headers, session=self.session,
+                           api_usage=self.api_usage,
+                           retry_policy=self.retry_policy,
+                           credentials=self.credentials,
+                           hooks=self.hooks)
+
+
+class SFBulk2Type(object):
+    """ Interface to Bulk API 2.0 ingest and query jobs """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, object_name, bulk2_url, headers, session,
+                 api_usage=None, retry_policy=None, credentials=None,
+                 hooks=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * object_name -- the name of the type of SObject this represents,
+                         e.g. `Lead` or `Contact`
+        * bulk2_url -- Bulk API 2.0 endpoint set in Salesforce instance
+        * headers -- REST API headers
+        * session -- Custom requests session, created in calling code. This
+                     enables the use of requests Session features not otherwise
+                     exposed by simple_salesforce.
+        * api_usage -- the optional `ApiUsage` tracking and pacing calls
+        * retry_policy -- the optional `RetryPolicy` of failed calls
+        * credentials -- the optional `CredentialProvider` whose session
+                         replaces the one in `headers`, refreshing expired
+                         sessions
+        * hooks -- the optional `Hooks` told of calls and job progress
+        """
+        self.object_name = object_name
+        self.credentials = credentials
+        self._bulk2_url = InstanceURL(credentials, bulk2_url)
+        self.session = session
+        self.headers = headers
+        self.api_usage = api_usage
+        self.retry_policy = retry_policy
+        self.hooks = hooks
+
+    @property
+    def bulk2_url(self):
+        """ The Bulk API 2.0 endpoint, on the instance of the current session
+        """
+        return self._bulk2_url.get()
+
+    @bulk2_url.setter
+    def bulk2_url(self, url):
+        """ Uses `url` as the Bulk API 2.0 endpoint """
+        self._bulk2_url = InstanceURL(self.credentials, url)
+
+    def _call(self, method, url_part, content_type=None, accept=None,
+              **kwargs):
+        """ Performs a call relative to the Bulk API 2.0 endpoint, without
+        altering the shared headers, refreshing the session once if it expired
+        """
+        headers = dict(self.headers)
+        if content_type is not None:
+            headers['Content-Type'] = content_type
+        if accept is not None:
+            headers['Accept'] = accept
+
+        def send(url, session_id):
+            """ Makes the call with the session `session_id` """
+            if session_id is not None:
+                headers['Authorization'] = 'Bearer ' + session_id
+            return send_request(self.session, method, url,
+                                api_usage=self.api_usage,
+                                retry_policy=self.retry_policy,
+                                hooks=self.hooks,
+                                object_name=self.object_name,
+                                headers=headers, **kwargs)
+
+        result = call_with_credentials(self.credentials,
+                                       self.bulk2_url + url_part, send)
+        if result.status_code >= 300:
+            exception_handler(result)
+        return result
+
+    def _create_ingest_job(self, operation, external_id_field=None):
+        """ Create a Bulk API 2.0 ingest job expecting LF separated CSV """
+
+        payload = {
+            'object': self.object_name,
+            'operation': operation,
+            'contentType': 'CSV',
+            'columnDelimiter': 'COMMA',
+            'lineEnding': 'LF'
+        }
+
+        if operation == 'upsert':
+            payload['externalIdFieldName'] = external_id_field
+
+        result = self._call('POST', 'ingest', data=json.dumps(payload))
+        return result.json()
+
+    def _upload_job_data(self, job_id, data):
+        """ Upload the CSV `data` (a string or a file object, streamed by
+        requests) to an open ingest job
+        """
+        self._call('PUT', 'ingest/{}/batches'.format(job_id),
+                   content_type='text/csv', data=data)
+
+    def _close_ingest_job(self, job_id):
+        """ Mark the upload as complete so Salesforce starts processing """
+        result = self._call('PATCH', 'ingest/{}'.format(job_id),
+                            data=json.dumps({'state': 'UploadComplete'}))
+        return result.json()
+
+    def _abort_ingest_job(self, job_id):
+        """ Abort an ingest job, discarding the data uploaded to it """
+        result = self._call('PATCH', 'ingest/{}'.format(job_id),
+                            data=json.dumps({'state': 'Aborted'}))
+        return result.json()
+
+    def _get_job(self, job_type, job_id):
+        """ Get an existing `ingest` or `query` job to check the status """
+        result = self._call('GET', '{}/{}'.format(job_type, job_id))
+        return result.json()
+
+    def _wait_for_job(self, job_type, job_id, polling=None):
+        """ Blocks until the job reaches a final state, checking on it
+        according to the `polling` strategy, and returns its final status
+        """
+        polling = polling or PollingStrategy()
+        started = time()
+        deadline = None if polling.timeout is None else time() + polling.timeout
+        delays = polling.delays()
+
+        while True:
+            job = self._get_job(job_type, job_id)
+            if self.hooks is not None:
+                self.hooks.emit(BULK_POLL, object_name=self.object_name,
+                                elapsed=time() - started, job_id=job_id,
+                                state=job['state'])
+                if job['state'] in JOB_FINAL_STATES:
+                    self.hooks.emit(BULK_BATCH_COMPLETE,
+                                    object_name=self.object_name,
+                                    elapsed=time() - started, job_id=job_id,
+                                    state=job['state'])
+            if job['state'] in JOB_FINAL_STATES:
+                return job
+
+            delay = next(delays)
+            if deadline is not None:
+                remaining = deadline - time()
+                if remaining <= 0:
+                    raise SalesforceBulkTimeout(
+                        '{}{}/{}'.format(self.bulk2_url, job_type, job_id),
+                        None, self.object_name, [job_id])
+                delay = min(delay, remaining)
+            sleep(delay)
+
+    # pylint: disable=too-many-arguments
+    def _ingest(self, operation, csv_file=None, records=None,
+                external_id_field=None, max_bytes=DEFAULT_MAX_BYTES,
+                polling=None):
+        """ Upload the data as one or more ingest jobs and wait for them
+
+        The CSV is re-encoded row by row into temporary files of at most
+        `max_bytes`, each starting with the header row. Every part is
+        streamed to its own job as soon as it is full, so the whole CSV is
+        never held in memory.
+
+        Returns the final status of every job, in upload order.
+        """
+        job_ids = []
+        for part in _split_csv(_read_rows(csv_file, records), max_bytes):
+            try:
+                job = self._create_ingest_job(
+                    operation=operation, external_id_field=external_id_field)
+                try:
+                    self._upload_job_data(job_id=job['id'], data=part)
+                except Exception:
+                    # an open job is otherwise left behind until it expires
+                    self._abort_ingest_job(job_id=job['id'])
+                    raise
+            finally:
+                part.close()
+            self._close_ingest_job(job_id=job['id'])
+            job_ids.append(job['id'])
+
+        return [self._wait_for_job('ingest', job_id, polling)
+                for job_id in job_ids]
+
+    # _ingest wrappers to expose supported Salesforce bulk operations
+    def insert(self, csv_file=None, records=None,
+               max_bytes=DEFAULT_MAX_BYTES, polling=None):
+        """ insert records from `csv_file` (a path or file object) or
+        `records` (an iterable of dicts)
+        """
+        return self._ingest('insert', csv_file=csv_file, records=records,
+                            max_bytes=max_bytes, polling=polling)
+
+    def upsert(self, external_id_field, csv_file=None, records=None,
+               max_bytes=DEFAULT_MAX_BYTES, polling=None):
+        """ upsert records based on a unique identifier """
+        return self._ingest('upsert', csv_file=csv_file, records=records,
+                            external_id_field=external_id_field,
+                            max_bytes=max_bytes, polling=polling)
+
+    def update(self, csv_file=None, records=None,
+               max_bytes=DEFAULT_MAX_BYTES, polling=None):
+        """ update records """
+        return self._ingest('update', csv_file=csv_file, records=records,
+                            max_bytes=max_bytes, polling=polling)
+
+    def delete(self, csv_file=None, records=None,
+               max_bytes=DEFAULT_MAX_BYTES, polling=None):
+        """ soft delete records """
+        return self._ingest('delete', csv_file=csv_file, records=records,
+                            max_bytes=max_bytes, polling=polling)
+
+    def hard_delete(self, csv_file=None, records=None,
+                    max_bytes=DEFAULT_MAX_BYTES, polling=None):
+        """ hard delete records """
+        return self._ingest('hardDelete', csv_file=csv_file, records=records,
+                            max_bytes=max_bytes, polling=polling)
+
+    def _iter_csv_result(self, url_part, **kwargs):
+        """ Streams a CSV result and yields its rows as dicts """
+        result = self._call('GET', url_part, accept='text/csv', stream=True,
+                            **kwargs)
+        try:
+            lines = _split_lines(decode_utf8(
+                result.iter_content(chunk_size=STREAM_CHUNK_SIZE)))
+            for row in _csv_rows(lines, csv.DictReader):
+                yield row
+        finally:
+            result.close()
+
+    def get_successful_records(self, job_id):
+        """ Yields the successfully processed rows of an ingest job """
+        return self._iter_csv_result(
+            'ingest/{}/successfulResults/'.format(job_id))
+
+    def get_failed_records(self, job_id):
+        """ Yields the failed rows of an ingest job, with their errors """
+        return self._iter_csv_result(
+            'ingest/{}/failedResults/'.format(job_id))
+
+    def get_unprocessed_records(self, job_id):
+        """ Yields the rows of an ingest job that were not processed """
+        return self._iter_csv_result(
+            'ingest/{}/unprocessedrecords/'.format(job_id))
+
+    def _run_query(self, query, include_deleted=False, polling=None):
+        """ Create a query job and wait for it to complete """
+        payload = {
+            'operation': 'queryAll' if include_deleted else 'query',
+            'query': query,
+            'contentType': 'CSV',
+            'columnDelimiter': 'COMMA',
+            'lineEnding': 'LF'
+        }
+        job = self._call('POST', 'query', data=json.dumps(payload)).json()
+        return self._wait_for_job('query', job['id'], polling)
+
+    def _iter_query_pages(self, job_id, max_records=None):
+        """ Yields the streamed response of every page of query results,
+        following the `Sforce-Locator` header until it is exhausted
+        """
+        locator = None
+        while True:
+            params = {}
+            if max_records:
+                params['maxRecords'] = max_records
+            if locator:
+                params['locator'] = locator
+
+            result = self._call('GET', 'query/{}/results'.format(job_id),
+                                accept='text/csv', params=params, stream=True)
+            try:
+                yield result
+            finally:
+                result.close()
+
+            locator = result.headers.get('Sforce-Locator')
+            if not locator or locator == 'null':
+                break
+
+    def query(self, query, include_deleted=False, max_records=None,
+              polling=None):
+        """ Run a Bulk API 2.0 query, lazily yielding each record as a dict
+
+        Arguments:
+
+        * query -- the SOQL query
+        * include_deleted -- True to include deleted and archived records
+        * max_records -- maximum number of records per results page
+        * polling -- `PollingStrategy` used to wait for the query job
+        """
+        job = self._run_query(query, include_deleted, polling)
+        for page in self._iter_query_pages(job['id'], max_records):
+            lines = _split_lines(decode_utf8(
+                page.iter_content(chunk_size=STREAM_CHUNK_SIZE)))
+            for row in _csv_rows(lines, csv.DictReader):
+                yield row
+
+    def download(self, query, path, include_deleted=False, max_records=None,
+                 polling=None):
+        """ Run a Bulk API 2.0 query, writing every raw CSV page of results
+        to a `{job_id}_{page}.csv` file in the `path` directory. Returns the
+        list of file paths written, in result order.
+        """
+        job = self._run_query(query, include_deleted, polling)
+        file_paths = []
+        for number, page in enumerate(
+                self._iter_query_pages(job['id'], max_records)):
+            file_path = os.path.join(path, '{}_{}.csv'.format(job['id'],
+                                                              number))
+            with open(file_path, 'wb') as result_file:
+                for chunk in page.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                    result_file.write(chunk)
+            file_paths.append(file_path)
+        return file_paths
+
+
+def _read_rows(csv_file=None, records=None):
+    """ Yields the header row and then every data row of either the CSV
+    `csv_file` (a path or a file object) or the `records` dicts
+    """
+    if records is not None:
+        fields = None
+        for record in records:
+            if fields is None:
+                fields = list(record.keys())
+                yield fields
+            yield ['' if record.get(field) is None else record.get(field)
+                   for field in fields]
+        return
+
+    if csv_file is None:
+        raise ValueError('Either csv_file or records must be provided')
+
+    if isinstance(csv_file, (str, _TEXT_TYPE)):
+        with io.open(csv_file, 'rb') as csv_data:
+            for row in _read_rows(csv_data):
+                yield row
+        return
+
+    if isinstance(csv_file.read(0), bytes) and not _CSV_BYTES:
+        csv_file = io.TextIOWrapper(csv_file, encoding='utf-8', newline='')
+    for row in _csv_rows(csv_file):
+        yield row
+
+
+def _split_csv(rows, max_bytes):
+    """ Writes the header and data `rows` into temporary files holding at
+    most `max_bytes` of UTF-8 CSV each (unless a single row is larger), every
+    one starting with the header. Yields each file rewound and ready to be
+    read; the caller is responsible for closing it.
+    """
+    buffer = io.BytesIO() if _CSV_BYTES else io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+
+    def encode(row):
+        """ Encodes one row as a UTF-8 CSV line """
+        buffer.seek(0)
+        buffer.truncate()
+        if _CSV_BYTES:
+            writer.writerow([field.encode('utf-8')
+                             if isinstance(field, _TEXT_TYPE) else field
+                             for field in row])
+            return buffer.getvalue()
+        writer.writerow(row)
+        return buffer.getvalue().encode('utf-8')
+
+    header = None
+    part = None
+    part_bytes = has_rows = 0
+
+    for row in rows:
+        if header is None:
+            header = encode(row)
+            continue
+        line = encode(row)
+        if part is not None and has_rows and \
+                part_bytes + len(line) > max_bytes:
+            part.seek(0)
+            yield part
+            part = None
+        if part is None:
+            part = tempfile.TemporaryFile()
+            part.write(header)
+            part_bytes = len(header)
+            has_rows = 0
+        part.write(line)
+        part_bytes += len(line)
+        has_rows += 1
+
+    if part is not None:
+        part.seek(0)
+        yield part
+
+
+def _csv_rows(lines, reader=csv.reader):
+    """ Yields the rows `reader` parses from the CSV `lines`, with text
+    fields on Python 2 as well
+    """
+    if not _CSV_BYTES:
+        for row in reader(lines):
+            yield row
+        return
+
+    for row in reader(line if isinstance(line, bytes) else
+                      line.encode('utf-8') for line in lines):
+        if isinstance(row, dict):
+            yield dict((_decode_field(key), _decode_field(value))
+                       for key, value in row.items())
+        else:
+            yield [_decode_field(field) for field in row]
+
+
+def _decode_field(field):
+    """ Decodes a field read by the csv module of Python 2 """
+    return field.decode('utf-8') if isinstance(field, bytes) else field
+
+
+def _split_lines(chunks):
+    """ Re-splits text `chunks` into lines ending with '\\n', keeping the
+    line endings so quoted fields with newlines survive csv parsing
+    """
+    pending = ''
+    for chunk in chunks:
+        lines = (pending + chunk).split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line + '\n'
+    if pending:
+        yield pending
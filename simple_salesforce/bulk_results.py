@@ -0,0 +1,175 @@
+""" Decoding of the JSON results of Bulk API batches
+
+Result payloads can be large and are sometimes missing the delimiters
+between rows, so they are parsed incrementally as they are downloaded, and
+repaired in a single scan when needed.
+"""
+
+import codecs
+import json
+import re
+
+# Tokens of a JSON document: a complete string, a structural character or a
+# bare literal (number, true, false, null)
+_JSON_TOKEN = re.compile(
+    r'\s*(?:("(?:[^"\\]|\\.)*")|([{}\[\],:])|([^\s{}\[\],:"]+))', re.S)
+_JSON_WHITESPACE = re.compile(r'\s*')
+
+
+def _repair_value(text, pos):
+    """ Scans the JSON value starting at `pos` once, inserting the commas
+    Salesforce sometimes omits between consecutive values.
+
+    Returns a tuple of the repaired value text and the position just past
+    the value, or `(None, pos)` if `text` ends before the value does.
+    """
+    parts = []
+    depth = 0
+    after_value = False
+
+    while True:
+        match = _JSON_TOKEN.match(text, pos)
+        if match is None:
+            return None, pos
+        string, structural, literal = match.groups()
+        token = string or structural or literal
+        starts_value = structural is None or structural in '{['
+
+        if starts_value and after_value:
+            parts.append(',')
+        parts.append(token)
+        pos = match.end()
+
+        if structural is None:
+            after_value = True
+        elif structural in '{[':
+            depth += 1
+            after_value = False
+        elif structural in '}]':
+            depth -= 1
+            after_value = True
+        else:
+            after_value = False
+
+        if depth <= 0:
+            return ''.join(parts), pos
+
+
+class BulkResultParser(object):
+    """ Incremental parser for the JSON arrays returned by the Bulk API
+
+    Text is fed in as it arrives and every completed top-level row is
+    returned straight away. Each row is decoded by the C accelerated
+    `json` decoder; rows with missing delimiters are repaired in a single
+    scan, so malformed payloads cost linear rather than quadratic time.
+    """
+
+    def __init__(self, object_pairs_hook=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * object_pairs_hook -- passed to the JSON decoder for every object
+        """
+        self._decoder = json.JSONDecoder(object_pairs_hook=object_pairs_hook)
+        self._buffer = ''
+        self._started = False
+        self._finished = False
+
+    def feed(self, text):
+        """ Adds `text` to the document and returns the list of rows it
+        completed
+        """
+        self._buffer += text
+        return self._parse(final=False)
+
+    def close(self):
+        """ Returns any remaining rows, raising `ValueError` if the
+        document is incomplete
+        """
+        rows = self._parse(final=True)
+        if not self._finished:
+            raise ValueError('Incomplete bulk result payload')
+        return rows
+
+    def _parse(self, final):
+        """ Decodes as many rows as possible from the buffer """
+        rows = []
+        text = self._buffer
+        pos = 0
+
+        while not self._finished:
+            pos = _JSON_WHITESPACE.match(text, pos).end()
+            if pos >= len(text):
+                break
+
+            if not self._started:
+                if text[pos] != '[':
+                    raise ValueError(
+                        'Expected a JSON array at char {}'.format(pos))
+                self._started = True
+                pos += 1
+                continue
+
+            if text[pos] == ']':
+                self._finished = True
+                pos += 1
+                break
+            if text[pos] == ',':
+                pos += 1
+                continue
+
+            try:
+                row, end = self._decoder.raw_decode(text, pos)
+                # a number at the end of the buffer may still be growing
+                if end >= len(text) and not final:
+                    break
+            except ValueError:
+                repaired, end = _repair_value(text, pos)
+                if repaired is None:
+                    if final:
+                        raise
+                    break
+                row = self._decoder.decode(repaired)
+            rows.append(row)
+            pos = end
+
+        self._buffer = text[pos:]
+        return rows
+
+
+def decode_utf8(chunks):
+    """ Decodes an iterable of UTF-8 byte `chunks` into text, coping with
+    multi-byte characters split across chunks
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in chunks:
+        yield decoder.decode(chunk)
+    yield decoder.decode(b'', final=True)
+
+
+def iter_batch_results(chunks, object_pairs_hook=None):
+    """ Lazily yields the rows of a bulk result array delivered as an
+    iterable of text `chunks`
+    """
+    parser = BulkResultParser(object_pairs_hook=object_pairs_hook)
+    for chunk in chunks:
+        for row in parser.feed(chunk):
+            yield row
+    for row in parser.close():
+        yield row
+
+
+def load_batch_results(text, loads=json.loads):
+    """Decodes the JSON results of a completed batch with `loads`,
+    repairing the missing delimiters Salesforce occasionally leaves between
+    result rows
+    """
+    try:
+        return loads(text)
+    except ValueError:
+        pass
+    if not text.lstrip().startswith('['):
+        repaired, _ = _repair_value(text, 0)
+        return json.loads(repaired if repaired is not None else text)
+    return list(iter_batch_results([text]))
@@ -0,0 +1,185 @@
+"""Caching of describe and metadata results
+
+Describe results are large and rarely change, so they can be kept for a
+while and revalidated cheaply: Salesforce answers a request carrying
+`If-Modified-Since` with an empty `304 Not Modified` when the object has
+not changed since.
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from time import time
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python < 2.7
+    from ordereddict import OrderedDict
+
+from simple_salesforce.codec import DEFAULT_CODEC
+
+RESPONSE_CODE_NOT_MODIFIED = 304
+
+# os.rename doesn't replace an existing file on Windows
+_replace = getattr(os, 'replace', os.rename)
+
+
+class CacheEntry(object):
+    """A cached, already decoded, result"""
+
+    def __init__(self, value, last_modified=None, stored_at=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * value -- the decoded result
+        * last_modified -- the `Last-Modified` header of the response
+        * stored_at -- when the result was fetched or last revalidated
+        """
+        self.value = value
+        self.last_modified = last_modified
+        self.stored_at = time() if stored_at is None else stored_at
+
+
+class DescribeCache(object):
+    """In-memory LRU cache of describe results, optionally persisted to disk
+
+    Entries are used without any request while younger than `ttl`, then
+    revalidated with `If-Modified-Since`. Persisted entries are pickled, so
+    `path` must be a directory only trusted processes can write to.
+
+    Cached values are shared between callers and must not be modified.
+    """
+
+    def __init__(self, maxsize=256, ttl=3600, path=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * maxsize -- the number of results kept in memory
+        * ttl -- the number of seconds a result is used without revalidation
+        * path -- the optional directory where results are persisted, so
+                  that they survive restarts and are shared by processes
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if path is not None and not os.path.isdir(path):
+            os.makedirs(path)
+
+    def is_fresh(self, entry):
+        """Whether `entry` can be used without revalidation"""
+        return time() - entry.stored_at < self.ttl
+
+    def get(self, key):
+        """Returns the `CacheEntry` stored for `key`, or None"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+                return entry
+
+        entry = self._load(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def set(self, key, value, last_modified=None):
+        """Stores the decoded `value` of a result for `key`"""
+        entry = CacheEntry(value, last_modified)
+        self._remember(key, entry)
+        self._store(key, entry)
+        return entry
+
+    def touch(self, key, entry):
+        """Marks `entry` as just revalidated"""
+        return self.set(key, entry.value, entry.last_modified)
+
+    def clear(self):
+        """Forgets every result, including the persisted ones"""
+        with self._lock:
+            self._entries.clear()
+        if self.path is not None:
+            for name in os.listdir(self.path):
+                if name.endswith('.pickle'):
+                    os.remove(os.path.join(self.path, name))
+
+    def _remember(self, key, entry):
+        """Keeps `entry` in memory, evicting the least recently used"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _file_path(self, key):
+        """Returns the file persisting the entry of `key`"""
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest + '.pickle')
+
+    def _load(self, key):
+        """Reads the persisted entry of `key`, if any"""
+        if self.path is None:
+            return None
+        try:
+            with open(self._file_path(key), 'rb') as cache_file:
+                stored_key, entry = pickle.load(cache_file)
+        # pylint: disable=broad-except
+        except Exception:
+            # missing, or written by an incompatible version
+            return None
+        return entry if stored_key == key else None
+
+    def _store(self, key, entry):
+        """Persists `entry` atomically, so readers never see partial files"""
+        if self.path is None:
+            return
+        handle, temp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as cache_file:
+                pickle.dump((key, entry), cache_file,
+                            pickle.HIGHEST_PROTOCOL)
+            _replace(temp_path, self._file_path(key))
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+
+def cached_get(cache, key, fetch, codec=DEFAULT_CODEC):
+    """Returns the decoded result of `fetch`, going through `cache`
+
+    Arguments:
+
+    * cache -- a `DescribeCache`, or None to always fetch
+    * key -- the key of the result, naming the instance, API version and
+             object it belongs to
+    * fetch -- a callable performing the request with the dict of headers
+               it is given, and returning the `requests.Response`. The
+               headers are only non-empty for conditional requests, the
+               only ones a `304 Not Modified` may be accepted for.
+    * codec -- the `JSONCodec` decoding the response
+    """
+    if cache is None:
+        return codec.decode(fetch({}))
+
+    entry = cache.get(key)
+    if entry is not None and cache.is_fresh(entry):
+        return entry.value
+
+    headers = {}
+    if entry is not None and entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    result = fetch(headers)
+
+    if entry is not None and \
+            result.status_code == RESPONSE_CODE_NOT_MODIFIED:
+        return cache.touch(key, entry).value
+
+    value = codec.decode(result)
+    cache.set(key, value, result.headers.get('Last-Modified'))
+    return value
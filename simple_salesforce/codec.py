@@ -0,0 +1,83 @@
+"""JSON encoding and decoding of API payloads
+
+By default responses are decoded with the standard library into
+`OrderedDict`s, which keeps field order on every Python version. Building an
+`OrderedDict` per record is slow and memory hungry on large query pages, so
+a `JSONCodec` can instead decode into plain dicts (which keep insertion order
+from Python 3.7) and use a faster backend such as `orjson` or `ujson` when
+it is installed.
+"""
+
+import importlib
+import json
+
+from simple_salesforce.profiler import measure
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python < 2.7
+    from ordereddict import OrderedDict
+
+# optional backends, fastest first
+FAST_BACKENDS = ('orjson', 'ujson')
+
+
+class JSONCodec(object):
+    """Encodes request payloads and decodes response bodies"""
+
+    def __init__(self, backend='json', ordered=True):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * backend -- the name of the module doing the work: `json` (the
+                     default), `orjson` or `ujson`
+        * ordered -- decode objects into `OrderedDict`s (the default) instead
+                     of plain dicts. Only the `json` backend supports it.
+        """
+        if ordered and backend != 'json':
+            raise ValueError(
+                'The {} backend decodes into plain dicts, pass '
+                'ordered=False to use it'.format(backend))
+        self.backend = backend
+        self.ordered = ordered
+        self._module = importlib.import_module(backend)
+        self._object_pairs_hook = OrderedDict if ordered else None
+
+    @classmethod
+    def fastest(cls):
+        """Returns a codec decoding into plain dicts with the fastest backend
+        installed
+        """
+        for backend in FAST_BACKENDS:
+            try:
+                return cls(backend=backend, ordered=False)
+            except ImportError:
+                continue
+        return cls(ordered=False)
+
+    def loads(self, data):
+        """Decodes the JSON document `data` (text or UTF-8 bytes)"""
+        if self.backend == 'json':
+            if isinstance(data, bytes):
+                data = data.decode('utf-8')
+            return json.loads(data, object_pairs_hook=self._object_pairs_hook)
+        return self._module.loads(data)
+
+    def dumps(self, obj):
+        """Encodes `obj` into a JSON string"""
+        if self.backend == 'orjson':
+            return self._module.dumps(obj).decode('utf-8')
+        return self._module.dumps(obj)
+
+    def decode(self, result):
+        """Decodes the body of the `requests.Response` `result`"""
+        with measure(result, 'decode'):
+            if self.backend == 'json':
+                # let requests guess the encoding, as it always has
+                return result.json(object_pairs_hook=self._object_pairs_hook)
+            return self._module.loads(result.content)
+
+
+DEFAULT_CODEC = JSONCodec()
@@ -0,0 +1,234 @@
+"""Columnar query results
+
+Builds typed columns page by page while a query is read, instead of
+collecting every record first. Column types come from the describe field
+metadata of the queried objects, relationship fields such as
+`Account.Owner.Name` become flat columns and the `attributes` of records are
+dropped.
+
+Requires NumPy, and PyArrow for Arrow tables.
+"""
+
+import re
+from array import array
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python < 2.7
+    from ordereddict import OrderedDict
+
+import numpy
+
+# column kind of every describe field type not stored as a string
+FIELD_TYPE_KINDS = {
+    'boolean': 'bool',
+    'int': 'int',
+    'double': 'float',
+    'currency': 'float',
+    'percent': 'float',
+    'date': 'date',
+    'datetime': 'datetime',
+}
+
+_SELECT = re.compile(r'^\s*SELECT\s+(.+?)\s+FROM\s+(\w+)', re.I | re.S)
+
+
+def _find_field(describe, name):
+    """Returns the describe metadata of field `name`, ignoring case"""
+    name = name.lower()
+    for field in describe['fields']:
+        if field['name'].lower() == name:
+            return field
+    raise ValueError('No field {} on {}'.format(name, describe['name']))
+
+
+def _find_relationship(describe, name):
+    """Returns the describe metadata of the lookup field behind the
+    relationship `name`, ignoring case
+    """
+    name = name.lower()
+    for field in describe['fields']:
+        if (field.get('relationshipName') or '').lower() == name:
+            return field
+    raise ValueError('No relationship {} on {}'.format(name,
+                                                       describe['name']))
+
+
+def describe_columns(query, describe):
+    """Returns the `(name, path, kind)` of every column selected by the SOQL
+    `query`, with names in the case Salesforce returns them
+
+    Arguments:
+
+    * query -- a SOQL query selecting plain and relationship fields
+    * describe -- a callable returning the describe result of an object
+    """
+    match = _SELECT.match(query)
+    if match is None:
+        raise ValueError('Not a SOQL query: {}'.format(query))
+    select, object_name = match.groups()
+    if '(' in select:
+        raise ValueError('Columnar results do not support subqueries, '
+                         'functions or TYPEOF')
+
+    # every object is described once, however many of its fields are
+    # selected
+    described = {}
+
+    def describe_once(name):
+        """Returns the describe result of the object `name`"""
+        if name.lower() not in described:
+            described[name.lower()] = describe(name)
+        return described[name.lower()]
+
+    columns = []
+    for selected in select.split(','):
+        parts = selected.strip().split('.')
+        current = describe_once(object_name)
+        path = []
+        for relationship in parts[:-1]:
+            field = _find_relationship(current, relationship)
+            path.append(field['relationshipName'])
+            current = describe_once(field['referenceTo'][0])
+        field = _find_field(current, parts[-1])
+        path.append(field['name'])
+        columns.append(('.'.join(path), tuple(path),
+                        FIELD_TYPE_KINDS.get(field['type'], 'string')))
+    return columns
+
+
+class Column(object):
+    """A growing column of values of one kind
+
+    Numbers and booleans are stored in compact arrays next to a validity
+    mask, other values as Python objects.
+    """
+
+    def __init__(self, kind):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * kind -- one of `bool`, `int`, `float`, `date`, `datetime` or
+                  `string`
+        """
+        self.kind = kind
+        self.valid = bytearray()
+        if kind == 'float':
+            self.values = array('d')
+        elif kind == 'int':
+            self.values = array('q')
+        elif kind == 'bool':
+            self.values = bytearray()
+        else:
+            self.values = []
+
+    def extend(self, values):
+        """Appends the list of decoded JSON `values`"""
+        if self.kind in ('bool', 'int', 'float'):
+            self.valid.extend([value is not None for value in values])
+            self.values.extend([0 if value is None else value
+                                for value in values])
+        elif self.kind == 'datetime':
+            # always UTC, e.g. 2026-10-14T10:00:00.000+0000
+            self.values.extend([value and value[:23] for value in values])
+        else:
+            self.values.extend(values)
+
+    def _mask(self):
+        """Returns the numpy mask of missing values"""
+        return numpy.frombuffer(bytes(self.valid), dtype=numpy.bool_) == 0
+
+    def to_numpy(self):
+        """Returns the column as a numpy array. Missing numbers are NaN,
+        missing dates NaT, and integer or boolean columns with missing
+        values are masked arrays.
+        """
+        if self.kind == 'float':
+            data = numpy.array(self.values, dtype=numpy.float64)
+            data[self._mask()] = numpy.nan
+            return data
+        if self.kind in ('int', 'bool'):
+            if self.kind == 'int':
+                data = numpy.array(self.values, dtype=numpy.int64)
+            else:
+                data = numpy.frombuffer(bytes(self.values),
+                                        dtype=numpy.bool_)
+            mask = self._mask()
+            return numpy.ma.MaskedArray(data, mask=mask) if mask.any() \
+                else data
+        if self.kind == 'date':
+            return numpy.array(self.values, dtype='datetime64[D]')
+        if self.kind == 'datetime':
+            return numpy.array(self.values, dtype='datetime64[ms]')
+        data = numpy.empty(len(self.values), dtype=object)
+        data[:] = self.values
+        return data
+
+    def to_arrow(self):
+        """Returns the column as a `pyarrow.Array`"""
+        # pylint: disable=import-error
+        import pyarrow
+
+        if self.kind in ('bool', 'int', 'float'):
+            data = numpy.ma.getdata(self.to_numpy())
+            return pyarrow.array(data, mask=self._mask())
+        if self.kind == 'date':
+            return pyarrow.array(self.to_numpy(), type=pyarrow.date32(),
+                                 from_pandas=True)
+        if self.kind == 'datetime':
+            return pyarrow.array(self.to_numpy(),
+                                 type=pyarrow.timestamp('ms', tz='UTC'),
+                                 from_pandas=True)
+        return pyarrow.array(self.values, type=pyarrow.string())
+
+
+def _getter(path):
+    """Returns a function reading the value at `path` from a record"""
+    if len(path) == 1:
+        name = path[0]
+        return lambda record: record.get(name)
+
+    def get(record):
+        """Walks the relationships of `record`"""
+        for name in path:
+            if record is None:
+                return None
+            record = record.get(name)
+        return record
+    return get
+
+
+class ColumnBuilder(object):
+    """Appends query result pages to typed columns"""
+
+    def __init__(self, columns):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * columns -- the `(name, path, kind)` of every column, as returned
+                     by `describe_columns`
+        """
+        self.names = [name for name, _, _ in columns]
+        self.getters = [_getter(path) for _, path, _ in columns]
+        self.columns = [Column(kind) for _, _, kind in columns]
+
+    def append_page(self, records):
+        """Appends the `records` of one query result page"""
+        for getter, column in zip(self.getters, self.columns):
+            column.extend([getter(record) for record in records])
+
+    def to_numpy(self):
+        """Returns an OrderedDict of column name to numpy array"""
+        return OrderedDict((name, column.to_numpy())
+                           for name, column in zip(self.names, self.columns))
+
+    def to_arrow(self):
+        """Returns the columns as a `pyarrow.Table`"""
+        # pylint: disable=import-error
+        import pyarrow
+
+        return pyarrow.Table.from_arrays(
+            [column.to_arrow() for column in self.columns], names=self.names)
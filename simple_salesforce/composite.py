@@ -0,0 +1,587 @@
+""" Classes for grouping REST API calls into composite requests
+
+The composite resources save round trips (and API calls against the daily
+limit) by sending several operations in a single HTTP request:
+
+* `/composite/batch` runs up to 25 independent subrequests (API 34.0+)
+* `/composite` runs up to 25 dependent subrequests, which can refer to the
+  results of earlier ones with reference ids (API 38.0+)
+* `/composite/sobjects` creates, updates, upserts or deletes up to 200
+  records of the same call at once, and retrieves up to 2,000 records of
+  the same type (API 42.0+)
+"""
+
+from collections import OrderedDict
+try:
+    from urlparse import urljoin
+except ImportError:
+    # Python 3+
+    from urllib.parse import urljoin
+
+from simple_salesforce.profiler import measure
+from simple_salesforce.util import exception_for_status
+
+MAX_BATCH_REQUESTS = 25
+MAX_COMPOSITE_REQUESTS = 25
+MAX_COLLECTION_RECORDS = 200
+MAX_RETRIEVE_IDS = 2000
+COLLECTIONS_MIN_VERSION = 42.0
+# Ids per `WHERE Id IN (...)` query, keeping the query URL short enough
+MAX_QUERY_IDS = 300
+DEFAULT_MAX_WORKERS = 4
+
+# HTTP status used to pick the exception raised for a per-record error,
+# mirroring the status Salesforce answers with for a single record call
+ERROR_CODE_STATUS = {
+    'DUPLICATE_EXTERNAL_ID': 300,
+    'INVALID_SESSION_ID': 401,
+    'INSUFFICIENT_ACCESS': 403,
+    'INSUFFICIENT_ACCESS_ON_CROSS_REFERENCE_ENTITY': 403,
+    'INSUFFICIENT_ACCESS_OR_READONLY': 403,
+    'REQUEST_LIMIT_EXCEEDED': 403,
+    'ENTITY_IS_DELETED': 404,
+    'NOT_FOUND': 404,
+}
+
+
+class CompositeSubrequest(object):
+    """A single operation queued in an `SFBatch` or `SFComposite`
+
+    Its outcome is available once the collector has been executed.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, method, path, object_name, data=None,
+                 reference_id=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * method -- the HTTP method of the subrequest
+        * path -- the URL of the subrequest, relative to the versioned
+                  `.../services/data/vXX.X/` REST endpoint
+        * object_name -- the name of the SObject type, used in exceptions
+        * data -- the optional dict sent as the subrequest body
+        * reference_id -- the id other subrequests use to refer to this one
+        """
+        self.method = method
+        self.path = path
+        self.object_name = object_name
+        self.data = data
+        self.reference_id = reference_id
+        self.status_code = None
+        self.body = None
+
+    @property
+    def done(self):
+        """Whether a response has been received for this subrequest"""
+        return self.status_code is not None
+
+    @property
+    def result(self):
+        """The decoded body of the response to this subrequest
+
+        Raises the same exception as the equivalent `SFType` call when the
+        subrequest failed.
+        """
+        if not self.done:
+            raise ValueError('The subrequest has not been executed yet')
+        if self.status_code >= 300:
+            raise exception_for_status(self.path, self.status_code,
+                                       self.object_name, self.body)
+        return self.body
+
+    def ref(self, field='id'):
+        """Returns a reference to `field` of this subrequest's result, to be
+        used in the URL or body of a later subrequest of the same
+        `SFComposite`
+        """
+        if self.reference_id is None:
+            raise ValueError('Only composite subrequests can be referenced')
+        return '@{{{ref}.{field}}}'.format(ref=self.reference_id,
+                                           field=field)
+
+    def set_response(self, status_code, body):
+        """Records the response received for this subrequest"""
+        self.status_code = status_code
+        self.body = body
+
+
+class CompositeSFType(object):
+    """Queues `SFType` calls on a composite collector instead of sending
+    them right away. Every method returns a `CompositeSubrequest`.
+    """
+
+    def __init__(self, object_name, collector):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * object_name -- the name of the type of SObject this represents,
+                         e.g. `Lead` or `Contact`
+        * collector -- the `SFBatch` or `SFComposite` to queue calls on
+        """
+        self.name = object_name
+        self.collector = collector
+        self.base_path = 'sobjects/{object_name}/'.format(
+            object_name=object_name)
+
+    def _add(self, method, path='', data=None):
+        """Queues a subrequest relative to this object's endpoint"""
+        return self.collector.add(method, self.base_path + path,
+                                  object_name=self.name, data=data)
+
+    def metadata(self):
+        """Queues a GET to `.../{object_name}/`"""
+        return self._add('GET')
+
+    def describe(self):
+        """Queues a GET to `.../{object_name}/describe`"""
+        return self._add('GET', 'describe')
+
+    def get(self, record_id):
+        """Queues a GET to `.../{object_name}/{record_id}`"""
+        return self._add('GET', record_id)
+
+    def get_by_custom_id(self, custom_id_field, custom_id):
+        """Queues a GET to `.../{object_name}/{custom_id_field}/{custom_id}`
+        """
+        return self._add('GET', '{custom_id_field}/{custom_id}'.format(
+            custom_id_field=custom_id_field, custom_id=custom_id))
+
+    def create(self, data):
+        """Queues a POST to `.../{object_name}/`"""
+        return self._add('POST', data=data)
+
+    def upsert(self, record_id, data):
+        """Queues a PATCH to `.../{object_name}/{record_id}`"""
+        return self._add('PATCH', record_id, data=data)
+
+    def update(self, record_id, data):
+        """Queues a PATCH to `.../{object_name}/{record_id}`"""
+        return self._add('PATCH', record_id, data=data)
+
+    def delete(self, record_id):
+        """Queues a DELETE to `.../{object_name}/{record_id}`"""
+        return self._add('DELETE', record_id)
+
+
+class _CompositeCollector(object):
+    """Common behaviour of the composite collectors
+
+    Attribute access returns a `CompositeSFType`, so that calls read the
+    same as on `Salesforce`, e.g. `batch.Contact.get(...)`. Used as a
+    context manager, the queued subrequests are sent on exit.
+    """
+
+    def __init__(self, salesforce):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * salesforce -- the `Salesforce` instance sending the requests
+        """
+        self.salesforce = salesforce
+        self.subrequests = []
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return CompositeSFType(name, self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+
+    def _url(self, path):
+        """Returns the absolute path of a versioned REST `path`"""
+        return '/services/data/v{version}/{path}'.format(
+            version=self.salesforce.sf_version, path=path)
+
+    def _post(self, resource, payload):
+        """Sends `payload` to a composite `resource` and returns the decoded
+        response
+        """
+        # pylint: disable=protected-access
+        result = self.salesforce._call_salesforce(
+            'POST', self.salesforce.base_url + resource,
+            data=self.salesforce.json_codec.dumps(payload))
+        return self.salesforce.json_codec.decode(result)
+
+    def add(self, method, path, object_name='', data=None):
+        """Queues a subrequest and returns its `CompositeSubrequest`
+
+        Arguments:
+
+        * method -- the HTTP method of the subrequest
+        * path -- the URL of the subrequest, relative to the versioned
+                  `.../services/data/vXX.X/` REST endpoint, e.g. `limits`
+        * object_name -- the name of the SObject type, used in exceptions
+        * data -- the optional dict sent as the subrequest body
+        """
+        subrequest = CompositeSubrequest(method, path, object_name, data)
+        self.subrequests.append(subrequest)
+        return subrequest
+
+
+class SFBatch(_CompositeCollector):
+    """Collects independent calls and sends them through
+    `/composite/batch`, 25 subrequests per HTTP request
+    """
+
+    def __init__(self, salesforce, halt_on_error=False):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * salesforce -- the `Salesforce` instance sending the requests
+        * halt_on_error -- stop processing the remaining subrequests after
+                           the first failure. They report a 412 status.
+        """
+        super(SFBatch, self).__init__(salesforce)
+        self.halt_on_error = halt_on_error
+
+    def execute(self):
+        """Sends the subrequests not sent yet and returns every subrequest,
+        in the order they were added, with its response set
+        """
+        pending = [subrequest for subrequest in self.subrequests
+                   if not subrequest.done]
+        halted = False
+        for start in range(0, len(pending), MAX_BATCH_REQUESTS):
+            chunk = pending[start:start + MAX_BATCH_REQUESTS]
+            if halted:
+                for subrequest in chunk:
+                    subrequest.set_response(412, [{
+                        'errorCode': 'BATCH_PROCESSING_HALTED',
+                        'message': 'Batch processing halted per request'}])
+                continue
+
+            batch_requests = []
+            for subrequest in chunk:
+                batch_request = {
+                    'method': subrequest.method,
+                    'url': 'v{version}/{path}'.format(
+                        version=self.salesforce.sf_version,
+                        path=subrequest.path)
+                }
+                if subrequest.data is not None:
+                    batch_request['richInput'] = subrequest.data
+                batch_requests.append(batch_request)
+
+            response = self._post('composite/batch', {
+                'haltOnError': self.halt_on_error,
+                'batchRequests': batch_requests
+            })
+            for subrequest, result in zip(chunk, response['results']):
+                subrequest.set_response(result['statusCode'],
+                                         result['result'])
+            halted = self.halt_on_error and response['hasErrors']
+
+        return list(self.subrequests)
+
+
+class SFComposite(_CompositeCollector):
+    """Collects up to 25 calls that may depend on each other and sends them
+    in a single `/composite` request
+
+    Use `CompositeSubrequest.ref` to refer to the result of an earlier
+    subrequest, e.g.
+
+        account = composite.Account.create({'Name': 'Acme'})
+        composite.Contact.create({'LastName': 'Smith',
+                                  'AccountId': account.ref('id')})
+    """
+
+    def __init__(self, salesforce, all_or_none=False):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * salesforce -- the `Salesforce` instance sending the requests
+        * all_or_none -- roll back every subrequest when one of them fails
+        """
+        super(SFComposite, self).__init__(salesforce)
+        self.all_or_none = all_or_none
+
+    def add(self, method, path, object_name='', data=None):
+        if len(self.subrequests) >= MAX_COMPOSITE_REQUESTS:
+            raise ValueError(
+                'A composite request holds at most {} subrequests'.format(
+                    MAX_COMPOSITE_REQUESTS))
+        subrequest = super(SFComposite, self).add(method, path, object_name,
+                                                  data)
+        subrequest.reference_id = 'ref{}'.format(len(self.subrequests) - 1)
+        return subrequest
+
+    def execute(self):
+        """Sends the subrequests and returns them, in the order they were
+        added, with their responses set
+        """
+        composite_request = []
+        for subrequest in self.subrequests:
+            request = {
+                'method': subrequest.method,
+                'url': self._url(subrequest.path),
+                'referenceId': subrequest.reference_id
+            }
+            if subrequest.data is not None:
+                request['body'] = subrequest.data
+            composite_request.append(request)
+
+        response = self._post('composite', {
+            'allOrNone': self.all_or_none,
+            'compositeRequest': composite_request
+        })
+        by_reference = dict((subrequest.reference_id, subrequest)
+                            for subrequest in self.subrequests)
+        for result in response['compositeResponse']:
+            by_reference[result['referenceId']].set_response(
+                result['httpStatusCode'], result['body'])
+
+        return list(self.subrequests)
+
+
+def iter_collection_chunks(records, size=MAX_COLLECTION_RECORDS):
+    """Yields `records` in chunks accepted by `/composite/sobjects`"""
+    records = list(records)
+    for start in range(0, len(records), size):
+        yield records[start:start + size]
+
+
+def collection_records(object_name, records):
+    """Returns copies of the `records` dicts carrying the `attributes` type
+    required by `/composite/sobjects`
+    """
+    typed = []
+    for record in records:
+        record = OrderedDict(record)
+        record.setdefault('attributes', {'type': object_name})
+        typed.append(record)
+    return typed
+
+
+def collection_results(url, object_name, results):
+    """Maps the per-record `results` of a `/composite/sobjects` call
+
+    Successful records keep their result dict, while each failed record is
+    replaced by the exception the equivalent single record call would have
+    raised (returned, not raised, so one bad record doesn't hide the rest).
+    """
+    mapped = []
+    for result in results:
+        if result.get('success'):
+            mapped.append(result)
+            continue
+        errors = result.get('errors') or []
+        status_code = errors[0].get('statusCode') if errors else None
+        mapped.append(exception_for_status(
+            url, ERROR_CODE_STATUS.get(status_code, 400), object_name, errors))
+    return mapped
+
+
+def _quote_soql(value):
+    """Escapes `value` for use in a quoted SOQL string literal"""
+    return value.replace('\\', '\\\\').replace("'", "\\'")
+
+
+class CompositeMixin(object):
+    """The composite collectors handed out by `Salesforce`"""
+
+    def batch(self, halt_on_error=False):
+        """Returns an `SFBatch` collecting independent SObject calls, sent
+        through `/composite/batch` 25 at a time when it is executed, e.g.
+
+            with sf.batch() as batch:
+                first = batch.Contact.get('003e0000003GuNXAA0')
+                second = batch.Contact.delete('003e0000003GuNYAA0')
+            first.result
+
+        Arguments:
+
+        * halt_on_error -- skip the remaining calls after the first failure
+        """
+        return SFBatch(self, halt_on_error=halt_on_error)
+
+    def composite(self, all_or_none=False):
+        """Returns an `SFComposite` collecting up to 25 SObject calls, sent
+        in a single `/composite` request when it is executed. Later calls
+        can refer to the results of earlier ones through their `ref(...)`.
+
+        Arguments:
+
+        * all_or_none -- roll back every call when one of them fails
+        """
+        return SFComposite(self, all_or_none=all_or_none)
+
+
+class CollectionsMixin(object):
+    """The `/composite/sobjects` calls of `SFType`, sending or retrieving
+    many records of the type per request
+    """
+
+    @property
+    def collection_url(self):
+        """The sObject Collections endpoint of the current instance"""
+        return urljoin(self.base_url, '../../composite/sobjects')
+
+    def get_many(self, record_ids, fields=None,
+                 max_workers=DEFAULT_MAX_WORKERS, headers=None):
+        """Returns the SObjects with the given Ids, in the same order, with
+        None for the Ids of records that don't exist (or were deleted).
+
+        Records are retrieved 2,000 at a time through `/composite/sobjects`
+        (API version 42.0 or later), or else with `WHERE Id IN (...)`
+        queries of 300 Ids. The requests run concurrently.
+
+        Arguments:
+
+        * record_ids -- an iterable of record Ids
+        * fields -- the fields to return, by default every field of
+                    `describe()`
+        * max_workers -- the number of requests sent at once
+        * headers -- a dict with additional request headers.
+        """
+        record_ids = list(record_ids)
+        if fields is None:
+            fields = [field['name'] for field in self.describe()['fields']]
+
+        if float(self.sf_version) >= COLLECTIONS_MIN_VERSION:
+            fetch, size = self._retrieve_chunk, MAX_RETRIEVE_IDS
+        else:
+            fetch, size = self._query_chunk, MAX_QUERY_IDS
+        chunks = [(chunk, fields, headers)
+                  for chunk in iter_collection_chunks(record_ids, size)]
+
+        if len(chunks) <= 1 or max_workers <= 1:
+            results = [fetch(*chunk) for chunk in chunks]
+        else:
+            from multiprocessing.pool import ThreadPool
+            pool = ThreadPool(min(max_workers, len(chunks)))
+            try:
+                results = pool.map(lambda chunk: fetch(*chunk), chunks)
+            finally:
+                pool.close()
+                pool.join()
+        return [record for records in results for record in records]
+
+    def _retrieve_chunk(self, record_ids, fields, headers):
+        """Retrieves up to 2,000 records through `/composite/sobjects`"""
+        result = self._call_salesforce(
+            method='POST', url=self.collection_url + '/' + self.name,
+            headers=headers,
+            data=self.json_codec.dumps({'ids': record_ids,
+                                        'fields': fields}))
+        return self.json_codec.decode(result)
+
+    def _query_chunk(self, record_ids, fields, headers):
+        """Retrieves records with a `WHERE Id IN (...)` query, returning
+        them in the order of `record_ids`
+        """
+        if 'id' not in [field.lower() for field in fields]:
+            fields = ['Id'] + list(fields)
+        query = 'SELECT {fields} FROM {object_name} WHERE Id IN ({ids})'
+        query = query.format(
+            fields=', '.join(fields), object_name=self.name,
+            ids=', '.join("'{}'".format(_quote_soql(record_id))
+                          for record_id in record_ids))
+
+        # 15 character Ids are the case-sensitive prefix of 18 character ones
+        by_id = {}
+        url = urljoin(self.base_url, '../../query/')
+        params = {'q': query}
+        while url is not None:
+            result = self._call_salesforce(
+                method='GET', url=url, params=params, headers=headers)
+            page = self.json_codec.decode(result)
+            with measure(result, 'process'):
+                for record in page['records']:
+                    by_id[record['Id'][:15]] = record
+            next_url = page.get('nextRecordsUrl')
+            url = urljoin(self.base_url, next_url) if next_url else None
+            params = None
+        return [by_id.get(record_id[:15]) for record_id in record_ids]
+
+    def create_many(self, records, all_or_none=False, headers=None):
+        """Creates SObjects through `/composite/sobjects`, 200 per request.
+
+        Returns one entry per record, in order: the result dict of created
+        records, or the exception `create(...)` would have raised for failed
+        ones.
+
+        Arguments:
+
+        * records -- an iterable of dicts to create SObjects from
+        * all_or_none -- roll back every record of a request when one fails.
+                         Requests of 200 records are not rolled back
+                         together.
+        * headers -- a dict with additional request headers.
+        """
+        return self._collection_request('POST', self.collection_url,
+                                        records, all_or_none, headers)
+
+    def update_many(self, records, all_or_none=False, headers=None):
+        """Updates SObjects, identified by their `Id`, through
+        `/composite/sobjects`. Returns the same as `create_many(...)`.
+        """
+        return self._collection_request('PATCH', self.collection_url,
+                                        records, all_or_none, headers)
+
+    def upsert_many(self, external_id_field, records, all_or_none=False,
+                    headers=None):
+        """Creates or updates SObjects matched on `external_id_field`
+        through `/composite/sobjects`. Returns the same as `create_many(...)`.
+        """
+        url = '{collection_url}/{object_name}/{external_id_field}'.format(
+            collection_url=self.collection_url, object_name=self.name,
+            external_id_field=external_id_field)
+        return self._collection_request('PATCH', url, records, all_or_none,
+                                        headers)
+
+    def delete_many(self, record_ids, all_or_none=False, headers=None):
+        """Deletes SObjects by Id through `/composite/sobjects`. Returns the
+        same as `create_many(...)`.
+        """
+        self._check_collections_version()
+        results = []
+        for chunk in iter_collection_chunks(record_ids):
+            result = self._call_salesforce(
+                method='DELETE', url=self.collection_url, headers=headers,
+                params={'ids': ','.join(chunk),
+                        'allOrNone': str(all_or_none).lower()})
+            decoded = self.json_codec.decode(result)
+            with measure(result, 'process'):
+                results.extend(collection_results(
+                    self.collection_url, self.name, decoded))
+        return results
+
+    # pylint: disable=too-many-arguments
+    def _collection_request(self, method, url, records, all_or_none,
+                            headers):
+        """Sends `records` to a `/composite/sobjects` `url` in chunks and
+        returns the mapped per-record results
+        """
+        self._check_collections_version()
+        results = []
+        for chunk in iter_collection_chunks(records):
+            result = self._call_salesforce(
+                method=method, url=url, headers=headers,
+                data=self.json_codec.dumps({
+                    'allOrNone': all_or_none,
+                    'records': collection_records(self.name, chunk)}))
+            decoded = self.json_codec.decode(result)
+            with measure(result, 'process'):
+                results.extend(collection_results(url, self.name, decoded))
+        return results
+
+    def _check_collections_version(self):
+        """Raises ValueError when the API version of the instance predates
+        writes through `/composite/sobjects`
+        """
+        if float(self.sf_version) < COLLECTIONS_MIN_VERSION:
+            raise ValueError(
+                'sObject Collections require API version {} or later, got '
+                '{}'.format(COLLECTIONS_MIN_VERSION, self.sf_version))
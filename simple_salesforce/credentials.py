@@ -0,0 +1,265 @@
+"""Credentials shared by every handle of a client
+
+A `Salesforce` client hands out `SFType`, bulk and Bulk API 2.0 handles that
+all authenticate with the same session. They read it from one
+`CredentialProvider`, so that when the session expires it is refreshed once,
+under a lock, while the other callers wait and then use the new session
+instead of logging in again themselves.
+"""
+
+import threading
+from time import time
+try:
+    from urlparse import urlparse
+except ImportError:
+    # Python 3+
+    from urllib.parse import urlparse
+
+from simple_salesforce.hooks import SESSION_REFRESH
+from simple_salesforce.retry import error_codes
+
+RESPONSE_CODE_EXPIRED_SESSION = 401
+
+# errorCode/exceptionCode values reported for an expired or invalid session
+# (the bulk API reports them with a 400)
+EXPIRED_SESSION_ERROR_CODES = frozenset([
+    'INVALID_SESSION_ID',
+    'InvalidSessionId',
+])
+
+
+def is_expired_session(result):
+    """Whether Salesforce rejected the session the call was made with"""
+    if result.status_code == RESPONSE_CODE_EXPIRED_SESSION:
+        return True
+    return result.status_code == 400 and \
+        bool(error_codes(result) & EXPIRED_SESSION_ERROR_CODES)
+
+
+class CredentialProvider(object):
+    """The current session ID and instance of a client, refreshed at most
+    once per expiry however many threads find it expired
+
+    The session can also be refreshed proactively: when its lifetime is
+    known, either given as `session_lifetime` or reported by the login as
+    `session_seconds_valid`, the first caller asking for the session less
+    than `refresh_margin` seconds before it is due to expire refreshes it.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, session_id, sf_instance, refresh=None,
+                 session_lifetime=None, refresh_margin=300, issued_at=None,
+                 hooks=None, session_seconds_valid=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * session_id -- the session ID for authenticating to Salesforce, or
+                        None to log in with `refresh` on first use
+        * sf_instance -- the domain of the instance of Salesforce to use
+        * refresh -- the optional callable logging in again, returning the
+                     new `(session_id, sf_instance)`, such as a
+                     `LoginResult`
+        * session_lifetime -- the optional number of seconds a session is
+                              valid for (the org's session timeout),
+                              overriding the validity logins report
+        * refresh_margin -- the number of seconds before the session
+                            expires at which it is refreshed
+        * issued_at -- when the session was obtained, if not just now
+        * hooks -- the optional `Hooks` told of every refresh
+        * session_seconds_valid -- the number of seconds `session_id` is
+                                   valid for, as reported by its login
+        """
+        self._session_id = session_id
+        self._sf_instance = sf_instance
+        self._refresh = refresh
+        self.session_lifetime = session_lifetime
+        self.session_seconds_valid = session_seconds_valid
+        self.refresh_margin = refresh_margin
+        self.issued_at = time() if issued_at is None else issued_at
+        self.refreshes = 0
+        self.hooks = hooks
+        self._lock = threading.Lock()
+
+    @property
+    def session_id(self):
+        """The current session ID"""
+        return self._session_id
+
+    @property
+    def sf_instance(self):
+        """The domain of the instance the current session belongs to"""
+        return self._sf_instance
+
+    @property
+    def can_refresh(self):
+        """Whether an expired session can be replaced"""
+        return self._refresh is not None
+
+    def is_expiring(self):
+        """Whether the session is due to be refreshed proactively"""
+        lifetime = self.session_lifetime or self.session_seconds_valid
+        if lifetime is None or not self.can_refresh:
+            return False
+        age = time() - self.issued_at
+        return age >= lifetime - self.refresh_margin
+
+    def get(self):
+        """Returns the current `(session_id, sf_instance)`, logging in first
+        when there is no session yet, and refreshing the session when it is
+        about to expire
+        """
+        with self._lock:
+            credentials = self._session_id, self._sf_instance
+        if (credentials[0] is None and self.can_refresh) or \
+                self.is_expiring():
+            self.refresh(credentials[0])
+            with self._lock:
+                credentials = self._session_id, self._sf_instance
+        return credentials
+
+    def replace(self, session_id=None, sf_instance=None):
+        """Replaces the session ID and/or the instance with ones obtained by
+        the caller, for every handle sharing the provider
+        """
+        with self._lock:
+            if session_id is not None:
+                self._session_id = session_id
+                self.issued_at = time()
+            if sf_instance is not None:
+                self._sf_instance = sf_instance
+
+    def refresh(self, stale_session_id):
+        """Replaces the session `stale_session_id` found expired
+
+        Only the first caller reporting a given session logs in again, the
+        others wait for it and use its result.
+
+        Returns whether a session other than `stale_session_id` is now
+        available.
+        """
+        with self._lock:
+            if self._session_id != stale_session_id:
+                # refreshed by another caller in the meantime
+                return True
+            if self._refresh is None:
+                return False
+
+            if stale_session_id is None:
+                reason = 'login'
+            elif self.is_expiring():
+                reason = 'expiring'
+            else:
+                reason = 'expired'
+            started = time()
+            try:
+                login = self._refresh()
+            except Exception as exc:
+                self._emit_refresh(reason, started, exc)
+                raise
+            session_id, sf_instance = login
+            if not (session_id and sf_instance):
+                self._emit_refresh(reason, started, None)
+                return False
+            self._session_id = session_id
+            self._sf_instance = sf_instance
+            self.session_seconds_valid = getattr(
+                login, 'session_seconds_valid', None)
+            # a session reused from a store was obtained earlier
+            self.issued_at = getattr(self._refresh, 'issued_at', None) \
+                or time()
+            self.refreshes += 1
+            self._emit_refresh(reason, started, None)
+            return True
+
+    def _emit_refresh(self, reason, started, error):
+        """Fires the event of a refresh started at `started`"""
+        if self.hooks is not None:
+            self.hooks.emit(SESSION_REFRESH, elapsed=time() - started,
+                            error=error, reason=reason,
+                            instance=self._sf_instance)
+
+
+class InstanceURL(object):
+    """An endpoint of the instance of a session, which moves to the new
+    instance when the session is refreshed on another one
+
+    Handles keep their endpoint in one, so that those created before a
+    refresh don't keep calling the old instance.
+    """
+
+    def __init__(self, credentials, url):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * credentials -- the `CredentialProvider` of the session, or None
+        * url -- the endpoint. URLs on another host than the instance of
+                 the current session, e.g. of a proxy, are kept as they are.
+        """
+        self.credentials = credentials
+        self.url = url
+        self.sf_instance = None
+        if credentials is not None and \
+                urlparse(url).netloc == credentials.sf_instance:
+            self.sf_instance = credentials.sf_instance
+
+    def get(self):
+        """Returns the endpoint on the instance of the current session"""
+        if self.sf_instance is None:
+            return self.url
+        return self.url.replace(self.sf_instance, self.credentials.get()[1],
+                                1)
+
+
+class CredentialsMixin(object):
+    """The session of a handle, read from its `credentials` provider on
+    every access so that refreshes are picked up, and assigned to it for
+    every handle sharing it
+    """
+
+    @property
+    def session_id(self):
+        """The current session ID, logging in first if needed"""
+        return self.credentials.get()[0]
+
+    @session_id.setter
+    def session_id(self, session_id):
+        """Replaces the session of every handle sharing the credentials"""
+        self.credentials.replace(session_id=session_id)
+
+    @property
+    def sf_instance(self):
+        """The domain of the instance of the current session, logging in
+        first if needed
+        """
+        return self.credentials.get()[1]
+
+    @sf_instance.setter
+    def sf_instance(self, sf_instance):
+        """Replaces the instance of every handle sharing the credentials"""
+        self.credentials.replace(sf_instance=sf_instance)
+
+
+def call_with_credentials(credentials, url, send):
+    """Performs a call with the current session of `credentials`, and once
+    more with a refreshed session if Salesforce rejected it as expired
+
+    Arguments:
+
+    * credentials -- the `CredentialProvider`, or None to call without
+                     overriding the session the caller's headers carry
+    * url -- the URL of the call, on the current instance
+    * send -- a callable performing the call to the URL and with the session
+              ID it's given, returning the `requests.Response`
+    """
+    if credentials is None:
+        return send(url, None)
+
+    session_id, sf_instance = credentials.get()
+    result = send(url, session_id)
+    if is_expired_session(result) and credentials.refresh(session_id):
+        result.close()
+        new_session_id, new_instance = credentials.get()
+        result = send(url.replace(sf_instance, new_instance), new_session_id)
+    return result
@@ -0,0 +1,423 @@
+"""Events fired along the lifecycle of the calls made to Salesforce
+
+Pass a `Hooks` to `Salesforce` and register listeners for the events:
+
+* `before_request` -- an attempt of an HTTP call is about to be sent;
+* `after_response` -- the attempt returned a response, or failed;
+* `retry` -- a failed attempt is about to be sent again;
+* `session_refresh` -- the session was replaced by logging in again;
+* `bulk_poll` -- the state of bulk batches or jobs was checked;
+* `bulk_batch_complete` -- a bulk batch, or Bulk API 2.0 job, finished.
+
+Every `Event` carries the method, the endpoint template (the URL path with
+versions, Ids and names replaced by placeholders, so that it can label
+metrics), the object name, the status, the bytes sent and received and the
+elapsed time, when they apply. `PrometheusMetrics` and
+`OpenTelemetryTracer` turn the events into metrics and spans.
+
+Listeners run synchronously in the calling thread, so they should be quick.
+Exceptions raised by a listener are logged and otherwise ignored.
+"""
+
+import logging
+import re
+import threading
+from time import time
+
+try:
+    from urlparse import urlparse
+except ImportError:
+    # Python 3+
+    from urllib.parse import urlparse
+
+#pylint: disable=invalid-name
+logger = logging.getLogger(__name__)
+
+BEFORE_REQUEST = 'before_request'
+AFTER_RESPONSE = 'after_response'
+RETRY = 'retry'
+SESSION_REFRESH = 'session_refresh'
+BULK_POLL = 'bulk_poll'
+BULK_BATCH_COMPLETE = 'bulk_batch_complete'
+EVENTS = (BEFORE_REQUEST, AFTER_RESPONSE, RETRY, SESSION_REFRESH, BULK_POLL,
+          BULK_BATCH_COMPLETE)
+
+# Rewrites of URL paths into endpoint templates, in order
+_ENDPOINT_RULES = [
+    (re.compile(r'/v\d+\.\d+(?=/|$)'), '/v{version}'),
+    (re.compile(r'/(Soap/\w|async)/\d+\.\d+(?=/|$)'), r'/\1/{version}'),
+    (re.compile(r'/sobjects/\w+'), '/sobjects/{object}'),
+    (re.compile(r'/query(All)?/[\w]+-\d+$'), r'/query\1/{locator}'),
+    (re.compile(r'/[a-zA-Z0-9]{15}(?:[a-zA-Z0-9]{3})?(?=/|$)'), '/{id}'),
+]
+_OBJECT = re.compile(r'/sobjects/(\w+)')
+
+
+def endpoint_template(url):
+    """Returns the path of `url` with the parts that vary from call to
+    call replaced by placeholders, e.g.
+    `/services/data/v{version}/sobjects/{object}/{id}`
+    """
+    path = urlparse(url).path
+    for pattern, replacement in _ENDPOINT_RULES:
+        path = pattern.sub(replacement, path)
+    return path
+
+
+def object_from_url(url):
+    """Returns the object name found in a REST `url`, or None"""
+    match = _OBJECT.search(urlparse(url).path)
+    return match.group(1) if match else None
+
+
+def _body_size(kwargs):
+    """Returns the size of the body of a request sent with `kwargs`"""
+    body = kwargs.get('data')
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    try:
+        return len(body.encode('utf-8'))
+    except AttributeError:
+        # a dict of form fields or a file
+        return None
+
+
+def _response_size(result, stream):
+    """Returns the size of the body of `result`, without downloading a
+    streamed body
+    """
+    if not stream:
+        return len(result.content)
+    length = result.headers.get('Content-Length')
+    return int(length) if length and length.isdigit() else None
+
+
+class Event(object):
+    """What happened, with the details known at that point
+
+    * name -- one of the event names
+    * method -- the HTTP method of the call
+    * endpoint -- the endpoint template of the call
+    * url -- the URL of the call
+    * object_name -- the name of the SObject type involved
+    * status -- the HTTP status of the response
+    * bytes_sent -- the size of the request body
+    * bytes_received -- the size of the response body
+    * elapsed -- the seconds the attempt, login or wait took
+    * attempt -- the number of the attempt, from 1
+    * error -- the exception the attempt or login failed with
+    * details -- a dict of event specific values, e.g. `job_id`,
+                 `batch_id`, `state`, `pending`, `delay` or the `response`
+                 of an `after_response` event
+    """
+
+    # pylint: disable=too-many-instance-attributes,too-few-public-methods
+    def __init__(self, name, method=None, endpoint=None, url=None,
+                 object_name=None, status=None, bytes_sent=None,
+                 bytes_received=None, elapsed=None, attempt=None, error=None,
+                 **details):
+        self.name = name
+        self.method = method
+        self.endpoint = endpoint
+        self.url = url
+        self.object_name = object_name
+        self.status = status
+        self.bytes_sent = bytes_sent
+        self.bytes_received = bytes_received
+        self.elapsed = elapsed
+        self.attempt = attempt
+        self.error = error
+        self.details = details
+
+    def as_dict(self):
+        """Returns the fields that are set, details included"""
+        fields = dict((name, value) for name, value in vars(self).items()
+                      if value is not None and name != 'details')
+        fields.update((name, value) for name, value in self.details.items()
+                      if value is not None)
+        return fields
+
+    def __repr__(self):
+        return 'Event({})'.format(', '.join(
+            '{}={!r}'.format(name, value)
+            for name, value in sorted(self.as_dict().items())))
+
+
+class Hooks(object):
+    """The listeners of the events of one or more clients
+
+    Usage:
+
+        hooks = Hooks()
+
+        @hooks.on('after_response')
+        def log_call(event):
+            print(event.method, event.endpoint, event.status, event.elapsed)
+
+        sf = Salesforce(..., hooks=hooks)
+    """
+
+    def __init__(self):
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def on(self, name, listener=None):
+        """Registers `listener` to be called with the `Event` of every
+        `name` event. Without a `listener`, returns a decorator registering
+        the function it decorates.
+        """
+        if name not in EVENTS:
+            raise ValueError('Unknown event {!r}, expected one of {}'.format(
+                name, ', '.join(EVENTS)))
+        if listener is None:
+            return lambda function: self.on(name, function)
+        with self._lock:
+            # listeners are copied on write, so emitting needs no lock
+            self._listeners[name] = self._listeners.get(name, ()) + (
+                listener,)
+        return listener
+
+    def off(self, name, listener):
+        """Unregisters a listener of `name` events"""
+        with self._lock:
+            self._listeners[name] = tuple(
+                registered for registered in self._listeners.get(name, ())
+                if registered != listener)
+
+    def listens(self, name):
+        """Whether any listener is registered for `name` events"""
+        return bool(self._listeners.get(name))
+
+    def emit(self, name, **fields):
+        """Calls the listeners of `name` events with a new `Event` of the
+        `fields`
+        """
+        listeners = self._listeners.get(name)
+        if not listeners:
+            return
+        event = Event(name, **fields)
+        for listener in listeners:
+            try:
+                listener(event)
+            # pylint: disable=broad-except
+            except Exception:
+                logger.exception('Listener of %s events failed', name)
+
+
+def send_instrumented(hooks, method, url, send, attempt=1, object_name=None,
+                      **kwargs):
+    """Makes one attempt of a call with `send()`, firing its
+    `before_request` and `after_response` events on `hooks`
+
+    Arguments:
+
+    * hooks -- the `Hooks`, or None to just call `send()`
+    * method -- the HTTP method of the call
+    * url -- the URL of the call
+    * send -- a callable making the attempt, returning the
+              `requests.Response`
+    * attempt -- the number of the attempt
+    * object_name -- the name of the SObject type, by default read from
+                     the URL
+    * kwargs -- the keyword arguments of the request, to measure its body
+    """
+    if hooks is None:
+        return send()
+
+    fields = {'method': method, 'url': url, 'endpoint': endpoint_template(url),
+              'object_name': object_name or object_from_url(url),
+              'attempt': attempt, 'bytes_sent': _body_size(kwargs)}
+    hooks.emit(BEFORE_REQUEST, **fields)
+    started = time()
+    try:
+        result = send()
+    except Exception as exc:
+        hooks.emit(AFTER_RESPONSE, elapsed=time() - started, error=exc,
+                   **fields)
+        raise
+    hooks.emit(AFTER_RESPONSE, status=result.status_code,
+               bytes_received=_response_size(result, kwargs.get('stream')),
+               elapsed=time() - started, response=result, **fields)
+    return result
+
+
+class PrometheusMetrics(object):
+    """Counts and times the events of `hooks` with Prometheus metrics
+
+    Requires `prometheus_client`. The metrics are, with the `namespace`
+    prefix:
+
+    * `requests_total` -- attempts by method, endpoint, object and status
+      (`error` when no response came back)
+    * `request_duration_seconds` -- a histogram of the attempts' durations
+    * `request_sent_bytes_total`, `request_received_bytes_total`
+    * `retries_total` -- attempts sent again, by method, endpoint and object
+    * `session_refreshes_total` -- logins replacing the session, by outcome
+    * `bulk_polls_total` -- checks of bulk states, by object
+    * `bulk_batches_completed_total` -- finished batches, by object and
+      state
+    """
+
+    def __init__(self, hooks, registry=None, namespace='salesforce'):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * hooks -- the `Hooks` whose events are measured
+        * registry -- the `CollectorRegistry` of the metrics, by default the
+                      global registry
+        * namespace -- the prefix of the metric names
+        """
+        # prometheus_client is optional, only needed for these metrics
+        from prometheus_client import Counter, Histogram
+
+        options = {'namespace': namespace}
+        if registry is not None:
+            options['registry'] = registry
+        call_labels = ['method', 'endpoint', 'object']
+        self.requests = Counter(
+            'requests', 'Attempts of calls to Salesforce',
+            call_labels + ['status'], **options)
+        self.duration = Histogram(
+            'request_duration_seconds', 'Duration of the attempts of calls',
+            call_labels, **options)
+        self.bytes_sent = Counter(
+            'request_sent_bytes', 'Bytes of request bodies', call_labels,
+            **options)
+        self.bytes_received = Counter(
+            'request_received_bytes', 'Bytes of response bodies',
+            call_labels, **options)
+        self.retries = Counter(
+            'retries', 'Attempts sent again', call_labels, **options)
+        self.session_refreshes = Counter(
+            'session_refreshes', 'Logins replacing the session',
+            ['outcome'], **options)
+        self.bulk_polls = Counter(
+            'bulk_polls', 'Checks of the state of bulk batches or jobs',
+            ['object'], **options)
+        self.bulk_batches = Counter(
+            'bulk_batches_completed', 'Bulk batches or jobs finished',
+            ['object', 'state'], **options)
+
+        hooks.on(AFTER_RESPONSE, self._after_response)
+        hooks.on(RETRY, self._retry)
+        hooks.on(SESSION_REFRESH, self._session_refresh)
+        hooks.on(BULK_POLL, self._bulk_poll)
+        hooks.on(BULK_BATCH_COMPLETE, self._bulk_batch_complete)
+
+    @staticmethod
+    def _call_labels(event):
+        """Returns the labels of the call of `event`"""
+        return (event.method or '', event.endpoint or '',
+                event.object_name or '')
+
+    def _after_response(self, event):
+        """Records an attempt"""
+        labels = self._call_labels(event)
+        status = 'error' if event.status is None else str(event.status)
+        self.requests.labels(*(labels + (status,))).inc()
+        self.duration.labels(*labels).observe(event.elapsed)
+        if event.bytes_sent:
+            self.bytes_sent.labels(*labels).inc(event.bytes_sent)
+        if event.bytes_received:
+            self.bytes_received.labels(*labels).inc(event.bytes_received)
+
+    def _retry(self, event):
+        """Records a retry"""
+        self.retries.labels(*self._call_labels(event)).inc()
+
+    def _session_refresh(self, event):
+        """Records a login"""
+        self.session_refreshes.labels(
+            'failure' if event.error is not None else 'success').inc()
+
+    def _bulk_poll(self, event):
+        """Records a check of bulk states"""
+        self.bulk_polls.labels(event.object_name or '').inc()
+
+    def _bulk_batch_complete(self, event):
+        """Records a finished batch"""
+        self.bulk_batches.labels(event.object_name or '',
+                                 event.details.get('state') or '').inc()
+
+
+class OpenTelemetryTracer(object):
+    """Traces the attempts of calls fired on `hooks` as OpenTelemetry client
+    spans, and adds the other events to the current span
+
+    Requires `opentelemetry-api`.
+    """
+
+    def __init__(self, hooks, tracer=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * hooks -- the `Hooks` whose events are traced
+        * tracer -- the OpenTelemetry `Tracer`, by default the one of the
+                    global tracer provider
+        """
+        # opentelemetry is optional, only needed for tracing
+        from opentelemetry import trace
+
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer('simple_salesforce')
+        # an attempt's events are fired in the thread making it
+        self._spans = threading.local()
+
+        hooks.on(BEFORE_REQUEST, self._before_request)
+        hooks.on(AFTER_RESPONSE, self._after_response)
+        for name in (RETRY, SESSION_REFRESH, BULK_POLL, BULK_BATCH_COMPLETE):
+            hooks.on(name, self._add_event)
+
+    @staticmethod
+    def _attributes(event):
+        """Returns the span attributes of `event`"""
+        attributes = {'http.method': event.method,
+                      'http.url': event.url,
+                      'http.status_code': event.status,
+                      'salesforce.endpoint': event.endpoint,
+                      'salesforce.object': event.object_name,
+                      'salesforce.attempt': event.attempt,
+                      'salesforce.bytes_sent': event.bytes_sent,
+                      'salesforce.bytes_received': event.bytes_received}
+        attributes.update(('salesforce.' + name, value)
+                          for name, value in event.details.items()
+                          if isinstance(value, (bool, int, float, str)))
+        return dict((name, value) for name, value in attributes.items()
+                    if value is not None)
+
+    def _before_request(self, event):
+        """Starts the span of an attempt"""
+        span = self.tracer.start_span(
+            '{} {}'.format(event.method, event.endpoint),
+            kind=self._trace.SpanKind.CLIENT,
+            attributes=self._attributes(event))
+        stack = getattr(self._spans, 'stack', None)
+        if stack is None:
+            stack = self._spans.stack = []
+        stack.append(span)
+
+    def _after_response(self, event):
+        """Ends the span of an attempt"""
+        stack = getattr(self._spans, 'stack', None)
+        if not stack:
+            return
+        span = stack.pop()
+        span.set_attributes(self._attributes(event))
+        if event.error is not None:
+            span.record_exception(event.error)
+        if event.error is not None or event.status >= 400:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        span.end()
+
+    def _add_event(self, event):
+        """Adds `event` to the current span"""
+        attributes = dict(self._attributes(event))
+        if event.elapsed is not None:
+            attributes['salesforce.elapsed'] = event.elapsed
+        if event.error is not None:
+            attributes['exception.message'] = str(event.error)
+        self._trace.get_current_span().add_event(event.name, attributes)
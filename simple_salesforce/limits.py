@@ -0,0 +1,104 @@
+"""Tracking of the org's API usage and client-side pacing of calls
+
+Salesforce reports the API calls used in the rolling 24 hour window in the
+`Sforce-Limit-Info` header of REST responses, e.g. `api-usage=18/15000`.
+`ApiUsage` keeps the latest figures and can pace calls so that a client
+slows down smoothly before exhausting the allowance, instead of failing
+with `REQUEST_LIMIT_EXCEEDED`.
+"""
+
+import re
+import threading
+from time import sleep, time
+
+SECONDS_PER_DAY = 86400
+
+_API_USAGE = re.compile(r'api-usage=(\d+)/(\d+)')
+
+
+class ApiUsage(object):
+    """Live API usage of the org, optionally pacing calls
+
+    Calls are paced by a token bucket refilled at `rate` calls per second.
+    Once the reported usage reaches `target` (a fraction of the daily
+    limit), the refill rate drops to the rate at which the rolling window
+    frees calls up, `target * limit / 86400` per second, so that usage stays
+    around the target rather than reaching the limit.
+
+    One instance can be shared by several clients of the same org.
+    """
+
+    def __init__(self, target=None, rate=None, burst=10):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * target -- the fraction of the daily limit to stay under, e.g.
+                    `0.8` (default None, don't slow down)
+        * rate -- the maximum number of calls per second (default None,
+                  unlimited until the target is reached)
+        * burst -- the number of calls that can be made at once before
+                   pacing starts
+        """
+        self.target = target
+        self.rate = rate
+        self.burst = burst
+        self.used = None
+        self.limit = None
+        self.updated_at = None
+        self._tokens = float(burst)
+        self._refilled_at = time()
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        """The number of calls left in the rolling window, if known"""
+        if self.limit is None:
+            return None
+        return max(self.limit - self.used, 0)
+
+    @property
+    def fraction(self):
+        """The fraction of the daily limit used, if known"""
+        if not self.limit:
+            return None
+        return float(self.used) / self.limit
+
+    def update(self, headers):
+        """Records the usage reported in the headers of a response"""
+        match = _API_USAGE.search(headers.get('Sforce-Limit-Info') or '')
+        if match is None:
+            return
+        with self._lock:
+            self.used, self.limit = int(match.group(1)), int(match.group(2))
+            self.updated_at = time()
+
+    def current_rate(self):
+        """The number of calls per second currently allowed, or None when
+        calls are not paced
+        """
+        rate = self.rate
+        fraction = self.fraction
+        if self.target is not None and fraction is not None \
+                and fraction >= self.target:
+            sustainable = self.target * self.limit / float(SECONDS_PER_DAY)
+            rate = sustainable if rate is None else min(rate, sustainable)
+        return rate
+
+    def acquire(self):
+        """Blocks until the next call may be made"""
+        while True:
+            with self._lock:
+                rate = self.current_rate()
+                if rate is None:
+                    return
+                now = time()
+                self._tokens = min(
+                    self._tokens + (now - self._refilled_at) * rate,
+                    float(self.burst))
+                self._refilled_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / rate
+            sleep(delay)
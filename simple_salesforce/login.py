@@ -5,15 +5,31 @@ Heavily Modified from RestForce 1.0.0
 
 DEFAULT_CLIENT_ID_PREFIX = 'RestForce'
 
+# elements read from SOAP login responses
+LOGIN_RESULT_FIELDS = ('sessionId', 'serverUrl')
+USER_INFO_FIELDS = ('accessibilityMode', 'currencySymbol',
+                    'orgAttachmentFileSizeLimit', 'orgDefaultCurrencyIsoCode',
+                    'orgDisallowHtmlAttachments', 'orgHasPersonAccounts',
+                    'organizationId', 'organizationMultiCurrency',
+                    'organizationName', 'profileId', 'roleId',
+                    'sessionSecondsValid', 'userDefaultCurrencyIsoCode',
+                    'userEmail', 'userFullName', 'userId', 'userLanguage',
+                    'userLocale', 'userName', 'userTimeZone', 'userType',
+                    'userUiSkin')
+LOGIN_FAULT_FIELDS = ('exceptionCode', 'exceptionMessage', 'faultcode',
+                      'faultstring')
+
 
 from simple_salesforce.api import DEFAULT_API_VERSION
-from simple_salesforce.util import getUniqueElementValueFromXmlString
+from simple_salesforce.hooks import send_instrumented
+from simple_salesforce.util import parse_soap_response, raise_from
 from simple_salesforce.util import SalesforceError
 try:
     # Python 3+
     from html import escape
 except ImportError:
     from cgi import escape
+from xml.etree.ElementTree import ParseError
 import requests
 
 # pylint: disable=invalid-name
@@ -30,11 +46,14 @@ def SalesforceLogin(
         username=None, password=None, security_token=None,
         refresh_token=None, consumer_id=None, consumer_secret=None,
         organizationId=None, sandbox=False, sf_version=DEFAULT_API_VERSION,
-        proxies=None, session=None, client_id=None):
+        proxies=None, session=None, client_id=None, hooks=None):
     """Return a tuple of `(session_id, sf_instance)` where `session_id` is the
     session ID to use for authentication to Salesforce and `sf_instance` is
     the domain of the instance of Salesforce to use for the session.
 
+    The tuple is a `LoginResult`, also holding the validity of the session
+    and the user info of SOAP logins.
+
     Arguments:
 
     * username -- the Salesforce username to use for authentication
@@ -63,6 +82,7 @@ def SalesforceLogin(
                  enables the use of requets Session features not otherwise
                  exposed by simple_salesforce.
     * client_id -- the ID of this client
+    * hooks -- the optional `Hooks` told of the login call
     """
 
     soap_url = 'https://{domain}.salesforce.com/services/Soap/u/{sf_version}'
@@ -96,9 +116,11 @@ def SalesforceLogin(
             'content-type': 'application/x-www-form-urlencoded'
         }
 
-        response = (session or requests).post(
-            url=rest_url, data=data, headers=headers,
-            proxies=proxies)
+        response = send_instrumented(
+            hooks, 'POST', rest_url,
+            lambda: (session or requests).post(
+                url=rest_url, data=data, headers=headers, proxies=proxies),
+            data=data)
 
         response_data = response.json()
 
@@ -117,7 +139,7 @@ def SalesforceLogin(
         session_id = response_data.get('access_token')
         sf_instance = cleanseInstanceUrl(response_data.get('instance_url'))
 
-        return session_id, sf_instance
+        return LoginResult(session_id, sf_instance)
 
 
     # pylint: disable=deprecated-method
@@ -209,25 +231,55 @@ def SalesforceLogin(
         'charset': 'UTF-8',
         'SOAPAction': 'login'
     }
-    response = (session or requests).post(
-        soap_url, login_soap_request_body, headers=login_soap_request_headers,
-        proxies=proxies)
+    response = send_instrumented(
+        hooks, 'POST', soap_url,
+        lambda: (session or requests).post(
+            soap_url, login_soap_request_body,
+            headers=login_soap_request_headers, proxies=proxies),
+        data=login_soap_request_body)
 
     if response.status_code != 200:
-        except_code = getUniqueElementValueFromXmlString(
-            response.content, 'sf:exceptionCode')
-        except_msg = getUniqueElementValueFromXmlString(
-            response.content, 'sf:exceptionMessage')
+        try:
+            fault = parse_soap_response(response.content, LOGIN_FAULT_FIELDS)
+        except ParseError as exc:
+            # not a SOAP fault, e.g. an error page of a proxy
+            raise_from(SalesforceAuthenticationFailed(response.status_code,
+                                                      response.text), exc)
+        except_code = fault.get('exceptionCode', fault.get('faultcode'))
+        except_msg = fault.get('exceptionMessage', fault.get('faultstring'))
         raise SalesforceAuthenticationFailed(except_code, except_msg)
 
-    session_id = getUniqueElementValueFromXmlString(
-        response.content, 'sessionId')
-    server_url = getUniqueElementValueFromXmlString(
-        response.content, 'serverUrl')
-
-    sf_instance = cleanseInstanceUrl(server_url)
-
-    return session_id, sf_instance
+    result = parse_soap_response(response.content,
+                                 LOGIN_RESULT_FIELDS + USER_INFO_FIELDS)
+    session_id = result.get('sessionId')
+    sf_instance = cleanseInstanceUrl(result.get('serverUrl'))
+    user_info = dict((name, result[name]) for name in USER_INFO_FIELDS
+                     if name in result)
+    session_seconds_valid = user_info.get('sessionSecondsValid')
+
+    return LoginResult(
+        session_id, sf_instance,
+        session_seconds_valid=session_seconds_valid and int(
+            session_seconds_valid),
+        user_info=user_info)
+
+
+class LoginResult(tuple):
+    """The `(session_id, sf_instance)` of a login, with what Salesforce
+    reported about the session:
+
+    * session_seconds_valid -- the number of seconds the session is valid
+                               for, or None when it wasn't reported
+    * user_info -- a dict of the `userInfo` fields of a SOAP login, such as
+                   `userId` or `organizationId`, empty for other logins
+    """
+    def __new__(cls, session_id, sf_instance, session_seconds_valid=None,
+                user_info=None):
+        result = super(LoginResult, cls).__new__(cls,
+                                                  (session_id, sf_instance))
+        result.session_seconds_valid = session_seconds_valid
+        result.user_info = user_info or {}
+        return result
 
 
 class SalesforceAuthenticationFailed(SalesforceError):
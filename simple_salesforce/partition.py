@@ -0,0 +1,183 @@
+"""Splitting of SOQL queries into disjoint ranges run in parallel
+
+A query over a large object is read through a single cursor, one page of
+2,000 records after the other. `Salesforce.query_all_parallel` instead
+runs the query over several ranges of an indexed field at once:
+
+* the lowest and highest values of the field are read with two cheap
+  `ORDER BY ... LIMIT 1` queries;
+* the range between them is split evenly, by the numeric value of the
+  Ids, or by time for a date time field such as `CreatedDate` or
+  `SystemModstamp`;
+* the first and last partitions are left open, so records created
+  meanwhile are not missed;
+* records whose field is null, which no range matches, are read by a
+  partition of their own.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+# a 15 character Id is a base 62 number
+ID_DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+ID_LENGTH = 15
+
+# the clauses following `FROM`, in the order SOQL expects them
+_CLAUSE = re.compile(
+    r'\b(WHERE|WITH|GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT|OFFSET|FOR)\b', re.I)
+_FROM = re.compile(r'\bFROM\b', re.I)
+# clauses changing the meaning of a query once it is split
+_UNSUPPORTED = ('GROUP BY', 'HAVING', 'LIMIT', 'OFFSET')
+
+
+def _mask(query):
+    """Returns `query` with string literals and parenthesized expressions,
+    such as subqueries, blanked out, so that only top level keywords match
+    """
+    masked = []
+    depth = 0
+    quoted = False
+    escaped = False
+    for char in query:
+        if quoted:
+            masked.append(' ')
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == "'":
+                quoted = False
+        elif char == "'":
+            quoted = True
+            masked.append(' ')
+        elif char == '(':
+            depth += 1
+            masked.append(' ')
+        elif char == ')':
+            depth -= 1
+            masked.append(' ')
+        else:
+            masked.append(' ' if depth else char)
+    return ''.join(masked)
+
+
+def split_query(query):
+    """Returns the `(select, from, where, rest)` parts of a SOQL query,
+    where `from` runs from the `FROM` keyword to the next clause, `where` is
+    the condition of the `WHERE` clause, if any, and `rest` the clauses
+    after it.
+
+    Raises `ValueError` for queries that can't be split into ranges.
+    """
+    masked = _mask(query)
+    from_match = _FROM.search(masked)
+    if from_match is None:
+        raise ValueError('Not a SOQL query: {}'.format(query))
+    clauses = list(_CLAUSE.finditer(masked, from_match.end()))
+    for clause in clauses:
+        name = ' '.join(clause.group(1).upper().split())
+        if name in _UNSUPPORTED:
+            raise ValueError(
+                'Queries with {} can not be partitioned'.format(name))
+
+    select = query[:from_match.start()].strip()
+    if not clauses:
+        return select, query[from_match.start():].strip(), None, ''
+    source = query[from_match.start():clauses[0].start()].strip()
+    if clauses[0].group(1).upper() != 'WHERE':
+        return select, source, None, query[clauses[0].start():].strip()
+    end = clauses[1].start() if len(clauses) > 1 else len(query)
+    return (select, source, query[clauses[0].end():end].strip(),
+            query[end:].strip())
+
+
+def restrict_query(query, condition):
+    """Returns `query` also requiring the SOQL `condition`"""
+    select, source, where, rest = split_query(query)
+    if where:
+        condition = '({}) AND {}'.format(where, condition)
+    return ' '.join(
+        part for part in (select, source, 'WHERE', condition, rest) if part)
+
+
+def bound_query(query, field, descending=False):
+    """Returns the query of the lowest, or highest, non-null value of
+    `field` in the records matched by `query`
+    """
+    _, source, where, _ = split_query(query)
+    condition = '{} != null'.format(field)
+    if where:
+        condition = '({}) AND {}'.format(where, condition)
+    return 'SELECT {field} {source} WHERE {condition} ORDER BY {field}' \
+           '{order} LIMIT 1'.format(field=field, source=source,
+                                    condition=condition,
+                                    order=' DESC' if descending else '')
+
+
+def id_to_number(record_id):
+    """Returns the numeric value of the first 15 characters of an Id"""
+    number = 0
+    for char in record_id[:ID_LENGTH]:
+        number = number * len(ID_DIGITS) + ID_DIGITS.index(char)
+    return number
+
+
+def number_to_id(number):
+    """Returns the 15 character Id of a numeric value"""
+    chars = []
+    for _ in range(ID_LENGTH):
+        number, digit = divmod(number, len(ID_DIGITS))
+        chars.append(ID_DIGITS[digit])
+    return ''.join(reversed(chars))
+
+
+def id_boundaries(lowest, highest, partitions):
+    """Returns the `partitions - 1` quoted Ids evenly splitting the range
+    from `lowest` to `highest`
+    """
+    low, high = id_to_number(lowest), id_to_number(highest)
+    return sorted(set(
+        "'{}'".format(number_to_id(low + (high - low) * i // partitions))
+        for i in range(1, partitions)))
+
+
+def datetime_boundaries(lowest, highest, partitions):
+    """Returns the `partitions - 1` SOQL date time literals evenly splitting
+    the range from the `lowest` to the `highest` Salesforce date time string
+    """
+    low, high = _parse_datetime(lowest), _parse_datetime(highest)
+    step = (high - low) // partitions
+    return sorted(set(
+        (low + step * i).strftime('%Y-%m-%dT%H:%M:%SZ')
+        for i in range(1, partitions)))
+
+
+def _parse_datetime(value):
+    """Returns the naive UTC datetime of a Salesforce date time string,
+    e.g. `2026-10-14T10:00:00.000+0000`
+    """
+    date = datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+    offset = value[23:].replace(':', '')
+    if offset not in ('', 'Z'):
+        sign = -1 if offset[0] == '-' else 1
+        date -= sign * timedelta(hours=int(offset[1:3]),
+                                 minutes=int(offset[3:5]))
+    return date
+
+
+def range_conditions(field, boundaries, nullable=False):
+    """Returns the SOQL conditions of the disjoint ranges of `field`
+    delimited by the sorted `boundaries`, the first and last being open,
+    followed by `field = null` when the field is `nullable`
+    """
+    if not boundaries:
+        return [None]
+    conditions = ['{} < {}'.format(field, boundaries[0])]
+    for low, high in zip(boundaries, boundaries[1:]):
+        conditions.append('({field} >= {low} AND {field} < {high})'.format(
+            field=field, low=low, high=high))
+    conditions.append('{} >= {}'.format(field, boundaries[-1]))
+    if nullable:
+        # null matches no comparison, so no range holds these records
+        conditions.append('{} = null'.format(field))
+    return conditions
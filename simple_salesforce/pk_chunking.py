@@ -0,0 +1,201 @@
+""" Bulk queries with PK chunking
+
+With PK chunking, Salesforce splits a bulk query into one batch per range
+of record IDs and processes the batches in parallel, instead of scanning the
+whole table in a single batch. The results of every batch are downloaded as
+soon as it completes, while the others are still running.
+"""
+
+from multiprocessing.pool import ThreadPool
+from time import time
+try:
+    import Queue as queue
+except ImportError:
+    # Python 3+
+    import queue
+
+from simple_salesforce.hooks import BULK_BATCH_COMPLETE, BULK_POLL
+
+DEFAULT_MAX_WORKERS = 4
+# states of batches that won't change anymore
+FINAL_BATCH_STATES = ('Completed', 'Failed', 'Not Processed')
+
+
+class PKChunkingMixin(object):
+    """ The PK chunked queries of `SFBulkType` """
+
+    # pylint: disable=too-many-arguments
+    def query_chunked(self, data, chunk_size=None, parent=None,
+                      max_workers=DEFAULT_MAX_WORKERS, polling=None):
+        """ bulk query with PK chunking, lazily yielding records
+
+        Salesforce splits the query into one batch per range of `chunk_size`
+        record IDs, processed in parallel instead of as a single scan of the
+        table. The results of the batches are downloaded concurrently as
+        soon as each one completes, and yielded batch by batch in the order
+        they complete, so records are not in ID order.
+
+        Arguments:
+
+        * data -- the SOQL query
+        * chunk_size -- the number of record IDs per batch, at most 250,000
+                        (default None, Salesforce's 100,000)
+        * parent -- the parent object whose IDs chunk queries of sharing
+                    objects, e.g. `Account` for `AccountShare`
+        * max_workers -- number of batch results downloaded concurrently
+        * polling -- `PollingStrategy` used to check on the batches
+        """
+        for records in self._run_pk_chunked_query(
+                data=data, chunk_size=chunk_size, parent=parent,
+                fetch=lambda batch: self._get_batch_results(
+                    job_id=batch['jobId'], batch_id=batch['id'],
+                    operation='query'),
+                max_workers=max_workers, polling=polling):
+            for record in records:
+                yield record
+
+    # pylint: disable=too-many-arguments
+    def download_chunked(self, data, path, chunk_size=None, parent=None,
+                         max_workers=DEFAULT_MAX_WORKERS, polling=None):
+        """ bulk query with PK chunking, writing the raw result chunks of
+        each batch to files in the `path` directory as soon as the batch
+        completes. Lazily yields the paths of the files written, in the order
+        the downloads finish.
+
+        See `query_chunked` for the arguments.
+        """
+        for file_paths in self._run_pk_chunked_query(
+                data=data, chunk_size=chunk_size, parent=parent,
+                fetch=lambda batch: self._download_query_results(
+                    job_id=batch['jobId'], batch_id=batch['id'], path=path),
+                max_workers=max_workers, polling=polling):
+            for file_path in file_paths:
+                yield file_path
+
+    # pylint: disable=too-many-arguments,too-many-locals
+    def _run_pk_chunked_query(self, data, chunk_size, parent, fetch,
+                              max_workers, polling):
+        """ Creates a PK chunked query job, and yields `fetch(batch)` for
+        every batch as soon as it completes and its fetch returns
+
+        The batches Salesforce creates are discovered from the job's batch
+        list, polled according to `polling` while fetches run in a pool of
+        `max_workers` threads.
+        """
+        # bulk.py imports this module
+        from simple_salesforce.bulk import PollingStrategy
+
+        polling = polling or PollingStrategy()
+        job = self._create_job(object_name=self.object_name,
+                               operation='query',
+                               pk_chunking=_pk_chunking_header(chunk_size,
+                                                               parent))
+        original = self._add_batch(job_id=job['id'], data=data,
+                                   operation='query')
+        self._close_job(job_id=job['id'])
+
+        fetched = queue.Queue()
+
+        def run_fetch(batch):
+            """ Reports the result, or the error, of fetching a batch """
+            try:
+                fetched.put((fetch(batch), None))
+            # pylint: disable=broad-except
+            except Exception as exc:
+                fetched.put((None, exc))
+
+        polled = time()
+        deadline = None if polling.timeout is None else polled + polling.timeout
+        delays = polling.delays()
+        next_poll = polled
+        started = set()
+        outstanding = 0
+        listed = False
+        pool = ThreadPool(max_workers)
+        try:
+            while not listed or outstanding:
+                if not listed and time() >= next_poll:
+                    listed, completed = self._list_chunk_batches(
+                        job_id=job['id'], original_id=original['id'])
+                    self._emit(BULK_POLL, elapsed=time() - polled,
+                               job_id=job['id'], complete=listed)
+                    for batch in [batch for batch in completed
+                                  if batch['id'] not in started]:
+                        self._emit(BULK_BATCH_COMPLETE,
+                                   elapsed=time() - polled, job_id=job['id'],
+                                   batch_id=batch['id'], state=batch['state'])
+                        started.add(batch['id'])
+                        pool.apply_async(run_fetch, (batch,))
+                        outstanding += 1
+                    if not listed:
+                        next_poll = self._next_chunk_poll(
+                            job['id'], original['id'], delays, deadline)
+
+                try:
+                    result, error = fetched.get(
+                        timeout=None if listed else max(next_poll - time(), 0))
+                except queue.Empty:
+                    continue
+                if error is not None:
+                    raise error
+                outstanding -= 1
+                yield result
+        finally:
+            pool.terminate()
+
+    def _next_chunk_poll(self, job_id, original_id, delays, deadline):
+        """ Returns when to list the batches of a PK chunked job next, or
+        raises `SalesforceBulkTimeout` once the `deadline` has passed or
+        the polling strategy's `delays` have run out
+        """
+        # bulk.py imports this module
+        from simple_salesforce.bulk import SalesforceBulkTimeout
+
+        delay = next(delays, None)
+        if delay is None or (deadline is not None and time() >= deadline):
+            raise SalesforceBulkTimeout(
+                "{}{}{}".format(self.bulk_url, 'job/', job_id),
+                None, self.object_name, [original_id])
+        next_poll = time() + delay
+        return next_poll if deadline is None else min(next_poll, deadline)
+
+    def _list_chunk_batches(self, job_id, original_id):
+        """ Returns whether every batch of a PK chunked job is complete, and
+        the completed batches holding results
+
+        Once Salesforce has created the chunk batches, the batch of the
+        original query is marked `Not Processed`. Failed batches raise
+        `SalesforceBulkBatchFailed`.
+        """
+        # bulk.py imports this module
+        from simple_salesforce.bulk import SalesforceBulkBatchFailed
+
+        batches = self._get_job_batches(job_id=job_id)
+        chunked = False
+        complete = True
+        completed = []
+        for batch in batches:
+            if batch['state'] == 'Failed':
+                raise SalesforceBulkBatchFailed(
+                    "{}{}{}{}{}".format(self.bulk_url, 'job/', job_id,
+                                        '/batch/', batch['id']),
+                    None, self.object_name, batch.get('stateMessage'))
+            if batch['id'] == original_id:
+                # a query Salesforce didn't split completes on its own
+                chunked = batch['state'] in FINAL_BATCH_STATES
+            elif batch['state'] not in FINAL_BATCH_STATES:
+                complete = False
+            if batch['state'] == 'Completed':
+                completed.append(batch)
+        return chunked and complete, completed
+
+
+def _pk_chunking_header(chunk_size=None, parent=None):
+    """ Returns the `Sforce-Enable-PKChunking` header value of the options
+    """
+    options = []
+    if chunk_size is not None:
+        options.append('chunkSize={}'.format(chunk_size))
+    if parent is not None:
+        options.append('parent={}'.format(parent))
+    return '; '.join(options) or 'TRUE'
@@ -0,0 +1,190 @@
+"""Breakdown of the time calls to Salesforce take
+
+A `Profiler` listening to the `Hooks` of a client splits the time of every
+attempt of a call into phases:
+
+* `ttfb` -- from sending the request to receiving the response headers:
+  connection setup, upload and Salesforce's own processing;
+* `download` -- reading the response body;
+* `decode` -- decoding the JSON body into Python objects;
+* `process` -- turning the decoded body into what is returned, e.g.
+  mapping collection results or matching records to Ids.
+
+The `CallTiming` of an attempt is kept on its `requests.Response` as
+`timing`, and the one of the last call made by the current thread as
+`Profiler.last`. The profiler also sums the phases per endpoint, which
+`report()` formats as a table:
+
+    hooks = Hooks()
+    profiler = Profiler(hooks)
+    sf = Salesforce(..., hooks=hooks)
+    sf.query_all('SELECT Id FROM Contact')
+    print(profiler.last)
+    print(profiler.report())
+"""
+
+import threading
+from contextlib import contextmanager
+from time import time
+
+from simple_salesforce.hooks import AFTER_RESPONSE
+
+PHASES = ('ttfb', 'download', 'decode', 'process')
+
+
+@contextmanager
+def measure(result, phase):
+    """Adds the time spent in the block to the `phase` of the timing of the
+    `requests.Response` `result`, if it is profiled
+    """
+    timing = getattr(result, 'timing', None)
+    if timing is None:
+        yield
+        return
+    started = time()
+    try:
+        yield
+    finally:
+        timing.add(phase, time() - started)
+
+
+class CallTiming(object):
+    """The seconds spent in each phase of one attempt of a call"""
+
+    # pylint: disable=too-many-instance-attributes,too-many-arguments
+    def __init__(self, method, endpoint, object_name=None, status=None,
+                 bytes_received=None, ttfb=0.0, download=0.0,
+                 profiler=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * method -- the HTTP method of the call
+        * endpoint -- the endpoint template of the call
+        * object_name -- the name of the SObject type involved
+        * status -- the HTTP status of the response
+        * bytes_received -- the size of the response body, when known
+        * ttfb -- the seconds until the response headers arrived
+        * download -- the seconds spent reading the body
+        * profiler -- the optional `Profiler` summing the phases
+        """
+        self.method = method
+        self.endpoint = endpoint
+        self.object_name = object_name
+        self.status = status
+        self.bytes_received = bytes_received
+        self.ttfb = ttfb
+        self.download = download
+        self.decode = 0.0
+        self.process = 0.0
+        self._profiler = profiler
+
+    @property
+    def total(self):
+        """The seconds spent in every phase"""
+        return sum(getattr(self, phase) for phase in PHASES)
+
+    def add(self, phase, seconds):
+        """Adds `seconds` to `phase`"""
+        setattr(self, phase, getattr(self, phase) + seconds)
+        if self._profiler is not None:
+            self._profiler.add(self, phase, seconds)
+
+    def as_dict(self):
+        """Returns the phases, and their total, by name"""
+        phases = dict((phase, getattr(self, phase)) for phase in PHASES)
+        phases['total'] = self.total
+        return phases
+
+    def __repr__(self):
+        return 'CallTiming({} {}: {})'.format(
+            self.method, self.endpoint, ', '.join(
+                '{}={:.4f}s'.format(phase, getattr(self, phase))
+                for phase in PHASES + ('total',)))
+
+
+class Profiler(object):
+    """Times the calls fired on `hooks` and sums their phases per endpoint"""
+
+    def __init__(self, hooks):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * hooks -- the `Hooks` of the clients to profile
+        """
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {}
+        hooks.on(AFTER_RESPONSE, self._after_response)
+
+    @property
+    def last(self):
+        """The `CallTiming` of the last call made by the current thread"""
+        return getattr(self._local, 'last', None)
+
+    def _after_response(self, event):
+        """Starts the timing of an attempt, from the response headers"""
+        response = event.details.get('response')
+        if response is None:
+            return
+        elapsed = getattr(response, 'elapsed', None)
+        # requests measures `elapsed` up to the response headers
+        ttfb = event.elapsed if elapsed is None else \
+            min(elapsed.total_seconds(), event.elapsed)
+        timing = CallTiming(event.method, event.endpoint, event.object_name,
+                            event.status, event.bytes_received, ttfb=ttfb,
+                            download=event.elapsed - ttfb, profiler=self)
+        with self._lock:
+            stats = self._endpoint_stats(timing)
+            stats['calls'] += 1
+            stats['ttfb'] += timing.ttfb
+            stats['download'] += timing.download
+        response.timing = self._local.last = timing
+
+    def _endpoint_stats(self, timing):
+        """Returns the sums of the endpoint of `timing`, under the lock"""
+        key = (timing.method, timing.endpoint)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = dict(
+                [('calls', 0)] + [(phase, 0.0) for phase in PHASES])
+        return stats
+
+    def add(self, timing, phase, seconds):
+        """Adds `seconds` spent in `phase` by the call of `timing`"""
+        with self._lock:
+            self._endpoint_stats(timing)[phase] += seconds
+
+    def stats(self):
+        """Returns the calls and the seconds spent in every phase, per
+        endpoint, slowest first
+        """
+        with self._lock:
+            rows = [dict(stats, method=method, endpoint=endpoint,
+                         total=sum(stats[phase] for phase in PHASES))
+                    for (method, endpoint), stats in self._stats.items()]
+        return sorted(rows, key=lambda row: row['total'], reverse=True)
+
+    def reset(self):
+        """Forgets the calls timed so far"""
+        with self._lock:
+            self._stats.clear()
+
+    def report(self):
+        """Returns a table of the seconds spent per endpoint and phase,
+        slowest endpoint first
+        """
+        header = '{:<60} {:>7} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}'
+        row = '{:<60} {:>7} {:>10.3f} {:>10.4f} {:>10.3f} {:>10.3f} ' \
+              '{:>10.3f} {:>10.3f}'
+        lines = [header.format('endpoint', 'calls', 'total s', 'mean s',
+                               'ttfb s', 'download s', 'decode s',
+                               'process s')]
+        for stats in self.stats():
+            lines.append(row.format(
+                '{} {}'.format(stats['method'], stats['endpoint']),
+                stats['calls'], stats['total'],
+                stats['total'] / max(stats['calls'], 1),
+                *[stats[phase] for phase in PHASES]))
+        return '\n'.join(lines)
@@ -0,0 +1,241 @@
+"""SOQL query methods of `Salesforce`
+
+Besides single pages and complete result sets, large results can be
+streamed page by page instead of collecting every record first, split into
+ranges queried concurrently, or read into columns.
+"""
+
+from simple_salesforce.util import (
+    exception_handler,
+    iter_merged,
+    iter_prefetched
+)
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class QueryMixin(object):
+    """The SOQL queries of `Salesforce`, sent through its
+    `_call_salesforce(...)`
+    """
+
+    def query(self, query, **kwargs):
+        """Return the result of a Salesforce SOQL query as a dict decoded from
+        the Salesforce response JSON payload.
+
+        Arguments:
+
+        * query -- the SOQL query to send to Salesforce, e.g.
+                   SELECT Id FROM Lead WHERE Email = "waldo@somewhere.com"
+        """
+        url = self.base_url + 'query/'
+        params = {'q': query}
+        # `requests` will correctly encode the query string passed as `params`
+        result = self._call_salesforce('GET', url, params=params, **kwargs)
+
+        if result.status_code != 200:
+            exception_handler(result)
+
+        return self.json_codec.decode(result)
+
+    def query_more(
+            self, next_records_identifier, identifier_is_url=False, **kwargs):
+        """Retrieves more results from a query that returned more results
+        than the batch maximum. Returns a dict decoded from the Salesforce
+        response JSON payload.
+
+        Arguments:
+
+        * next_records_identifier -- either the Id of the next Salesforce
+                                     object in the result, or a URL to the
+                                     next record in the result.
+        * identifier_is_url -- True if `next_records_identifier` should be
+                               treated as a URL, False if
+                               `next_records_identifier` should be treated as
+                               an Id.
+        """
+        if identifier_is_url:
+            # Don't use `self.base_url` here because the full URI is provided
+            url = (u'https://{instance}{next_record_url}'
+                   .format(instance=self.sf_instance,
+                           next_record_url=next_records_identifier))
+        else:
+            url = self.base_url + 'query/{next_record_id}'
+            url = url.format(next_record_id=next_records_identifier)
+        result = self._call_salesforce('GET', url, **kwargs)
+
+        if result.status_code != 200:
+            exception_handler(result)
+
+        return self.json_codec.decode(result)
+
+    def query_all(self, query, prefetch=0, **kwargs):
+        """Returns the full set of results for the `query`. This is a
+        convenience
+        wrapper around `query(...)` and `query_more(...)`.
+
+        The returned dict is the decoded JSON payload from the final call to
+        Salesforce, but with the `totalSize` field representing the full
+        number of results retrieved and the `records` list representing the
+        full list of records retrieved.
+
+        Arguments
+
+        * query -- the SOQL query to send to Salesforce, e.g.
+                   SELECT Id FROM Lead WHERE Email = "waldo@somewhere.com"
+        * prefetch -- the number of pages to download in a background
+                      thread ahead of the page being processed (default 0,
+                      fetch each page only once the previous one is done)
+        """
+
+        all_records = []
+
+        for result in self._query_pages(query, prefetch, **kwargs):
+            all_records.extend(result['records'])
+
+        # pylint: disable=undefined-loop-variable
+        result['records'] = all_records
+        return result
+
+    def query_iter(self, query, prefetch=0, **kwargs):
+        """Lazily yields every record for the `query`, following
+        `nextRecordsUrl` one page at a time.
+
+        Unlike `query_all(...)`, only the page currently being consumed (plus
+        at most `prefetch` pages downloaded ahead of it) is held in memory,
+        and the first record is available as soon as the first page has been
+        retrieved.
+
+        Arguments
+
+        * query -- the SOQL query to send to Salesforce, e.g.
+                   SELECT Id FROM Lead WHERE Email = "waldo@somewhere.com"
+        * prefetch -- the number of pages to download in a background
+                      thread ahead of the page being consumed (default 0)
+        """
+        for result in self._query_pages(query, prefetch, **kwargs):
+            for record in result['records']:
+                yield record
+
+    def query_all_parallel(self, query, partitions=DEFAULT_MAX_WORKERS,
+                           field='Id', max_workers=None, **kwargs):
+        """Lazily yields every record for the `query`, which is split into
+        `partitions` disjoint ranges of `field` queried concurrently.
+
+        The range boundaries are spread evenly between the lowest and
+        highest values of `field`, read with two `ORDER BY ... LIMIT 1`
+        queries. Records are yielded page by page as the partitions return
+        them, so they are not in the order of an `ORDER BY` clause. Queries
+        with `GROUP BY`, `HAVING`, `LIMIT` or `OFFSET` can't be partitioned
+        and raise `ValueError`.
+
+        Arguments
+
+        * query -- the SOQL query to send to Salesforce, e.g.
+                   SELECT Id FROM Lead WHERE Email = "waldo@somewhere.com"
+        * partitions -- the number of ranges the query is split into
+        * field -- the indexed field splitting the query, `Id` or a date
+                   time field such as `CreatedDate` or `SystemModstamp`.
+                   Records where a date time field is null are read by an
+                   extra `field = null` partition.
+        * max_workers -- the number of partitions queried at once, by
+                         default all of them
+        """
+        from simple_salesforce.partition import restrict_query
+
+        queries = [query if condition is None
+                   else restrict_query(query, condition)
+                   for condition in self._partition_conditions(
+                       query, partitions, field, **kwargs)]
+        pages = iter_merged(
+            [self._fetch_pages(partition, **kwargs) for partition in queries],
+            workers=max_workers or len(queries), depth=len(queries) * 2)
+        for page in pages:
+            for record in page['records']:
+                yield record
+
+    def _partition_conditions(self, query, partitions, field, **kwargs):
+        """Returns the conditions of the ranges of `field` splitting the
+        `query`, or `[None]` when it isn't worth splitting
+        """
+        from simple_salesforce.partition import (
+            bound_query,
+            datetime_boundaries,
+            id_boundaries,
+            range_conditions
+        )
+
+        if partitions <= 1:
+            return [None]
+        lowest = self.query(bound_query(query, field), **kwargs)['records']
+        highest = self.query(bound_query(query, field, descending=True),
+                             **kwargs)['records']
+        if not lowest or not highest:
+            return [None]
+
+        if field == 'Id':
+            boundaries = id_boundaries(lowest[0][field], highest[0][field],
+                                       partitions)
+        else:
+            boundaries = datetime_boundaries(lowest[0][field],
+                                             highest[0][field], partitions)
+        return range_conditions(field, boundaries, nullable=field != 'Id')
+
+    def _query_pages(self, query, prefetch=0, **kwargs):
+        """Yields each page of results for the `query`, starting with the
+        response to `query(...)` and then every `query_more(...)` page until
+        Salesforce reports the result set as done.
+
+        When `prefetch` is set, pages are requested and decoded by a
+        background worker sharing `self.session`, staying at most `prefetch`
+        pages ahead of the caller.
+        """
+        return iter_prefetched(self._fetch_pages(query, **kwargs), prefetch)
+
+    def _fetch_pages(self, query, **kwargs):
+        """Generator behind `_query_pages(...)` issuing the actual calls"""
+        result = self.query(query, **kwargs)
+
+        while True:
+            yield result
+            # fetch next batch if we're not done else break out of loop
+            if not result['done']:
+                result = self.query_more(result['nextRecordsUrl'],
+                                         True)
+            else:
+                break
+
+    def query_columns(self, query, prefetch=0, **kwargs):
+        """Returns the results of the `query` as an OrderedDict of column
+        name to numpy array, without building the list of records.
+
+        Every page is appended to typed columns as it is read. Types come
+        from the describe metadata of the queried objects, relationship
+        fields become flat columns, e.g. `Account.Name`, and missing
+        numbers and dates are NaN or NaT. Requires NumPy, and supports
+        plain and relationship fields only.
+
+        Arguments:
+
+        * query -- the SOQL query to send to Salesforce, e.g.
+                   SELECT Id, Account.Name FROM Contact
+        * prefetch -- number of pages to fetch ahead in the background
+        """
+        return self._fill_columns(query, prefetch, **kwargs).to_numpy()
+
+    def to_arrow(self, query, prefetch=0, **kwargs):
+        """Returns the results of the `query` as a `pyarrow.Table`, built the
+        same way as `query_columns(...)`. Requires NumPy and PyArrow.
+        """
+        return self._fill_columns(query, prefetch, **kwargs).to_arrow()
+
+    def _fill_columns(self, query, prefetch=0, **kwargs):
+        """Reads every page of the `query` into a `ColumnBuilder`"""
+        # numpy is optional, only needed for columnar results
+        from simple_salesforce.columnar import ColumnBuilder, describe_columns
+
+        builder = ColumnBuilder(describe_columns(
+            query, lambda name: getattr(self, name).describe()))
+        for page in self._query_pages(query, prefetch, **kwargs):
+            builder.append_page(page['records'])
+        return builder
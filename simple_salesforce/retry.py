@@ -0,0 +1,176 @@
+"""Retrying of calls that failed for transient reasons
+
+A `RetryPolicy` classifies each failure by HTTP status and Salesforce
+`errorCode`:
+
+* some failures mean the request was not processed at all (the service was
+  unavailable, a record lock could not be obtained, the connection could not
+  be established), so any call can safely be sent again;
+* others leave the outcome unknown (a reset connection, a gateway error), so
+  only idempotent calls are sent again, to never create a record twice.
+
+Waits grow exponentially with random jitter, honour `Retry-After`, and the
+total time spent retrying is capped.
+"""
+
+import random
+from email.utils import parsedate_tz, mktime_tz
+from time import sleep, time
+
+import requests
+
+# errorCode/exceptionCode values reported when a request was not processed
+SAFE_ERROR_CODES = frozenset([
+    'UNABLE_TO_LOCK_ROW',
+    'SERVER_UNAVAILABLE',
+    'ServerUnavailable',
+    'REQUEST_RUNNING_TOO_LONG',
+])
+
+# statuses reported when a request was not processed
+SAFE_STATUSES = frozenset([429, 503])
+
+# statuses of failures whose outcome is unknown
+UNKNOWN_OUTCOME_STATUSES = frozenset([500, 502, 504])
+
+# Salesforce PATCH requests set field values, so repeating one is harmless
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE',
+                                'PATCH'])
+
+
+def error_codes(result):
+    """Returns the Salesforce error codes found in the body of `result`"""
+    try:
+        content = result.json()
+    # pylint: disable=broad-except
+    except Exception:
+        return set()
+    if isinstance(content, dict):
+        content = [content]
+    if not isinstance(content, list):
+        return set()
+    return set(error.get('errorCode') or error.get('exceptionCode')
+               for error in content if isinstance(error, dict))
+
+
+def retry_after(result):
+    """Returns the seconds to wait requested by the `Retry-After` header of
+    `result`, or None
+    """
+    value = result.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(mktime_tz(parsed) - time(), 0)
+
+
+class RetryPolicy(object):
+    """When and how to send a failed call again"""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, max_attempts=5, min_delay=0.5, max_delay=30,
+                 factor=2, jitter=0.25, max_elapsed=300,
+                 safe_error_codes=SAFE_ERROR_CODES,
+                 idempotent_methods=IDEMPOTENT_METHODS):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * max_attempts -- the maximum number of times a call is sent
+        * min_delay -- seconds to wait before the first retry
+        * max_delay -- upper bound for the wait between attempts
+        * factor -- multiplier applied to the wait after every attempt
+        * jitter -- fraction of the wait added or removed at random
+        * max_elapsed -- seconds after the first attempt past which no retry
+                         is started
+        * safe_error_codes -- error codes meaning the call was not processed
+        * idempotent_methods -- HTTP methods that can be sent again when the
+                                outcome of an attempt is unknown
+        """
+        self.max_attempts = max_attempts
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+        self.max_elapsed = max_elapsed
+        self.safe_error_codes = frozenset(safe_error_codes)
+        self.idempotent_methods = frozenset(idempotent_methods)
+
+    def is_retryable(self, method, result=None, error=None):
+        """Whether the call with the HTTP `method` can be sent again after
+        receiving `result`, or failing with the requests exception `error`
+        """
+        idempotent = method.upper() in self.idempotent_methods
+        if error is not None:
+            if isinstance(error, requests.exceptions.ConnectTimeout):
+                return True
+            return idempotent and isinstance(
+                error, (requests.exceptions.ConnectionError,
+                        requests.exceptions.Timeout))
+        if result.status_code in SAFE_STATUSES:
+            return True
+        if result.status_code >= 400 and \
+                error_codes(result) & self.safe_error_codes:
+            return True
+        return idempotent and \
+            result.status_code in UNKNOWN_OUTCOME_STATUSES
+
+    def delay(self, attempt, result=None):
+        """Returns the seconds to wait before attempt number `attempt + 1`"""
+        interval = min(self.min_delay * self.factor ** (attempt - 1),
+                       self.max_delay)
+        spread = interval * self.jitter
+        delay = random.uniform(interval - spread, interval + spread)
+        requested = retry_after(result) if result is not None else None
+        if requested is not None:
+            delay = max(delay, requested)
+        return max(delay, 0)
+
+    def call(self, method, send, on_retry=None):
+        """Sends a call, sending it again while it fails for a retryable
+        reason and attempts and time remain
+
+        Arguments:
+
+        * method -- the HTTP method of the call
+        * send -- a callable making one attempt and returning the
+                  `requests.Response`
+        * on_retry -- an optional callable called with the response, or
+                      exception, of an attempt about to be sent again and
+                      the seconds waited before it
+
+        Returns the response of the last attempt, or raises the exception of
+        the last attempt.
+        """
+        started = time()
+        attempt = 0
+        while True:
+            attempt += 1
+            result = error = None
+            try:
+                result = send()
+            except requests.exceptions.RequestException as exc:
+                error = exc
+
+            if (result is not None and result.status_code < 400) or \
+                    attempt >= self.max_attempts or \
+                    not self.is_retryable(method, result, error):
+                if error is not None:
+                    raise error
+                return result
+
+            delay = self.delay(attempt, result)
+            if time() + delay - started > self.max_elapsed:
+                if error is not None:
+                    raise error
+                return result
+            if on_retry is not None:
+                on_retry(result, error, delay)
+            if result is not None:
+                result.close()
+            sleep(delay)
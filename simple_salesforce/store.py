@@ -0,0 +1,223 @@
+"""Stores of sessions shared between clients and processes
+
+A login takes a SOAP round trip and counts against the org's login rate
+limits. Clients given a session store reuse the session another client or
+process of the same user obtained, and only log in again when none is
+stored or Salesforce rejected the stored one as expired.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from time import time
+
+try:
+    import fcntl
+    msvcrt = None  # pylint: disable=invalid-name
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+# os.rename doesn't replace an existing file on Windows
+_replace = getattr(os, 'replace', os.rename)
+
+
+def login_key(username, sandbox=False, organizationId=None):
+    """Returns the key of the sessions of `username`
+
+    Arguments:
+
+    * username -- the Salesforce username
+    * sandbox -- whether the user logs in to `test.salesforce.com`
+    * organizationId -- the organization of IP filtered logins
+    """
+    # pylint: disable=invalid-name
+    domain = 'test' if sandbox else 'login'
+    return '{}/{}/{}'.format(domain, organizationId or '', username)
+
+
+class SessionStore(object):
+    """In-process store of sessions, and the interface of stores shared by
+    processes
+
+    A store maps a key to the `(session_id, sf_instance)` last obtained for
+    it and when it was stored. Entries older than `max_age` are ignored.
+    """
+
+    def __init__(self, max_age=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * max_age -- the optional number of seconds a stored session is
+                     used for, e.g. the org's session timeout
+        """
+        self.max_age = max_age
+        self._entries = {}
+        self._lock = threading.RLock()
+
+    def is_fresh(self, stored_at):
+        """Whether a session stored at `stored_at` can be used"""
+        return self.max_age is None or time() - stored_at < self.max_age
+
+    @contextmanager
+    def lock(self, key):
+        """Holds the exclusive lock of `key`, so that only one client logs in
+        for it at a time
+        """
+        # pylint: disable=unused-argument
+        with self._lock:
+            yield
+
+    def get(self, key):
+        """Returns the stored `(session_id, sf_instance, stored_at)` of
+        `key`, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or not self.is_fresh(entry[2]):
+            return None
+        return entry
+
+    def set(self, key, session_id, sf_instance):
+        """Stores the session of `key`"""
+        with self._lock:
+            self._entries[key] = (session_id, sf_instance, time())
+
+    def delete(self, key):
+        """Forgets the session of `key`"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+class FileSessionStore(SessionStore):
+    """Store of sessions shared by the processes of a machine
+
+    Every key has a file in the `path` directory, written atomically and
+    readable by its owner only, and a lock file held while a process logs
+    in. Session IDs grant access to the org, so `path` must be a private
+    directory.
+    """
+
+    def __init__(self, path, max_age=None):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * path -- the directory holding the sessions
+        * max_age -- the optional number of seconds a stored session is
+                     used for, e.g. the org's session timeout
+        """
+        super(FileSessionStore, self).__init__(max_age=max_age)
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path, 0o700)
+
+    def _file_path(self, key, suffix):
+        """Returns the file of `key` with the extension `suffix`"""
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, digest + suffix)
+
+    @contextmanager
+    def lock(self, key):
+        """Holds the exclusive lock of `key` across threads and processes"""
+        with self._lock:
+            with io.open(self._file_path(key, '.lock'), 'a+',
+                         encoding='utf-8') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                else:
+                    lock_file.seek(0)
+                    # pylint: disable=no-member
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                    else:
+                        lock_file.seek(0)
+                        # pylint: disable=no-member
+                        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def get(self, key):
+        try:
+            with io.open(self._file_path(key, '.json'),
+                         encoding='utf-8') as session_file:
+                entry = json.load(session_file)
+        # pylint: disable=broad-except
+        except Exception:
+            # missing, or partially written by an older version
+            return None
+        if entry.get('key') != key or not self.is_fresh(entry['stored_at']):
+            return None
+        return entry['session_id'], entry['sf_instance'], entry['stored_at']
+
+    def set(self, key, session_id, sf_instance):
+        # mkstemp creates the file readable by its owner only
+        handle, temp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as session_file:
+                json.dump({'key': key, 'session_id': session_id,
+                           'sf_instance': sf_instance, 'stored_at': time()},
+                          session_file)
+            _replace(temp_path, self._file_path(key, '.json'))
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def delete(self, key):
+        try:
+            os.remove(self._file_path(key, '.json'))
+        except OSError:
+            pass
+
+
+class StoredLogin(object):
+    """A login going through a `SessionStore`
+
+    Called for the first time, it returns the stored session if there is
+    one. Called again because the session it returned expired, it drops
+    that session from the store, unless another client already replaced it,
+    and logs in, one client at a time.
+    """
+
+    def __init__(self, store, key, login):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * store -- the `SessionStore`
+        * key -- the key of the sessions, as returned by `login_key`
+        * login -- a callable logging in, returning the new
+                   `(session_id, sf_instance)`
+        """
+        self.store = store
+        self.key = key
+        self.login = login
+        self.session_id = None
+        self.issued_at = None
+
+    def __call__(self):
+        """Returns a usable `(session_id, sf_instance)`"""
+        with self.store.lock(self.key):
+            entry = self.store.get(self.key)
+            if entry is not None and entry[0] != self.session_id:
+                session_id, sf_instance, self.issued_at = entry
+                login = session_id, sf_instance
+            else:
+                if entry is not None:
+                    # the session handed out last time expired
+                    self.store.delete(self.key)
+                login = self.login()
+                session_id, sf_instance = login
+                self.store.set(self.key, session_id, sf_instance)
+                self.issued_at = time()
+        self.session_id = session_id
+        # the result of a login, with what it reported about the session
+        return login
@@ -0,0 +1,211 @@
+"""Incremental replication of the changes made to an SObject type
+
+`ChangeSync` turns the Get Updated and Get Deleted resources into a stream
+of changes since a high-water mark:
+
+* the range since the mark is split into windows fetched concurrently, and
+  windows holding more IDs than Salesforce returns at once are split again;
+* updated records are retrieved with `SFType.get_many`, 2,000 per request,
+  instead of one `get` each;
+* the new high-water mark is the latest date Salesforce reports covered, to
+  be persisted and passed to the next run.
+
+Polling every few minutes then costs a handful of calls.
+"""
+
+import logging
+from collections import namedtuple
+from datetime import datetime, timedelta, tzinfo
+from multiprocessing.pool import ThreadPool
+
+from simple_salesforce.composite import MAX_RETRIEVE_IDS
+from simple_salesforce.util import SalesforceMalformedRequest
+
+try:
+    from datetime import timezone
+    UTC = timezone.utc
+except ImportError:
+    # Python < 3.2
+    class _UTC(tzinfo):
+        """Coordinated Universal Time"""
+        # keeps the parameter names of tzinfo
+        # pylint: disable=unused-argument,invalid-name
+        def utcoffset(self, dt):
+            return timedelta(0)
+
+        def tzname(self, dt):
+            return 'UTC'
+
+        def dst(self, dt):
+            return timedelta(0)
+    UTC = _UTC()
+
+#pylint: disable=invalid-name
+logger = logging.getLogger(__name__)
+
+# Salesforce only reports changes of the last 30 days
+MAX_HISTORY = timedelta(days=30)
+DEFAULT_WINDOW = timedelta(days=1)
+# windows aren't split below the resolution of the resources
+MIN_WINDOW = timedelta(minutes=1)
+DEFAULT_MAX_WORKERS = 4
+
+# reported when a window holds more than 600,000 IDs
+EXCEEDED_ID_LIMIT = 'EXCEEDED_ID_LIMIT'
+
+UPSERT = 'upsert'
+DELETE = 'delete'
+
+Change = namedtuple('Change', ['kind', 'id', 'record', 'date'])
+Change.__doc__ = """A change to replicate
+
+* kind -- `upsert` or `delete`
+* id -- the ID of the record
+* record -- the current fields of an upserted record, None for a delete
+* date -- when a record was deleted, None for an upsert
+"""
+
+
+def parse_datetime(value):
+    """Returns the aware datetime of a Salesforce date time string, which is
+    always in UTC, e.g. `2026-10-14T10:00:00.000+0000`
+    """
+    return datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S').replace(
+        tzinfo=UTC)
+
+
+def split_range(start, end, window):
+    """Returns the consecutive `(start, end)` windows covering a range"""
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
+
+
+def _is_id_limit_error(error):
+    """Whether `error` reports a window holding too many IDs"""
+    content = error.content
+    if isinstance(content, dict):
+        content = [content]
+    return isinstance(content, list) and any(
+        isinstance(item, dict) and item.get('errorCode') == EXCEEDED_ID_LIMIT
+        for item in content)
+
+
+class ChangeSync(object):
+    """Streams the changes made to one SObject type since a high-water mark
+
+    Usage:
+
+        sync = ChangeSync(sf.Contact, fields=['Id', 'LastName'])
+        for change in sync.changes(since):
+            ...
+        since = sync.high_water_mark
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, sftype, fields=None, window=DEFAULT_WINDOW,
+                 max_workers=DEFAULT_MAX_WORKERS,
+                 batch_size=MAX_RETRIEVE_IDS):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * sftype -- the `SFType` of the synced object, e.g. `sf.Contact`
+        * fields -- the fields of upserted records, by default every field
+                    of the object's `describe()`
+        * window -- the length of the ranges the changes are listed for
+        * max_workers -- the number of windows and retrievals run at once
+        * batch_size -- the number of records retrieved per request, at most
+                        2,000
+        """
+        self.sftype = sftype
+        self.fields = fields
+        self.window = window
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.high_water_mark = None
+
+    def changes(self, since, until=None):
+        """Yields the `Change`s made after `since`, oldest window first
+
+        Within a window, deletes come before upserts, so that records
+        deleted and restored end up present. Records updated then deleted
+        only produce the delete.
+
+        Once the iteration completes, `high_water_mark` holds the date to
+        pass as `since` next time.
+
+        Arguments:
+
+        * since -- the aware datetime of the previous high-water mark, at
+                   most 30 days ago
+        * until -- the aware end of the range, by default now
+        """
+        until = until or datetime.now(UTC)
+        if until - since > MAX_HISTORY:
+            raise ValueError(
+                'Changes are only available for the last 30 days, a full '
+                'copy of {} is needed'.format(self.sftype.name))
+        if self.fields is None:
+            self.fields = [field['name']
+                           for field in self.sftype.describe()['fields']]
+
+        pool = ThreadPool(self.max_workers)
+        try:
+            high_water_mark = since
+            for window in pool.imap(self._list_changes,
+                                    split_range(since, until, self.window)):
+                deleted, updated_ids, covered = window
+                for record in deleted:
+                    yield Change(DELETE, record['id'], None,
+                                 record['deletedDate'])
+                for records in pool.imap(self._retrieve,
+                                         self._batches(updated_ids)):
+                    for record_id, record in records:
+                        if record is not None:
+                            yield Change(UPSERT, record_id, record, None)
+                high_water_mark = max(high_water_mark, covered)
+            self.high_water_mark = high_water_mark
+        finally:
+            pool.terminate()
+
+    def _batches(self, ids):
+        """Splits `ids` into retrieval batches"""
+        return [ids[i:i + self.batch_size]
+                for i in range(0, len(ids), self.batch_size)]
+
+    def _list_changes(self, window):
+        """Returns the deleted records, updated IDs and latest date covered
+        of a window, splitting it while it holds too many IDs
+        """
+        start, end = window
+        try:
+            updated = self.sftype.updated(start, end)
+            deleted = self.sftype.deleted(start, end)
+        except SalesforceMalformedRequest as exc:
+            if not _is_id_limit_error(exc) or end - start <= MIN_WINDOW:
+                raise
+            middle = start + (end - start) // 2
+            first = self._list_changes((start, middle))
+            second = self._list_changes((middle, end))
+            return (first[0] + second[0], first[1] + second[1], second[2])
+
+        earliest = deleted.get('earliestDateAvailable')
+        if earliest and parse_datetime(earliest) > start:
+            logger.warning(
+                'Deletes of %s before %s are no longer available, some may '
+                'be missing', self.sftype.name, earliest)
+        # the end may not be covered yet when the window reaches now
+        covered = min(parse_datetime(updated['latestDateCovered']),
+                      parse_datetime(deleted['latestDateCovered']))
+        return deleted['deletedRecords'], updated['ids'], covered
+
+    def _retrieve(self, ids):
+        """Returns the `(id, record)` of `ids`, with None for records
+        deleted since
+        """
+        # batches are already retrieved concurrently
+        return list(zip(ids, self.sftype.get_many(ids, self.fields,
+                                                  max_workers=1)))
@@ -0,0 +1,179 @@
+"""Test cases for aio.py, imported by test_aio.py on Python 3.6+"""
+
+import asyncio
+import json
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from unittest.mock import patch
+
+from simple_salesforce import tests
+from simple_salesforce.api import (
+    SalesforceExpiredSession,
+    SalesforceResourceNotFound
+)
+try:
+    from simple_salesforce.aio import AsyncSalesforce
+except ImportError:
+    AsyncSalesforce = None
+
+
+class _FakeResponse(object):
+    """Minimal stand-in for an `aiohttp.ClientResponse`"""
+    def __init__(self, url, status, body):
+        self.url = url
+        self.status = status
+        self.headers = {}
+        self._body = body
+
+    async def read(self):
+        """Returns the canned body"""
+        return self._body.encode('utf-8')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+class _FakeSession(object):
+    """Records requests and replays canned (status, body) responses"""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def request(self, method, url, headers=None, **kwargs):
+        """Pops the next canned response"""
+        self.calls.append((method, url, headers, kwargs))
+        status, body = self.responses.pop(0)
+        return _FakeResponse(url, status, body)
+
+
+def _run(coroutine):
+    """Runs `coroutine` to completion on a fresh event loop"""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+@unittest.skipIf(AsyncSalesforce is None, 'aiohttp is not installed')
+class TestAsyncSalesforce(unittest.TestCase):
+    """Tests for the AsyncSalesforce and AsyncSFType instances"""
+    def _client(self, session, **kwargs):
+        """Creates a client authenticated with a direct session ID"""
+        return AsyncSalesforce(session_id=tests.SESSION_ID,
+                               instance_url=tests.SERVER_URL,
+                               session=session, **kwargs)
+
+    def test_query_all(self):
+        """Ensure query_all follows nextRecordsUrl"""
+        session = _FakeSession(
+            (200, '{"records": [{"Id": "1"}], "done": false, '
+                  '"nextRecordsUrl": "/services/data/v29.0/query/next"}'),
+            (200, '{"records": [{"Id": "2"}], "done": true}'))
+        client = self._client(session)
+
+        result = _run(client.query_all('SELECT Id FROM Contact'))
+
+        self.assertEqual(result['records'], [{'Id': '1'}, {'Id': '2'}])
+        self.assertEqual(session.calls[0][3]['params'],
+                         {'q': 'SELECT Id FROM Contact'})
+        self.assertEqual(session.calls[1][1],
+                         'https://na15.salesforce.com'
+                         '/services/data/v29.0/query/next')
+
+    def test_sftype_create_and_headers(self):
+        """Ensure SFType calls carry the bearer token and extra headers"""
+        session = _FakeSession((201, '{"id": "003", "success": true}'))
+        client = self._client(session)
+
+        result = _run(client.Contact.create(
+            {'LastName': 'Smith'}, headers={'Sforce-Auto-Assign': 'FALSE'}))
+
+        self.assertEqual(result['id'], '003')
+        method, url, headers, kwargs = session.calls[0]
+        self.assertEqual(method, 'POST')
+        self.assertTrue(url.endswith('/sobjects/Contact/'))
+        self.assertEqual(headers['Authorization'], 'Bearer ' + tests.SESSION_ID)
+        self.assertEqual(headers['Sforce-Auto-Assign'], 'FALSE')
+        self.assertEqual(json.loads(kwargs['data']), {'LastName': 'Smith'})
+
+    def test_exception_mapping(self):
+        """Ensure failures raise the same exceptions as the sync client"""
+        session = _FakeSession((404, '[{"errorCode": "NOT_FOUND"}]'))
+        client = self._client(session)
+
+        with self.assertRaises(SalesforceResourceNotFound) as cm:
+            _run(client.Contact.get('003'))
+        self.assertEqual(cm.exception.resource_name, 'Contact')
+
+    def test_expired_session_without_refresh_token(self):
+        """Ensure a 401 is raised when the session can't be refreshed"""
+        session = _FakeSession((401, '[{"errorCode": "INVALID_SESSION_ID"}]'))
+        client = self._client(session)
+
+        with self.assertRaises(SalesforceExpiredSession):
+            _run(client.query('SELECT Id FROM Contact'))
+
+    def test_expired_session_is_refreshed_once(self):
+        """Ensure concurrent 401s trigger a single token refresh"""
+        session = _FakeSession(
+            (401, '[]'), (401, '[]'),
+            (200, '{"Id": "1"}'), (200, '{"Id": "2"}'))
+        client = self._client(
+            session, refresh_token='token', consumer_id='id',
+            consumer_secret='secret')
+
+        with patch('simple_salesforce.aio.SalesforceLogin',
+                   return_value=('new-session', 'na15.salesforce.com')) \
+                as login:
+            async def get_both():
+                """Fetches two records concurrently"""
+                return await asyncio.gather(
+                    client.Contact.get('1'), client.Contact.get('2'))
+            results = _run(get_both())
+
+        self.assertEqual(login.call_count, 1)
+        self.assertEqual(sorted(r['Id'] for r in results), ['1', '2'])
+        self.assertEqual(session.calls[-1][2]['Authorization'],
+                         'Bearer new-session')
+
+    def test_deferred_password_login(self):
+        """Ensure password logins happen on the first call"""
+        session = _FakeSession((200, '{"sobjects": []}'))
+        client = AsyncSalesforce(username='foo@bar.com', password='password',
+                                 security_token='token', session=session)
+
+        with patch('simple_salesforce.aio.SalesforceLogin',
+                   return_value=(tests.SESSION_ID, 'na15.salesforce.com')) \
+                as login:
+            self.assertIsNone(client.session_id)
+            _run(client.describe())
+
+        self.assertEqual(login.call_count, 1)
+        self.assertEqual(session.calls[0][1],
+                         'https://na15.salesforce.com'
+                         '/services/data/v29.0/sobjects')
+
+    def test_bulk_insert(self):
+        """Ensure the bulk job lifecycle runs through the async session"""
+        session = _FakeSession(
+            (201, '{"id": "job"}'),
+            (201, '{"id": "batch", "jobId": "job"}'),
+            (200, '{"id": "job", "state": "Closed"}'),
+            (200, '{"id": "batch", "state": "Completed"}'),
+            (200, '[{"success": true, "id": "001"}]'))
+        client = self._client(session)
+
+        result = _run(client.bulk.Account.insert([{'Name': 'Acme'}]))
+
+        self.assertEqual(result, [{'success': True, 'id': '001'}])
+        self.assertEqual(session.calls[0][2]['X-SFDC-Session'],
+                         tests.SESSION_ID)
+        self.assertTrue(session.calls[-1][1].endswith(
+            '/job/job/batch/batch/result'))
@@ -0,0 +1,866 @@
+"""An in-process stand-in for the Salesforce APIs used by the client
+
+`FakeSalesforce` serves, over real HTTP on a local port:
+
+* SOAP password logins and OAuth refresh token logins;
+* SOQL queries, paged with `nextRecordsUrl`;
+* record create, get, update, upsert and delete, object metadata and
+  describes, and sObject Collections retrievals;
+* the Bulk API job and batch lifecycle, for DML jobs, query jobs and PK
+  chunked query jobs.
+
+Records live in memory. Queries select fields of a single object, and
+support `WHERE` conditions joined by `AND` comparing a field to a literal
+(or `IN` a list), `ORDER BY` one field and `LIMIT`; other conditions are
+ignored. Latency, page and result sizes, bulk processing time and failures
+are configurable, and the traffic is counted, so that the client can be
+exercised and measured end to end without a network or an org.
+
+Usage:
+
+    with FakeSalesforce(latency=0.01) as server:
+        server.add_records('Contact', make_records(10000))
+        sf = Salesforce(username='user@example.com', password='password',
+                        security_token='token', session=server.session())
+"""
+
+import json
+import random
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from time import sleep, time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    # Python 2.6/2.7
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse, parse_qs
+except ImportError:
+    # Python 3
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, parse_qs
+
+from simple_salesforce.partition import number_to_id
+
+ORGANIZATION_ID = '00D000000000001AAA'
+USER_ID = '005000000000001AAA'
+DEFAULT_INSTANCE = 'na1.salesforce.com'
+DEFAULT_PAGE_SIZE = 2000
+# records per result file of a bulk query batch
+DEFAULT_RESULT_SIZE = 10000
+DEFAULT_CHUNK_SIZE = 100000
+
+KEY_PREFIXES = {'Account': '001', 'Contact': '003', 'Opportunity': '006',
+                'Lead': '00Q', 'Case': '500'}
+FINAL_BATCH_STATES = ('Completed', 'Failed', 'Not Processed')
+
+LOGIN_RESPONSE = u"""<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"
+    xmlns="urn:partner.soap.sforce.com">
+  <soapenv:Body>
+    <loginResponse>
+      <result>
+        <metadataServerUrl>https://{instance}/services/Soap/m/{version}/{org}</metadataServerUrl>
+        <passwordExpired>false</passwordExpired>
+        <sandbox>false</sandbox>
+        <serverUrl>https://{instance}/services/Soap/u/{version}/{org}</serverUrl>
+        <sessionId>{session_id}</sessionId>
+        <userId>{user}</userId>
+        <userInfo>
+          <organizationId>{org}</organizationId>
+          <userId>{user}</userId>
+        </userInfo>
+      </result>
+    </loginResponse>
+  </soapenv:Body>
+</soapenv:Envelope>"""
+
+_SELECT = re.compile(
+    r'^\s*SELECT\s+(?P<fields>.+?)\s+FROM\s+(?P<object>\w+)(?P<rest>.*)$',
+    re.I | re.S)
+_WHERE = re.compile(r'\bWHERE\s+(?P<where>.+?)(?=\bORDER\s+BY\b|\bLIMIT\b|$)',
+                    re.I | re.S)
+_ORDER_BY = re.compile(r'\bORDER\s+BY\s+(?P<field>\w+)(?:\s+(?P<order>ASC|'
+                       r'DESC))?', re.I)
+_LIMIT = re.compile(r'\bLIMIT\s+(?P<limit>\d+)', re.I)
+_AND = re.compile(r'\s+AND\s+', re.I)
+_COMPARISON = re.compile(
+    r"^\(*\s*(?P<field>\w+)\s*(?P<operator>=|!=|<=|>=|<|>)\s*"
+    r"(?:'(?P<string>(?:[^'\\]|\\.)*)'|(?P<literal>[^\s)]+))\s*\)*$", re.S)
+_IN = re.compile(r"^\(*\s*(?P<field>\w+)\s+IN\s*\((?P<values>[^)]*)\)\s*\)*$",
+                 re.I | re.S)
+_OPERATORS = {
+    '=': lambda value, literal: value == literal,
+    '!=': lambda value, literal: value != literal,
+    '<': lambda value, literal: value < literal,
+    '<=': lambda value, literal: value <= literal,
+    '>': lambda value, literal: value > literal,
+    '>=': lambda value, literal: value >= literal,
+}
+
+
+def make_records(count, fields=4, field_size=20, start=datetime(2026, 1, 1)):
+    """Returns `count` records to add to a `FakeSalesforce`, each holding
+    `fields` text fields of `field_size` characters besides a name, an email
+    and creation dates a minute apart
+    """
+    records = []
+    for i in range(count):
+        created = (start + timedelta(minutes=i)).strftime(
+            '%Y-%m-%dT%H:%M:%S.000+0000')
+        record = OrderedDict([
+            ('LastName', 'Smith {}'.format(i)),
+            ('Email', 'smith{}@example.com'.format(i)),
+            ('CreatedDate', created),
+            ('SystemModstamp', created)])
+        for field in range(fields):
+            record['Text{}__c'.format(field)] = (
+                '{:0{size}d}'.format(i, size=field_size)[-field_size:])
+        records.append(record)
+    return records
+
+
+def _error(status, error_code, message):
+    """Returns the response of a REST API error"""
+    return status, [{'errorCode': error_code, 'message': message}]
+
+
+def _parse_literal(string, literal):
+    """Returns the comparable value of a SOQL literal, with `Id`s and date
+    times shortened to the part compared
+    """
+    if string is not None:
+        return string.replace("\\'", "'").replace('\\\\', '\\')
+    if literal.lower() in ('true', 'false'):
+        return literal.lower() == 'true'
+    if literal.lower() == 'null':
+        return None
+    if 'T' in literal:
+        # date times are compared to the second, in UTC
+        return literal.rstrip('Z')[:19]
+    try:
+        return float(literal)
+    except ValueError:
+        return literal
+
+
+def _comparable(field, value, literal):
+    """Returns `value` in the form `literal` is compared to"""
+    if value is None or literal is None:
+        return value
+    if field == 'Id' or isinstance(literal, str) and 'T' in literal and \
+            len(literal) == 19 and literal[4] == '-':
+        return value[:len(literal)]
+    return value
+
+
+def _parse_where(where):
+    """Returns the predicates of the `AND`ed conditions of a `WHERE` clause
+    it understands
+    """
+    predicates = []
+    for condition in _AND.split(where.strip()):
+        match = _COMPARISON.match(condition)
+        if match:
+            field = match.group('field')
+            literal = _parse_literal(match.group('string'),
+                                     match.group('literal'))
+            operator = _OPERATORS[match.group('operator')]
+            predicates.append(
+                lambda record, field=field, literal=literal,
+                operator=operator: _compare(record, field, literal, operator))
+            continue
+        match = _IN.match(condition)
+        if match:
+            field = match.group('field')
+            values = set(value.strip().strip("'")
+                         for value in match.group('values').split(','))
+            predicates.append(
+                lambda record, field=field, values=values: any(
+                    _comparable(field, record.get(field), value) == value
+                    for value in values))
+    return predicates
+
+
+def _compare(record, field, literal, operator):
+    """Whether the `field` of `record` compares to `literal`"""
+    value = _comparable(field, record.get(field), literal)
+    if value is None or literal is None:
+        return operator(value, literal) if operator in (
+            _OPERATORS['='], _OPERATORS['!=']) else False
+    try:
+        return operator(value, literal)
+    except TypeError:
+        return False
+
+
+class _Job(object):
+    """A bulk job and its batches"""
+    # pylint: disable=too-few-public-methods
+    def __init__(self, job_id, info, pk_chunking):
+        self.id = job_id
+        self.info = info
+        self.pk_chunking = pk_chunking
+        self.batches = OrderedDict()
+
+
+class _Batch(object):
+    """A batch of a bulk job"""
+    # pylint: disable=too-few-public-methods,too-many-arguments
+    def __init__(self, batch_id, job_id, data, state='Queued', ready_at=0):
+        self.id = batch_id
+        self.job_id = job_id
+        self.data = data
+        self.state = state
+        self.ready_at = ready_at
+        self.results = None
+        self.state_message = None
+
+    def info(self):
+        """Returns the batch info served by the API"""
+        return {'id': self.id, 'jobId': self.job_id, 'state': self.state,
+                'stateMessage': self.state_message,
+                'numberRecordsProcessed': len(self.results or [])}
+
+
+class _RedirectAdapter(HTTPAdapter):
+    """Sends every HTTPS request to the fake server instead"""
+    def __init__(self, server_url, **kwargs):
+        super(_RedirectAdapter, self).__init__(**kwargs)
+        self.server_url = server_url
+
+    # pylint: disable=arguments-differ
+    def send(self, request, **kwargs):
+        request.url = re.sub(r'^https://[^/]+', self.server_url, request.url)
+        return super(_RedirectAdapter, self).send(request, **kwargs)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Hands requests to the `FakeSalesforce` of the server"""
+    # keep connections alive, as Salesforce does
+    protocol_version = 'HTTP/1.1'
+    # the headers and body are written separately
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        """Reads the request and writes the response"""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        status, content_type, content = self.server.fake.handle(
+            self.command, self.path, self.headers, body)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+    # pylint: disable=redefined-builtin
+    def log_message(self, format, *args):
+        """Keeps the requests out of the output"""
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    """Serves every connection in its own thread"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+# pylint: disable=too-many-instance-attributes,too-many-public-methods
+class FakeSalesforce(object):
+    """A local stand-in for a Salesforce org"""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, latency=0, page_size=DEFAULT_PAGE_SIZE,
+                 result_size=DEFAULT_RESULT_SIZE, batch_time=0,
+                 failure_rate=0, failure_status=503,
+                 instance=DEFAULT_INSTANCE, seed=0):
+        """Initialize the instance with the given parameters.
+
+        Arguments:
+
+        * latency -- seconds every response is delayed by
+        * page_size -- the number of records per page of a query
+        * result_size -- the number of records per result file of a bulk
+                         query batch
+        * batch_time -- seconds bulk batches stay queued and in progress
+        * failure_rate -- the fraction of requests failing at random with
+                          `failure_status`
+        * failure_status -- the HTTP status of failed requests, 503 being
+                            retried by a `RetryPolicy`
+        * instance -- the instance host name logins return
+        * seed -- the seed of the random failures
+        """
+        self.latency = latency
+        self.page_size = page_size
+        self.result_size = result_size
+        self.batch_time = batch_time
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.instance = instance
+        self.random = random.Random(seed)
+        self.objects = {}
+        self.key_prefixes = dict(KEY_PREFIXES)
+        self.sessions = set()
+        self.logins = 0
+        self.requests = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._failures = []
+        self._cursors = {}
+        self._jobs = {}
+        self._counter = 0
+        self._lock = threading.RLock()
+        self._server = None
+        self._thread = None
+        self._routes = [
+            ('POST', r'/services/Soap/u/(?P<version>[\d.]+)',
+             self._soap_login),
+            ('POST', r'/services/oauth2/token', self._oauth_login),
+            ('GET', r'/services/data/v[\d.]+/query/?', self._query),
+            ('GET', r'/services/data/v[\d.]+/query/(?P<locator>[\w-]+)',
+             self._query_more),
+            ('GET', r'/services/data/v[\d.]+/sobjects/(?P<object>\w+)/'
+                    r'describe/?', self._describe),
+            ('GET', r'/services/data/v[\d.]+/sobjects/(?P<object>\w+)/?',
+             self._metadata),
+            ('POST', r'/services/data/v[\d.]+/sobjects/(?P<object>\w+)/?',
+             self._create),
+            ('GET', r'/services/data/v[\d.]+/sobjects/(?P<object>\w+)/'
+                    r'(?P<id>\w+)', self._get),
+            ('PATCH', r'/services/data/v[\d.]+/sobjects/(?P<object>\w+)/'
+                      r'(?P<id>\w+)', self._update),
+            ('DELETE', r'/services/data/v[\d.]+/sobjects/(?P<object>\w+)/'
+                       r'(?P<id>\w+)', self._delete),
+            ('PATCH', r'/services/data/v[\d.]+/sobjects/(?P<object>\w+)/'
+                      r'(?P<field>\w+)/(?P<value>[^/]+)', self._upsert),
+            ('POST', r'/services/data/v[\d.]+/composite/sobjects/'
+                     r'(?P<object>\w+)', self._retrieve),
+            ('POST', r'/services/async/[\d.]+/job', self._create_job),
+            ('GET', r'/services/async/[\d.]+/job/(?P<job>\w+)',
+             self._get_job),
+            ('POST', r'/services/async/[\d.]+/job/(?P<job>\w+)',
+             self._update_job),
+            ('GET', r'/services/async/[\d.]+/job/(?P<job>\w+)/batch',
+             self._list_batches),
+            ('POST', r'/services/async/[\d.]+/job/(?P<job>\w+)/batch',
+             self._add_batch),
+            ('GET', r'/services/async/[\d.]+/job/(?P<job>\w+)/batch/'
+                    r'(?P<batch>\w+)', self._get_batch),
+            ('GET', r'/services/async/[\d.]+/job/(?P<job>\w+)/batch/'
+                    r'(?P<batch>\w+)/result', self._get_results),
+            ('GET', r'/services/async/[\d.]+/job/(?P<job>\w+)/batch/'
+                    r'(?P<batch>\w+)/result/(?P<result>\w+)',
+             self._get_result),
+        ]
+        self._routes = [(method, re.compile('^' + pattern + '$'), handler)
+                        for method, pattern, handler in self._routes]
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """Starts serving on a free local port, in a background thread"""
+        self._server = _Server(('127.0.0.1', 0), _Handler)
+        self._server.fake = self
+        # checks for shutdown often, so that stopping is quick
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving"""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    @property
+    def url(self):
+        """The base URL of the server"""
+        return 'http://127.0.0.1:{}'.format(self._server.server_address[1])
+
+    def session(self, pool_maxsize=10):
+        """Returns a `requests.Session` sending every HTTPS request to the
+        server, to pass to `Salesforce`
+        """
+        session = requests.Session()
+        # keep proxies configured in the environment out of the way
+        session.trust_env = False
+        session.mount('https://', _RedirectAdapter(
+            self.url, pool_connections=1, pool_maxsize=pool_maxsize))
+        return session
+
+    def add_records(self, object_name, records):
+        """Stores copies of `records` as records of `object_name`, and
+        returns their new Ids
+        """
+        with self._lock:
+            table = self.objects.setdefault(object_name, OrderedDict())
+            ids = []
+            for record in records:
+                record = OrderedDict(record)
+                record['Id'] = self._new_id(object_name)
+                table[record['Id']] = record
+                ids.append(record['Id'])
+            return ids
+
+    def fail_next(self, count=1, status=None):
+        """Fails the next `count` requests with `status`, by default the
+        `failure_status`
+        """
+        with self._lock:
+            self._failures.extend([status or self.failure_status] * count)
+
+    def expire_sessions(self):
+        """Invalidates every session, as if they had timed out"""
+        with self._lock:
+            self.sessions.clear()
+
+    def reset_stats(self):
+        """Resets the request and byte counts"""
+        with self._lock:
+            self.requests = self.bytes_in = self.bytes_out = 0
+
+    def handle(self, method, path, headers, body):
+        """Returns the `(status, content type, content)` of a request"""
+        if self.latency:
+            sleep(self.latency)
+        url = urlparse(path)
+        query = dict((name, values[0])
+                     for name, values in parse_qs(url.query).items())
+        with self._lock:
+            self.requests += 1
+            self.bytes_in += len(body)
+            status, payload = self._dispatch(method, url.path, query,
+                                             headers, body)
+
+        if isinstance(payload, bytes):
+            content_type, content = 'text/xml; charset=UTF-8', payload
+        elif payload is None:
+            content_type, content = 'application/json', b''
+        else:
+            content_type = 'application/json; charset=UTF-8'
+            content = json.dumps(payload).encode('utf-8')
+        with self._lock:
+            self.bytes_out += len(content)
+        return status, content_type, content
+
+    def _dispatch(self, method, path, query, headers, body):
+        """Routes a request to its handler"""
+        if self._failures:
+            return _error(self._failures.pop(0), 'SERVER_UNAVAILABLE',
+                          'Injected failure')
+        if self.failure_rate and self.random.random() < self.failure_rate:
+            return _error(self.failure_status, 'SERVER_UNAVAILABLE',
+                          'Injected failure')
+
+        allowed = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            allowed = allowed or route_method != method
+            if route_method != method:
+                continue
+            if handler not in (self._soap_login, self._oauth_login) and \
+                    not self._is_authorized(headers):
+                return _error(401, 'INVALID_SESSION_ID',
+                              'Session expired or invalid')
+            return handler(query=query, headers=headers, body=body,
+                           **match.groupdict())
+        if allowed:
+            return _error(405, 'METHOD_NOT_ALLOWED',
+                          'HTTP Method not allowed')
+        return _error(404, 'NOT_FOUND',
+                      'The requested resource does not exist')
+
+    def _is_authorized(self, headers):
+        """Whether the request carries a valid session"""
+        authorization = headers.get('Authorization') or ''
+        session_id = headers.get('X-SFDC-Session') or \
+            authorization.replace('Bearer ', '', 1)
+        return session_id in self.sessions
+
+    def _next(self):
+        """Returns the next value of a counter"""
+        self._counter += 1
+        return self._counter
+
+    def _new_id(self, object_name):
+        """Returns a new 18 character Id of `object_name`"""
+        if object_name not in self.key_prefixes:
+            self.key_prefixes[object_name] = 'a' + number_to_id(
+                len(self.key_prefixes))[-2:]
+        return self.key_prefixes[object_name] + \
+            number_to_id(self._next())[3:] + 'AAA'
+
+    def _new_session(self):
+        """Returns a new valid session ID"""
+        self.logins += 1
+        session_id = '{}!{}'.format(ORGANIZATION_ID[:15],
+                                    number_to_id(self._next()))
+        self.sessions.add(session_id)
+        return session_id
+
+    # pylint: disable=unused-argument
+    def _soap_login(self, version, **kwargs):
+        """Answers a SOAP login with any credentials"""
+        return 200, LOGIN_RESPONSE.format(
+            instance=self.instance, version=version, org=ORGANIZATION_ID,
+            user=USER_ID, session_id=self._new_session()).encode('utf-8')
+
+    def _oauth_login(self, **kwargs):
+        """Answers an OAuth refresh token login with any token"""
+        return 200, {'access_token': self._new_session(),
+                     'instance_url': 'https://' + self.instance,
+                     'id': 'https://login.salesforce.com/id/{}/{}'.format(
+                         ORGANIZATION_ID, USER_ID),
+                     'token_type': 'Bearer',
+                     'issued_at': str(int(time() * 1000))}
+
+    def _table(self, object_name):
+        """Returns the records of `object_name`"""
+        return self.objects.setdefault(object_name, OrderedDict())
+
+    @staticmethod
+    def _project(object_name, record, fields):
+        """Returns the `fields` of `record`, as a query returns them"""
+        projected = OrderedDict([('attributes', {
+            'type': object_name,
+            'url': '/services/data/v42.0/sobjects/{}/{}'.format(
+                object_name, record['Id'])})])
+        for field in fields:
+            projected[field] = record.get(field)
+        return projected
+
+    def _select(self, soql):
+        """Returns the object, fields and matching records of a query"""
+        match = _SELECT.match(soql)
+        if match is None:
+            return None
+        object_name = match.group('object')
+        fields = [field.strip() for field in match.group('fields').split(',')]
+        rest = match.group('rest')
+        records = list(self._table(object_name).values())
+
+        where = _WHERE.search(rest)
+        if where:
+            predicates = _parse_where(where.group('where'))
+            records = [record for record in records
+                       if all(predicate(record) for predicate in predicates)]
+        order_by = _ORDER_BY.search(rest)
+        if order_by:
+            field = order_by.group('field')
+            records.sort(key=lambda record: (record.get(field) is not None,
+                                             record.get(field)),
+                         reverse=(order_by.group('order') or '').upper() ==
+                         'DESC')
+        limit = _LIMIT.search(rest)
+        if limit:
+            records = records[:int(limit.group('limit'))]
+        return object_name, fields, records
+
+    def _query(self, query, **kwargs):
+        """Answers the first page of a query"""
+        selected = self._select(query.get('q', ''))
+        if selected is None:
+            return _error(400, 'MALFORMED_QUERY', 'unexpected token')
+        locator = '01g' + number_to_id(self._next())[3:]
+        self._cursors[locator] = selected
+        return self._page(locator, 0)
+
+    def _query_more(self, locator, **kwargs):
+        """Answers the next page of a query"""
+        locator, _, offset = locator.rpartition('-')
+        if locator not in self._cursors or not offset.isdigit():
+            return _error(400, 'INVALID_QUERY_LOCATOR',
+                          'invalid query locator')
+        return self._page(locator, int(offset))
+
+    def _page(self, locator, offset):
+        """Returns the page of a query starting at `offset`"""
+        object_name, fields, records = self._cursors[locator]
+        end = offset + self.page_size
+        page = {'totalSize': len(records), 'done': end >= len(records),
+                'records': [self._project(object_name, record, fields)
+                            for record in records[offset:end]]}
+        if page['done']:
+            del self._cursors[locator]
+        else:
+            page['nextRecordsUrl'] = '/services/data/v42.0/query/{}-{}'.format(
+                locator, end)
+        return 200, page
+
+    def _fields(self, object_name):
+        """Returns the names of the fields of `object_name`"""
+        fields = OrderedDict([('Id', None)])
+        for record in self._table(object_name).values():
+            fields.update((field, None) for field in record)
+            break
+        return list(fields)
+
+    def _metadata(self, object, **kwargs):
+        """Answers the metadata of an object"""
+        # pylint: disable=redefined-builtin
+        return 200, {'objectDescribe': {'name': object},
+                     'recentItems': []}
+
+    def _describe(self, object, **kwargs):
+        """Answers the describe of an object"""
+        # pylint: disable=redefined-builtin
+        fields = []
+        for name in self._fields(object):
+            if name == 'Id':
+                field_type = 'id'
+            elif name.endswith('Date') or name == 'SystemModstamp':
+                field_type = 'datetime'
+            else:
+                field_type = 'string'
+            fields.append({'name': name, 'type': field_type})
+        return 200, {'name': object, 'fields': fields}
+
+    def _create(self, object, body, **kwargs):
+        """Creates a record"""
+        # pylint: disable=redefined-builtin
+        record_id = self.add_records(object, [json.loads(body)])[0]
+        return 201, {'id': record_id, 'success': True, 'errors': []}
+
+    def _find(self, object_name, record_id):
+        """Returns the record with the 15 or 18 character `record_id`"""
+        table = self._table(object_name)
+        if len(record_id) == 15:
+            record_id += 'AAA'
+        return table.get(record_id)
+
+    def _get(self, object, id, **kwargs):
+        """Answers a record"""
+        # pylint: disable=redefined-builtin,invalid-name
+        record = self._find(object, id)
+        if record is None:
+            return _error(404, 'NOT_FOUND',
+                          'The requested resource does not exist')
+        return 200, self._project(object, record, list(record))
+
+    def _update(self, object, id, body, **kwargs):
+        """Updates a record"""
+        # pylint: disable=redefined-builtin,invalid-name
+        record = self._find(object, id)
+        if record is None:
+            return _error(404, 'NOT_FOUND',
+                          'The requested resource does not exist')
+        record.update(json.loads(body))
+        return 204, None
+
+    def _delete(self, object, id, **kwargs):
+        """Deletes a record"""
+        # pylint: disable=redefined-builtin,invalid-name
+        record = self._find(object, id)
+        if record is None:
+            return _error(404, 'ENTITY_IS_DELETED', 'entity is deleted')
+        del self._table(object)[record['Id']]
+        return 204, None
+
+    def _upsert(self, object, field, value, body, **kwargs):
+        """Creates or updates the record with an external Id"""
+        # pylint: disable=redefined-builtin
+        data = json.loads(body)
+        for record in self._table(object).values():
+            if record.get(field) == value:
+                record.update(data)
+                return 204, None
+        data[field] = value
+        record_id = self.add_records(object, [data])[0]
+        return 201, {'id': record_id, 'success': True, 'errors': []}
+
+    def _retrieve(self, object, body, **kwargs):
+        """Answers an sObject Collections retrieval"""
+        # pylint: disable=redefined-builtin
+        request = json.loads(body)
+        records = []
+        for record_id in request['ids']:
+            record = self._find(object, record_id)
+            records.append(None if record is None else self._project(
+                object, record, request['fields']))
+        return 200, records
+
+    def _job(self, job):
+        """Returns a bulk job, updating the state of its batches"""
+        job = self._jobs.get(job)
+        if job is not None:
+            for batch in job.batches.values():
+                self._progress(job, batch)
+        return job
+
+    def _create_job(self, body, headers, **kwargs):
+        """Creates a bulk job"""
+        info = json.loads(body)
+        job_id = '750' + number_to_id(self._next())[3:]
+        info.update({'id': job_id, 'state': 'Open'})
+        pk_chunking = headers.get('Sforce-Enable-PKChunking')
+        chunk_size = DEFAULT_CHUNK_SIZE
+        if pk_chunking:
+            match = re.search(r'chunkSize=(\d+)', pk_chunking)
+            chunk_size = int(match.group(1)) if match else chunk_size
+        self._jobs[job_id] = _Job(job_id, info,
+                                  chunk_size if pk_chunking else None)
+        return 201, info
+
+    def _get_job(self, job, **kwargs):
+        """Answers the state and batch counters of a bulk job"""
+        job = self._job(job)
+        if job is None:
+            return _error(400, 'InvalidJob', 'Invalid job id')
+        states = [batch.state for batch in job.batches.values()]
+        info = dict(job.info)
+        info.update({
+            'numberBatchesTotal': len(states),
+            'numberBatchesQueued': states.count('Queued'),
+            'numberBatchesInProgress': states.count('InProgress'),
+            'numberBatchesCompleted': states.count('Completed'),
+            'numberBatchesFailed': states.count('Failed')})
+        return 200, info
+
+    def _update_job(self, job, body, **kwargs):
+        """Closes or aborts a bulk job"""
+        job = self._jobs.get(job)
+        if job is None:
+            return _error(400, 'InvalidJob', 'Invalid job id')
+        job.info['state'] = json.loads(body)['state']
+        return 200, job.info
+
+    def _list_batches(self, job, **kwargs):
+        """Answers the batches of a bulk job"""
+        job = self._job(job)
+        if job is None:
+            return _error(400, 'InvalidJob', 'Invalid job id')
+        return 200, {'batchInfo': [batch.info()
+                                   for batch in job.batches.values()]}
+
+    def _add_batch(self, job, body, **kwargs):
+        """Adds a batch to a bulk job"""
+        job = self._jobs.get(job)
+        if job is None or job.info['state'] != 'Open':
+            return _error(400, 'InvalidJob', 'Job is not open')
+        data = body.decode('utf-8')
+        if job.info['operation'] != 'query':
+            data = json.loads(data)
+        batch = self._new_batch(job, data)
+        if job.pk_chunking and job.info['operation'] == 'query':
+            self._chunk(job, batch)
+        return 201, batch.info()
+
+    def _new_batch(self, job, data):
+        """Adds a queued batch to `job`"""
+        batch = _Batch('751' + number_to_id(self._next())[3:], job.id, data,
+                       ready_at=time() + self.batch_time)
+        job.batches[batch.id] = batch
+        return batch
+
+    def _chunk(self, job, batch):
+        """Splits a query batch into one batch per range of `chunk_size`
+        Ids, as PK chunking does
+        """
+        selected = self._select(batch.data)
+        if selected is None:
+            return
+        object_name, fields, records = selected
+        records.sort(key=lambda record: record['Id'])
+        for start in range(0, len(records), job.pk_chunking):
+            self._new_batch(job, (object_name, fields,
+                                  records[start:start + job.pk_chunking]))
+        batch.state = 'Not Processed'
+
+    def _progress(self, job, batch):
+        """Moves a batch to its next state once its time has come, and
+        processes it"""
+        if batch.state in FINAL_BATCH_STATES:
+            return
+        if time() < batch.ready_at:
+            batch.state = 'InProgress' if time() >= (
+                batch.ready_at - self.batch_time / 2.0) else 'Queued'
+            return
+        operation = job.info['operation']
+        if operation == 'query':
+            selected = batch.data if isinstance(batch.data, tuple) \
+                else self._select(batch.data)
+            if selected is None:
+                batch.state = 'Failed'
+                batch.state_message = 'MALFORMED_QUERY: unexpected token'
+                return
+            object_name, fields, records = selected
+            batch.results = [self._project(object_name, record, fields)
+                             for record in records]
+        else:
+            batch.results = [self._process(job, record)
+                             for record in batch.data]
+        batch.state = 'Completed'
+
+    def _process(self, job, data):
+        """Applies a DML operation to one record, returning its result"""
+        object_name = job.info['object']
+        operation = job.info['operation']
+        record = None
+        if operation == 'upsert':
+            field = job.info['externalIdFieldName']
+            record = next((existing for existing in
+                           self._table(object_name).values()
+                           if existing.get(field) == data.get(field)), None)
+        elif operation != 'insert':
+            record = self._find(object_name, data.get('Id') or '')
+            if record is None:
+                return {'success': False, 'created': False, 'id': None,
+                        'errors': [{'statusCode': 'ENTITY_IS_DELETED',
+                                    'message': 'entity is deleted',
+                                    'fields': []}]}
+
+        if operation in ('delete', 'hardDelete'):
+            del self._table(object_name)[record['Id']]
+        elif record is not None:
+            record.update(data)
+        else:
+            record = self._find(object_name,
+                                self.add_records(object_name, [data])[0])
+        return {'success': True, 'created': operation in ('insert', 'upsert')
+                and 'Id' not in data, 'id': record['Id'], 'errors': []}
+
+    def _get_batch(self, job, batch, **kwargs):
+        """Answers the state of a batch"""
+        job = self._job(job)
+        if job is None or batch not in job.batches:
+            return _error(400, 'InvalidBatch', 'Invalid batch id')
+        return 200, job.batches[batch].info()
+
+    def _get_results(self, job, batch, **kwargs):
+        """Answers the results of a batch, or the result ids of a query
+        batch"""
+        job = self._job(job)
+        if job is None or batch not in job.batches or \
+                job.batches[batch].state != 'Completed':
+            return _error(400, 'InvalidBatch', 'Batch not completed')
+        results = job.batches[batch].results
+        if job.info['operation'] != 'query':
+            return 200, results
+        return 200, ['752{}'.format(start // self.result_size)
+                     for start in range(0, max(len(results), 1),
+                                        self.result_size)]
+
+    def _get_result(self, job, batch, result, **kwargs):
+        """Answers a result file of a query batch"""
+        job = self._job(job)
+        if job is None or batch not in job.batches or \
+                job.batches[batch].state != 'Completed':
+            return _error(400, 'InvalidBatch', 'Batch not completed')
+        start = int(result[3:]) * self.result_size
+        return 200, job.batches[batch].results[start:start + self.result_size]
@@ -0,0 +1,12 @@
+"""Tests for aio.py
+
+The test cases, like aio.py with its async generators, need Python 3.6+,
+so they are defined in aio_cases.py, which test runners don't collect, and
+only imported here on Python 3.6+.
+"""
+
+import sys
+
+if sys.version_info >= (3, 6):
+    # pylint: disable=unused-import
+    from simple_salesforce.tests.aio_cases import TestAsyncSalesforce
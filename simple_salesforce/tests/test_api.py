@@ -1,5 +1,6 @@
 """Tests for api.py"""
 
+import json
 import re
 from datetime import datetime
 try:
@@ -14,10 +15,12 @@ try:
     # Python 2.6/2.7
     import httplib as http
     from mock import Mock, patch
+    from urlparse import urlparse, parse_qs
 except ImportError:
     # Python 3
     import http.client as http
     from unittest.mock import Mock, patch
+    from urllib.parse import urlparse, parse_qs
 
 import requests
 
@@ -461,6 +464,26 @@ class TestSFType(unittest.TestCase):
         self.assertEqual(result, {})
 
 
+    @responses.activate
+    def test_session_id_and_base_url_assignment(self):
+        """Ensure an assigned session ID and endpoint are used"""
+        responses.add(
+            responses.GET,
+            re.compile(r'^https://proxy.example.com/Case/.*$'),
+            body='{}',
+            status=http.OK
+        )
+
+        sf_type = _create_sf_type()
+        sf_type.session_id = 'assigned'
+        sf_type.base_url = 'https://proxy.example.com/Case/'
+        sf_type.get('500')
+
+        request = responses.calls[0].request
+        self.assertEqual(request.url, 'https://proxy.example.com/Case/500')
+        self.assertEqual(request.headers['Authorization'], 'Bearer assigned')
+
+
 class TestSalesforce(unittest.TestCase):
     """Tests for the Salesforce instance"""
     def setUp(self):
@@ -519,6 +542,232 @@ class TestSalesforce(unittest.TestCase):
         self.assertEqual(
             client.base_url.split('/')[-2], 'v%s' % expected_version)
 
+    @responses.activate
+    def test_query_all_follows_next_records_url(self):
+        """Ensure query_all merges every page into one result"""
+        responses.add(
+            responses.GET,
+            re.compile(r'^https://.*/query/\?q=SELECT.*$'),
+            body='{"records": [{"ID": "1"}], "done": false, '
+                 '"nextRecordsUrl": "/services/data/v29.0/query/next-1", '
+                 '"totalSize": 2}',
+            status=http.OK
+        )
+        responses.add(
+            responses.GET,
+            re.compile(r'^https://.*/query/next-1$'),
+            body='{"records": [{"ID": "2"}], "done": true, "totalSize": 2}',
+            status=http.OK
+        )
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        result = client.query_all('SELECT ID FROM Account')
+
+        self.assertEqual(result['records'], [{'ID': '1'}, {'ID': '2'}])
+        self.assertEqual(result['totalSize'], 2)
+        self.assertTrue(result['done'])
+
+    @responses.activate
+    def test_query_iter_is_lazy(self):
+        """Ensure query_iter only requests the next page when needed"""
+        responses.add(
+            responses.GET,
+            re.compile(r'^https://.*/query/\?q=SELECT.*$'),
+            body='{"records": [{"ID": "1"}, {"ID": "2"}], "done": false, '
+                 '"nextRecordsUrl": "/services/data/v29.0/query/next-1", '
+                 '"totalSize": 3}',
+            status=http.OK
+        )
+        responses.add(
+            responses.GET,
+            re.compile(r'^https://.*/query/next-1$'),
+            body='{"records": [{"ID": "3"}], "done": true, "totalSize": 3}',
+            status=http.OK
+        )
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        records = client.query_iter('SELECT ID FROM Account')
+        self.assertEqual(len(responses.calls), 0)
+        self.assertEqual(next(records), {'ID': '1'})
+        self.assertEqual(next(records), {'ID': '2'})
+        self.assertEqual(len(responses.calls), 1)
+        self.assertEqual(list(records), [{'ID': '3'}])
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_query_all_with_prefetch(self):
+        """Ensure query_all with prefetch keeps the same result shape"""
+        for page in range(3):
+            responses.add(
+                responses.GET,
+                re.compile(r'^https://.*/query/next-%d$' % page),
+                body='{"records": [{"ID": "%d"}], "done": false, '
+                     '"nextRecordsUrl": "/services/data/v29.0/query/next-%d",'
+                     ' "totalSize": 5}' % (page + 2, page + 1),
+                status=http.OK
+            )
+        responses.add(
+            responses.GET,
+            re.compile(r'^https://.*/query/\?q=SELECT.*$'),
+            body='{"records": [{"ID": "1"}], "done": false, '
+                 '"nextRecordsUrl": "/services/data/v29.0/query/next-0", '
+                 '"totalSize": 5}',
+            status=http.OK
+        )
+        responses.add(
+            responses.GET,
+            re.compile(r'^https://.*/query/next-3$'),
+            body='{"records": [{"ID": "5"}], "done": true, "totalSize": 5}',
+            status=http.OK
+        )
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        result = client.query_all('SELECT ID FROM Account', prefetch=2)
+
+        self.assertEqual([record['ID'] for record in result['records']],
+                         ['1', '2', '3', '4', '5'])
+        self.assertEqual(result['totalSize'], 5)
+        self.assertTrue(result['done'])
+
+    @responses.activate
+    def test_query_all_parallel(self):
+        """Ensure query_all_parallel splits the query into Id ranges read
+        concurrently
+        """
+        def query(request):
+            """Answers the bound queries and one page per partition"""
+            soql = parse_qs(urlparse(request.url).query)['q'][0]
+            if soql.endswith('DESC LIMIT 1'):
+                records = [{'Id': '001000000000100AAA'}]
+            elif soql.endswith('LIMIT 1'):
+                records = [{'Id': '001000000000000AAA'}]
+            else:
+                records = [{'Id': soql}]
+            return (200, {}, json.dumps({'records': records, 'done': True,
+                                         'totalSize': len(records)}))
+        responses.add_callback(
+            responses.GET, re.compile(r'^https://.*/query/\?q=SELECT.*$'),
+            callback=query)
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        records = client.query_all_parallel(
+            "SELECT Id FROM Account WHERE Type = 'Customer'", partitions=3)
+
+        self.assertEqual(sorted(record['Id'] for record in records), [
+            "SELECT Id FROM Account WHERE (Type = 'Customer') AND "
+            "(Id >= '0010000000000Kf' AND Id < '0010000000000fK')",
+            "SELECT Id FROM Account WHERE (Type = 'Customer') AND "
+            "Id < '0010000000000Kf'",
+            "SELECT Id FROM Account WHERE (Type = 'Customer') AND "
+            "Id >= '0010000000000fK'"])
+        self.assertEqual(len(responses.calls), 5)
+
+    @responses.activate
+    def test_query_all_parallel_nullable_field(self):
+        """Ensure query_all_parallel bounds a date time field on its
+        non-null values and reads the records where it is null too
+        """
+        def query(request):
+            """Answers the bound queries and one page per partition"""
+            soql = parse_qs(urlparse(request.url).query)['q'][0]
+            if soql.endswith('LIMIT 1'):
+                self.assertIn('WHERE ActivityDate__c != null', soql)
+                date = '2026-01-0{}T00:00:00.000+0000'.format(
+                    3 if 'DESC' in soql else 1)
+                records = [{'ActivityDate__c': date}]
+            else:
+                records = [{'Id': soql}]
+            return (200, {}, json.dumps({'records': records, 'done': True,
+                                         'totalSize': len(records)}))
+        responses.add_callback(
+            responses.GET, re.compile(r'^https://.*/query/\?q=SELECT.*$'),
+            callback=query)
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        records = client.query_all_parallel(
+            'SELECT Id FROM Account', partitions=2, field='ActivityDate__c')
+
+        self.assertEqual(sorted(record['Id'] for record in records), [
+            'SELECT Id FROM Account WHERE ActivityDate__c < '
+            '2026-01-02T00:00:00Z',
+            'SELECT Id FROM Account WHERE ActivityDate__c = null',
+            'SELECT Id FROM Account WHERE ActivityDate__c >= '
+            '2026-01-02T00:00:00Z'])
+
+    @responses.activate
+    def test_headers_set_on_client_are_sent(self):
+        """Ensure headers added to or assigned as `headers` are sent"""
+        responses.add(
+            responses.GET,
+            re.compile(r'^https://.*/search/.*$'),
+            body='{}',
+            status=http.OK
+        )
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        client.headers['Sforce-Call-Options'] = 'client=first'
+        client.search('FIND {Waldo}')
+        client.headers = {'Sforce-Call-Options': 'client=second'}
+        client.search('FIND {Waldo}')
+
+        first, second = [call.request.headers for call in responses.calls]
+        self.assertEqual(first['Sforce-Call-Options'], 'client=first')
+        self.assertEqual(first['Content-Type'], 'application/json')
+        self.assertEqual(second['Sforce-Call-Options'], 'client=second')
+        self.assertEqual(second['Authorization'], 'Bearer ' + tests.SESSION_ID)
+
+    @responses.activate
+    def test_session_id_assignment(self):
+        """Ensure an assigned session ID is used by every handle"""
+        responses.add(
+            responses.GET,
+            re.compile(r'^https://.*$'),
+            body='{}',
+            status=http.OK
+        )
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+        contact = client.Contact
+
+        client.session_id = 'assigned'
+        contact.get('003')
+        client.sf_instance = 'na2.salesforce.com'
+        client.search('FIND {Waldo}')
+
+        self.assertEqual(contact.session_id, 'assigned')
+        self.assertEqual(
+            responses.calls[0].request.headers['Authorization'],
+            'Bearer assigned')
+        self.assertTrue(responses.calls[1].request.url.startswith(
+            'https://na2.salesforce.com/services/data/v29.0/search/'))
+
+    def test_url_assignment(self):
+        """Ensure assigned endpoints replace the derived ones"""
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL)
+
+        client.base_url = 'https://proxy.example.com/data/'
+        client.apex_url = 'https://proxy.example.com/apex/'
+        client.bulk_url = 'https://proxy.example.com/async/'
+
+        self.assertEqual(client.base_url, 'https://proxy.example.com/data/')
+        self.assertEqual(client.apex_url, 'https://proxy.example.com/apex/')
+        self.assertEqual(client.bulk.bulk_url,
+                         'https://proxy.example.com/async/')
+
     def test_shared_session_to_sftype(self):
         """Test Salesforce and SFType instances share default `Session`"""
         client = Salesforce(session_id=tests.SESSION_ID,
@@ -0,0 +1,443 @@
+"""Tests for bulk.py"""
+
+import itertools
+import json
+import os
+import re
+import shutil
+import tempfile
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    import httplib as http
+except ImportError:
+    # Python 3
+    import http.client as http
+
+from simple_salesforce import tests
+from simple_salesforce.bulk import (
+    BulkResultParser,
+    PollingStrategy,
+    SalesforceBulkBatchFailed,
+    SalesforceBulkTimeout,
+    SFBulkHandler,
+    SalesforceMalformedRequest,
+    iter_batch_results,
+    load_batch_results,
+    _split_batches
+)
+
+BULK_URL = 'https://na15.salesforce.com/services/async/29.0/'
+
+
+def _bulk_type(object_name='Contact'):
+    """Creates an SFBulkType through the bulk handler"""
+    handler = SFBulkHandler(tests.SESSION_ID, BULK_URL,
+                            session=requests.Session())
+    return getattr(handler, object_name)
+
+
+class TestSplitBatches(unittest.TestCase):
+    """Test splitting records into batch payloads"""
+    def test_split_by_record_count(self):
+        """Test batches respect the maximum number of records"""
+        payloads = _split_batches([{'Id': i} for i in range(5)], 2, 10000)
+        self.assertEqual([len(json.loads(p)) for p in payloads], [2, 2, 1])
+
+    def test_split_by_size(self):
+        """Test batches respect the maximum serialized size"""
+        records = [{'Name': 'x' * 20} for _ in range(4)]
+        payloads = _split_batches(records, 100, 70)
+        for payload in payloads:
+            self.assertLessEqual(len(payload), 70)
+        self.assertEqual(sum(len(json.loads(p)) for p in payloads), 4)
+
+    def test_oversized_record_gets_own_batch(self):
+        """Test a record larger than the size limit is still sent"""
+        payloads = _split_batches([{'Name': 'x' * 100}], 100, 10)
+        self.assertEqual(len(payloads), 1)
+
+    def test_empty_data(self):
+        """Test empty data produces one empty batch"""
+        self.assertEqual(_split_batches([], 10, 100), ['[]'])
+
+
+class TestBulkResultParser(unittest.TestCase):
+    """Test decoding of bulk result payloads"""
+    MALFORMED = ('[{"id": "1", "errors": []}\n{"id": "2", "errors": []},'
+                 ' {"id": "3" "errors": ["a" "b"]}]')
+    EXPECTED = [{'id': '1', 'errors': []}, {'id': '2', 'errors': []},
+                {'id': '3', 'errors': ['a', 'b']}]
+
+    def test_valid_payload(self):
+        """Test well formed payloads decode unchanged"""
+        self.assertEqual(load_batch_results('[{"id": "1"}, {"id": "2"}]'),
+                         [{'id': '1'}, {'id': '2'}])
+
+    def test_missing_delimiters(self):
+        """Test missing commas between and within rows are repaired"""
+        self.assertEqual(load_batch_results(self.MALFORMED), self.EXPECTED)
+
+    def test_incremental_chunks(self):
+        """Test rows are produced from arbitrarily split chunks"""
+        for size in (1, 2, 5, 16):
+            chunks = [self.MALFORMED[i:i + size]
+                      for i in range(0, len(self.MALFORMED), size)]
+            self.assertEqual(list(iter_batch_results(chunks)), self.EXPECTED)
+
+    def test_rows_yielded_as_completed(self):
+        """Test a row is returned as soon as it has been fed"""
+        parser = BulkResultParser()
+        self.assertEqual(parser.feed('[{"id": "1"}, {"id"'), [{'id': '1'}])
+        self.assertEqual(parser.feed(': "2"}]'), [{'id': '2'}])
+        self.assertEqual(parser.close(), [])
+
+    def test_truncated_payload(self):
+        """Test an incomplete payload raises instead of looping"""
+        parser = BulkResultParser()
+        parser.feed('[{"id": "1"}, {"id": ')
+        with self.assertRaises(ValueError):
+            parser.close()
+
+
+class TestPollingStrategy(unittest.TestCase):
+    """Test the bulk polling schedule"""
+    def test_backoff_is_bounded(self):
+        """Test delays grow exponentially but stay within the bounds"""
+        strategy = PollingStrategy(min_interval=1, max_interval=10, factor=2,
+                                   jitter=0.5)
+        delays = strategy.delays()
+        for _ in range(20):
+            delay = next(delays)
+            self.assertGreaterEqual(delay, 1)
+            self.assertLessEqual(delay, 10)
+
+    def test_backoff_without_jitter(self):
+        """Test the exact schedule when jitter is disabled"""
+        strategy = PollingStrategy(min_interval=1, max_interval=5, factor=2,
+                                   jitter=0)
+        delays = strategy.delays()
+        self.assertEqual([next(delays) for _ in range(5)], [1, 2, 4, 5, 5])
+
+    def test_fixed(self):
+        """Test the fixed strategy mirrors the legacy wait argument"""
+        delays = PollingStrategy.fixed(5).delays()
+        self.assertEqual([next(delays) for _ in range(3)], [5, 5, 5])
+
+
+class TestSFBulkType(unittest.TestCase):
+    """Tests for the SFBulkType instance"""
+    def _add_job_responses(self, poll_states=('Completed',),
+                           job_status=None):
+        """Registers a job whose batches echo back their record count"""
+        batches = {}
+        polls = {}
+        batch_ids = itertools.count()
+
+        def add_batch(request):
+            """Creates a batch remembering its records"""
+            batch_id = 'batch%d' % next(batch_ids)
+            batches[batch_id] = json.loads(request.body)
+            return (201, {}, json.dumps({'id': batch_id, 'jobId': 'job'}))
+
+        def get_batch(request):
+            """Reports the next configured state for the batch"""
+            batch_id = request.url.rsplit('/', 1)[1]
+            count = polls.get(batch_id, 0)
+            polls[batch_id] = count + 1
+            state = poll_states[min(count, len(poll_states) - 1)]
+            return (200, {}, json.dumps({'id': batch_id, 'state': state}))
+
+        def get_results(request):
+            """Returns one result per record sent in the batch"""
+            batch_id = request.url.rsplit('/', 2)[1]
+            return (200, {}, json.dumps(
+                [{'success': True, 'id': record['Name']}
+                 for record in batches[batch_id]]))
+
+        responses.add(responses.POST, BULK_URL + 'job',
+                      body='{"id": "job"}', status=http.CREATED)
+        responses.add(responses.POST, BULK_URL + 'job/job',
+                      body='{"id": "job", "state": "Closed"}',
+                      status=http.OK)
+        responses.add(responses.GET, BULK_URL + 'job/job',
+                      body=json.dumps(job_status or {}), status=http.OK)
+        responses.add_callback(responses.POST, BULK_URL + 'job/job/batch',
+                               callback=add_batch)
+        responses.add_callback(
+            responses.GET, re.compile(r'^.*/job/job/batch/batch\d+$'),
+            callback=get_batch)
+        responses.add_callback(
+            responses.GET, re.compile(r'^.*/job/job/batch/batch\d+/result$'),
+            callback=get_results)
+        return batches, polls
+
+    @responses.activate
+    def test_single_batch(self):
+        """Test small inserts keep using a single batch"""
+        batches, _ = self._add_job_responses()
+
+        results = _bulk_type().insert([{'Name': 'a'}, {'Name': 'b'}])
+
+        self.assertEqual(len(batches), 1)
+        self.assertEqual([r['id'] for r in results], ['a', 'b'])
+
+    @responses.activate
+    def test_multiple_batches_keep_input_order(self):
+        """Test records are chunked and results merged in input order"""
+        batches, _ = self._add_job_responses()
+        data = [{'Name': str(i)} for i in range(7)]
+
+        results = _bulk_type().insert(data, batch_size=3)
+
+        self.assertEqual(len(batches), 3)
+        self.assertEqual([r['id'] for r in results],
+                         [str(i) for i in range(7)])
+
+    @responses.activate
+    def test_polls_until_all_batches_finish(self):
+        """Test every batch is polled until it reaches a final state"""
+        _, polls = self._add_job_responses(
+            poll_states=('Queued', 'InProgress', 'Completed'))
+
+        results = _bulk_type()._bulk_operation(
+            object_name='Contact', operation='update',
+            data=[{'Name': 'a'}, {'Name': 'b'}], wait=0, batch_size=1)
+
+        self.assertEqual(polls, {'batch0': 3, 'batch1': 3})
+        self.assertEqual(len(results), 2)
+
+    @responses.activate
+    def test_polls_job_status_for_many_batches(self):
+        """Test job-level counters replace per-batch polls for big jobs, the
+        batches being requested once when the job is done
+        """
+        _, polls = self._add_job_responses(job_status={
+            'numberBatchesTotal': 4, 'numberBatchesQueued': 0,
+            'numberBatchesInProgress': 0, 'numberBatchesCompleted': 4})
+
+        results = _bulk_type().insert(
+            [{'Name': str(i)} for i in range(4)], batch_size=1,
+            polling=PollingStrategy(job_status_threshold=2))
+
+        self.assertEqual(polls, {'batch0': 1, 'batch1': 1, 'batch2': 1,
+                                 'batch3': 1})
+        self.assertEqual(len(results), 4)
+
+    @responses.activate
+    def test_failed_upload_aborts_the_job(self):
+        """Test the job is aborted, not left open, when a batch is refused"""
+        responses.add(responses.POST, BULK_URL + 'job',
+                      body='{"id": "job"}', status=http.CREATED)
+        responses.add(responses.POST, BULK_URL + 'job/job/batch',
+                      body='{"exceptionCode": "InvalidBatch"}',
+                      status=http.BAD_REQUEST)
+        responses.add(responses.POST, BULK_URL + 'job/job',
+                      body='{"id": "job", "state": "Aborted"}',
+                      status=http.OK)
+
+        with self.assertRaises(SalesforceMalformedRequest):
+            _bulk_type().insert([{'Name': 'a'}])
+        self.assertEqual(json.loads(responses.calls[-1].request.body),
+                         {'state': 'Aborted'})
+
+    @responses.activate
+    def test_polling_timeout(self):
+        """Test waiting gives up once the polling timeout has elapsed"""
+        self._add_job_responses(poll_states=('InProgress',))
+
+        with self.assertRaises(SalesforceBulkTimeout) as cm:
+            _bulk_type().insert([{'Name': 'a'}], polling=PollingStrategy(
+                min_interval=0.01, max_interval=0.01, timeout=0.05))
+        self.assertEqual(cm.exception.content, ['batch0'])
+
+
+class TestSFBulkTypeQuery(unittest.TestCase):
+    """Tests for bulk queries"""
+    def setUp(self):
+        responses.start()
+        self.addCleanup(responses.reset)
+        self.addCleanup(responses.stop)
+        responses.add(responses.POST, BULK_URL + 'job',
+                      body='{"id": "job"}', status=http.CREATED)
+        responses.add(responses.POST, BULK_URL + 'job/job/batch',
+                      body='{"id": "batch", "jobId": "job"}',
+                      status=http.CREATED)
+        responses.add(responses.POST, BULK_URL + 'job/job',
+                      body='{"id": "job", "state": "Closed"}',
+                      status=http.OK)
+        responses.add(responses.GET, BULK_URL + 'job/job/batch/batch',
+                      body='{"id": "batch", "state": "Completed"}',
+                      status=http.OK)
+        responses.add(responses.GET, BULK_URL + 'job/job/batch/batch/result',
+                      body='["r1", "r2"]', status=http.OK)
+        responses.add(responses.GET,
+                      BULK_URL + 'job/job/batch/batch/result/r1',
+                      body=u'[{"Name": "\u00e9a"}, {"Name": "b"}]'.encode(
+                          'utf-8'),
+                      status=http.OK)
+        responses.add(responses.GET,
+                      BULK_URL + 'job/job/batch/batch/result/r2',
+                      body='[{"Name": "c"}]', status=http.OK)
+
+    def test_query_returns_every_result_chunk(self):
+        """Test records from all result ids are returned"""
+        records = _bulk_type().query('SELECT Name FROM Contact')
+        self.assertEqual([r['Name'] for r in records], [u'\u00e9a', 'b', 'c'])
+
+    def test_query_iter(self):
+        """Test records are yielded chunk by chunk"""
+        records = _bulk_type().query_iter('SELECT Name FROM Contact')
+        self.assertEqual(next(records), {'Name': u'\u00e9a'})
+        self.assertFalse(any(call.request.url.endswith('/r2')
+                             for call in responses.calls))
+        self.assertEqual([r['Name'] for r in records], ['b', 'c'])
+
+    def test_download(self):
+        """Test raw result chunks are written to files"""
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        file_paths = _bulk_type().download('SELECT Name FROM Contact', path)
+
+        self.assertEqual(file_paths, [os.path.join(path, 'batch_r1.json'),
+                                      os.path.join(path, 'batch_r2.json')])
+        with open(file_paths[1], 'rb') as result_file:
+            self.assertEqual(result_file.read(), b'[{"Name": "c"}]')
+
+
+class TestSFBulkTypePKChunking(unittest.TestCase):
+    """Tests for PK chunked bulk queries"""
+    def setUp(self):
+        responses.start()
+        self.addCleanup(responses.reset)
+        self.addCleanup(responses.stop)
+        # the batch list reported by successive polls
+        self.batch_lists = [
+            [('query', 'Queued')],
+            [('query', 'Not Processed'), ('chunk1', 'Completed'),
+             ('chunk2', 'InProgress')],
+            [('query', 'Not Processed'), ('chunk1', 'Completed'),
+             ('chunk2', 'Completed')]]
+        responses.add(responses.POST, BULK_URL + 'job',
+                      body='{"id": "job"}', status=http.CREATED)
+        responses.add(responses.POST, BULK_URL + 'job/job/batch',
+                      body='{"id": "query", "jobId": "job"}',
+                      status=http.CREATED)
+        responses.add(responses.POST, BULK_URL + 'job/job',
+                      body='{"id": "job", "state": "Closed"}',
+                      status=http.OK)
+        responses.add_callback(responses.GET, BULK_URL + 'job/job/batch',
+                               callback=self._list_batches)
+        for batch_id in ('chunk1', 'chunk2'):
+            batch_url = BULK_URL + 'job/job/batch/' + batch_id
+            responses.add(responses.GET, batch_url + '/result',
+                          body='["r"]', status=http.OK)
+            responses.add(responses.GET, batch_url + '/result/r',
+                          body=json.dumps([{'Name': batch_id}]),
+                          status=http.OK)
+
+    def _list_batches(self, _):
+        """Returns the next batch list"""
+        batches = self.batch_lists[0]
+        if len(self.batch_lists) > 1:
+            self.batch_lists.pop(0)
+        return (200, {}, json.dumps({'batchInfo': [
+            {'id': batch_id, 'jobId': 'job', 'state': state,
+             'stateMessage': 'failed'} for batch_id, state in batches]}))
+
+    def test_query_chunked(self):
+        """Test the records of every chunk batch are yielded"""
+        records = _bulk_type('AccountShare').query_chunked(
+            'SELECT Id FROM AccountShare', chunk_size=2, parent='Account',
+            polling=PollingStrategy.fixed(0))
+
+        self.assertEqual(sorted(record['Name'] for record in records),
+                         ['chunk1', 'chunk2'])
+        self.assertEqual(
+            responses.calls[0].request.headers['Sforce-Enable-PKChunking'],
+            'chunkSize=2; parent=Account')
+        # each completed batch is only downloaded once
+        self.assertEqual(len([call for call in responses.calls
+                              if call.request.url.endswith('/result')]), 2)
+
+    def test_download_chunked(self):
+        """Test the results of every chunk batch are written to files"""
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        file_paths = _bulk_type().download_chunked(
+            'SELECT Id FROM Contact', path, polling=PollingStrategy.fixed(0))
+
+        self.assertEqual(sorted(file_paths),
+                         [os.path.join(path, 'chunk1_r.json'),
+                          os.path.join(path, 'chunk2_r.json')])
+        self.assertEqual(
+            responses.calls[0].request.headers['Sforce-Enable-PKChunking'],
+            'TRUE')
+
+    def test_failed_batch(self):
+        """Test a failed batch raises an exception"""
+        self.batch_lists = [[('query', 'Not Processed'),
+                             ('chunk1', 'Failed')]]
+
+        with self.assertRaises(SalesforceBulkBatchFailed) as cm:
+            list(_bulk_type().query_chunked(
+                'SELECT Id FROM Contact', polling=PollingStrategy.fixed(0)))
+        self.assertEqual(cm.exception.content, 'failed')
+
+
+
+class TestBackwardsCompatibleImports(unittest.TestCase):
+    """Test the names that moved to util are still importable from bulk"""
+    def test_moved_names(self):
+        """Test the exceptions and helpers are the ones of util"""
+        # pylint: disable=import-outside-toplevel
+        from simple_salesforce import util
+        from simple_salesforce.bulk import (
+            SalesforceMoreThanOneRecord,
+            SalesforceMalformedRequest,
+            SalesforceExpiredSession,
+            SalesforceRefusedRequest,
+            SalesforceResourceNotFound,
+            SalesforceGeneralError,
+            _call_salesforce,
+            _exception_handler
+        )
+
+        self.assertIs(SalesforceMoreThanOneRecord,
+                      util.SalesforceMoreThanOneRecord)
+        self.assertIs(SalesforceMalformedRequest,
+                      util.SalesforceMalformedRequest)
+        self.assertIs(SalesforceExpiredSession,
+                      util.SalesforceExpiredSession)
+        self.assertIs(SalesforceRefusedRequest,
+                      util.SalesforceRefusedRequest)
+        self.assertIs(SalesforceResourceNotFound,
+                      util.SalesforceResourceNotFound)
+        self.assertIs(SalesforceGeneralError, util.SalesforceGeneralError)
+        self.assertIs(_exception_handler, util.exception_handler)
+        self.assertTrue(callable(_call_salesforce))
+
+    @responses.activate
+    def test_call_salesforce_keeps_headers(self):
+        """Test the legacy call helper doesn't alter the caller's headers"""
+        # pylint: disable=import-outside-toplevel
+        from simple_salesforce.bulk import _call_salesforce
+        responses.add(responses.GET, BULK_URL + 'job/750', body='{}',
+                      status=http.OK)
+        headers = {'X-SFDC-Session': tests.SESSION_ID}
+
+        _call_salesforce(BULK_URL + 'job/750', 'GET', requests.Session(),
+                         headers, additional_headers={'Accept': 'text/csv'})
+
+        self.assertEqual(headers, {'X-SFDC-Session': tests.SESSION_ID})
+        self.assertEqual(responses.calls[0].request.headers['Accept'],
+                         'text/csv')
@@ -0,0 +1,154 @@
+"""Tests for bulk2.py"""
+
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    import httplib as http
+except ImportError:
+    # Python 3
+    import http.client as http
+
+from simple_salesforce import tests
+from simple_salesforce.api import Salesforce, SalesforceMalformedRequest
+from simple_salesforce.bulk2 import SFBulk2Handler
+
+BULK2_URL = 'https://na15.salesforce.com/services/data/v47.0/jobs/'
+
+
+def _bulk2_type(object_name='Contact'):
+    """Creates an SFBulk2Type through the bulk 2.0 handler"""
+    handler = SFBulk2Handler(tests.SESSION_ID, BULK2_URL,
+                             session=requests.Session())
+    return getattr(handler, object_name)
+
+
+class TestSFBulk2Ingest(unittest.TestCase):
+    """Tests for Bulk API 2.0 ingest jobs"""
+    def setUp(self):
+        responses.start()
+        self.addCleanup(responses.reset)
+        self.addCleanup(responses.stop)
+        self.uploads = []
+        self.jobs = []
+        self.upload_status = http.CREATED
+
+        def create_job(request):
+            """Creates a job and remembers its definition"""
+            job_id = 'job%d' % len(self.jobs)
+            self.jobs.append(json.loads(request.body))
+            return (200, {}, json.dumps({'id': job_id, 'state': 'Open'}))
+
+        def upload(request):
+            """Reads the streamed CSV body"""
+            body = request.body
+            if hasattr(body, 'read'):
+                body = body.read()
+            self.uploads.append(body.decode('utf-8'))
+            return (self.upload_status, {}, '')
+
+        responses.add_callback(responses.POST, BULK2_URL + 'ingest',
+                               callback=create_job)
+        responses.add_callback(
+            responses.PUT, re.compile(r'^.*/ingest/job\d+/batches$'),
+            callback=upload)
+        responses.add(responses.PATCH, re.compile(r'^.*/ingest/job\d+$'),
+                      body='{"state": "UploadComplete"}', status=http.OK)
+        responses.add(responses.GET, re.compile(r'^.*/ingest/job\d+$'),
+                      body='{"state": "JobComplete"}', status=http.OK)
+
+    def test_insert_records(self):
+        """Test records are uploaded as CSV to a single job"""
+        result = _bulk2_type().insert(records=[
+            {'LastName': 'Smith', 'Email': None},
+            {'LastName': 'Jones, Jr', 'Email': 'jones@example.com'}])
+
+        self.assertEqual(result, [{'state': 'JobComplete'}])
+        self.assertEqual(self.jobs[0]['object'], 'Contact')
+        self.assertEqual(self.jobs[0]['operation'], 'insert')
+        self.assertEqual(self.uploads, [
+            'LastName,Email\nSmith,\n"Jones, Jr",jones@example.com\n'])
+        self.assertEqual(
+            responses.calls[1].request.headers['Content-Type'], 'text/csv')
+
+    def test_large_csv_split_into_jobs(self):
+        """Test a CSV file over max_bytes is split, repeating the header"""
+        csv_file = io.BytesIO(
+            b'Id,Description\n1,"multi\nline"\n2,b\n3,c\n')
+
+        result = _bulk2_type().upsert('Id', csv_file=csv_file, max_bytes=30)
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(self.uploads, [
+            'Id,Description\n1,"multi\nline"\n',
+            'Id,Description\n2,b\n3,c\n'])
+        self.assertEqual(self.jobs[1]['externalIdFieldName'], 'Id')
+
+    def test_csv_path(self):
+        """Test a CSV file given by path is read as UTF-8"""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, u'contacts.csv')
+        with io.open(path, 'wb') as csv_data:
+            csv_data.write(u'LastName\nZo\xeb\n'.encode('utf-8'))
+
+        _bulk2_type().insert(csv_file=path)
+
+        self.assertEqual(self.uploads, [u'LastName\nZo\xeb\n'])
+
+    def test_failed_upload_aborts_the_job(self):
+        """Test the job is aborted, not left open, when the upload fails"""
+        self.upload_status = http.BAD_REQUEST
+
+        with self.assertRaises(SalesforceMalformedRequest):
+            _bulk2_type().insert(records=[{'LastName': 'Smith'}])
+        self.assertEqual(responses.calls[-1].request.method, 'PATCH')
+        self.assertEqual(json.loads(responses.calls[-1].request.body),
+                         {'state': 'Aborted'})
+
+
+class TestSFBulk2Query(unittest.TestCase):
+    """Tests for Bulk API 2.0 query jobs"""
+    @responses.activate
+    def test_query_follows_locator(self):
+        """Test every results page is streamed"""
+        responses.add(responses.POST, BULK2_URL + 'query',
+                      body='{"id": "job", "state": "UploadComplete"}',
+                      status=http.OK)
+        responses.add(responses.GET, BULK2_URL + 'query/job',
+                      body='{"id": "job", "state": "JobComplete"}',
+                      status=http.OK)
+        responses.add(responses.GET,
+                      re.compile(r'^.*/query/job/results\?locator=abc$'),
+                      body='"Id","Name"\n"2","two\nlines"\n',
+                      headers={'Sforce-Locator': 'null'}, status=http.OK)
+        responses.add(responses.GET,
+                      re.compile(r'^.*/query/job/results$'),
+                      body='"Id","Name"\n"1","one"\n',
+                      headers={'Sforce-Locator': 'abc'}, status=http.OK)
+
+        records = list(_bulk2_type().query('SELECT Id, Name FROM Contact'))
+
+        self.assertEqual(records, [{'Id': '1', 'Name': 'one'},
+                                   {'Id': '2', 'Name': 'two\nlines'}])
+        self.assertEqual(
+            responses.calls[-1].request.headers['Accept'], 'text/csv')
+
+    def test_salesforce_bulk2_url(self):
+        """Test the handler built by Salesforce targets the jobs endpoint"""
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session(), version='47.0')
+        self.assertEqual(client.bulk2.Contact.bulk2_url, BULK2_URL)
@@ -0,0 +1,124 @@
+"""Tests for cache.py"""
+
+import shutil
+import tempfile
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    import httplib as http
+    from mock import patch
+except ImportError:
+    # Python 3
+    import http.client as http
+    from unittest.mock import patch
+
+from simple_salesforce import tests
+from simple_salesforce.api import Salesforce, SalesforceGeneralError
+from simple_salesforce.cache import DescribeCache
+
+DESCRIBE_URL = ('https://na15.salesforce.com/services/data/v29.0/sobjects'
+                '/Contact/describe')
+LAST_MODIFIED = 'Wed, 14 Oct 2026 10:00:00 GMT'
+
+
+def _client(describe_cache):
+    """Creates a Salesforce instance using `describe_cache`"""
+    return Salesforce(session_id=tests.SESSION_ID,
+                      instance_url=tests.SERVER_URL,
+                      session=requests.Session(),
+                      describe_cache=describe_cache)
+
+
+class TestDescribeCache(unittest.TestCase):
+    """Tests for the DescribeCache class"""
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first"""
+        cache = DescribeCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a').value, 1)
+
+    def test_persisted_entries_survive_restarts(self):
+        """Test a new cache on the same directory reads stored entries"""
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+        DescribeCache(path=path).set('key', {'name': 'Contact'}, LAST_MODIFIED)
+
+        entry = DescribeCache(path=path).get('key')
+
+        self.assertEqual(entry.value, {'name': 'Contact'})
+        self.assertEqual(entry.last_modified, LAST_MODIFIED)
+
+
+class TestCachedDescribe(unittest.TestCase):
+    """Tests for the cached describe and metadata calls"""
+    @responses.activate
+    def test_fresh_result_skips_the_request(self):
+        """Test results younger than the TTL are served from memory"""
+        responses.add(responses.GET, DESCRIBE_URL, body='{"name": "Contact"}',
+                      status=http.OK)
+        client = _client(DescribeCache(ttl=60))
+
+        first = client.Contact.describe()
+        second = client.Contact.describe()
+
+        self.assertEqual(len(responses.calls), 1)
+        self.assertIs(first, second)
+
+    @responses.activate
+    def test_stale_result_is_revalidated(self):
+        """Test stale results are revalidated with If-Modified-Since"""
+        responses.add(responses.GET, DESCRIBE_URL, body='{"name": "Contact"}',
+                      status=http.OK,
+                      adding_headers={'Last-Modified': LAST_MODIFIED})
+        responses.add(responses.GET, DESCRIBE_URL, body='', status=304)
+        cache = DescribeCache(ttl=60)
+        client = _client(cache)
+
+        first = client.Contact.describe()
+        with patch('simple_salesforce.cache.time', return_value=1e12):
+            second = client.Contact.describe()
+
+        self.assertEqual(len(responses.calls), 2)
+        self.assertEqual(
+            responses.calls[1].request.headers['If-Modified-Since'],
+            LAST_MODIFIED)
+        self.assertIs(first, second)
+
+    @responses.activate
+    def test_not_modified_is_an_error_outside_the_cache(self):
+        """Test a 304 answering a caller's own conditional request raises"""
+        responses.add(responses.GET, DESCRIBE_URL, body='', status=304)
+        client = _client(None)
+
+        with self.assertRaises(SalesforceGeneralError):
+            client.Contact.describe(
+                headers={'If-Modified-Since': LAST_MODIFIED})
+        with self.assertRaises(SalesforceGeneralError):
+            # pylint: disable=protected-access
+            client._call_salesforce(
+                'GET', DESCRIBE_URL,
+                headers={'If-Modified-Since': LAST_MODIFIED})
+
+    @responses.activate
+    def test_without_cache(self):
+        """Test every call hits the network without a cache"""
+        responses.add(responses.GET, DESCRIBE_URL, body='{"name": "Contact"}',
+                      status=http.OK)
+        client = _client(None)
+
+        client.Contact.describe()
+        client.Contact.describe()
+
+        self.assertEqual(len(responses.calls), 2)
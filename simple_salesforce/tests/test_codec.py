@@ -0,0 +1,92 @@
+"""Tests for codec.py"""
+
+import json
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    import httplib as http
+except ImportError:
+    # Python 3
+    import http.client as http
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    # Python < 2.7
+    from ordereddict import OrderedDict
+
+from simple_salesforce import tests
+from simple_salesforce.api import Salesforce
+from simple_salesforce.codec import JSONCodec
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class TestJSONCodec(unittest.TestCase):
+    """Tests for the JSONCodec class"""
+    def test_default_decodes_ordered_dicts(self):
+        """Test the default codec keeps decoding into OrderedDicts"""
+        decoded = JSONCodec().loads(b'{"b": 1, "a": {"c": 2}}')
+        self.assertIsInstance(decoded, OrderedDict)
+        self.assertIsInstance(decoded['a'], OrderedDict)
+        self.assertEqual(list(decoded), ['b', 'a'])
+
+    def test_plain_dicts(self):
+        """Test unordered decoding returns plain dicts"""
+        decoded = JSONCodec(ordered=False).loads('{"a": 1}')
+        self.assertIs(type(decoded), dict)
+
+    def test_fast_backend_requires_plain_dicts(self):
+        """Test fast backends refuse to decode into OrderedDicts"""
+        with self.assertRaises(ValueError):
+            JSONCodec(backend='orjson')
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson_round_trip(self):
+        """Test orjson encodes to text and decodes bytes"""
+        codec = JSONCodec(backend='orjson', ordered=False)
+        encoded = codec.dumps(OrderedDict([('Name', u'\u00e9')]))
+        self.assertEqual(json.loads(encoded), {'Name': u'\u00e9'})
+        self.assertEqual(codec.loads(encoded.encode('utf-8')),
+                         {'Name': u'\u00e9'})
+
+    def test_fastest_falls_back_to_plain_json(self):
+        """Test fastest() returns an unordered codec whatever is installed"""
+        codec = JSONCodec.fastest()
+        self.assertFalse(codec.ordered)
+        self.assertEqual(codec.loads('[1]'), [1])
+
+    @responses.activate
+    def test_client_uses_codec(self):
+        """Test the client decodes and encodes with its codec"""
+        responses.add(
+            responses.GET,
+            'https://na15.salesforce.com/services/data/v29.0/query/',
+            body='{"records": [{"Id": "1"}], "done": true, "totalSize": 1}',
+            status=http.OK)
+        responses.add(
+            responses.POST,
+            'https://na15.salesforce.com/services/data/v29.0/sobjects/Contact/',
+            body='{"id": "003", "success": true, "errors": []}',
+            status=http.CREATED)
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session(),
+                            json_codec=JSONCodec.fastest())
+
+        result = client.query('SELECT Id FROM Contact')
+        client.Contact.create({'LastName': 'Smith'})
+
+        self.assertIs(type(result['records'][0]), dict)
+        self.assertEqual(json.loads(responses.calls[1].request.body),
+                         {'LastName': 'Smith'})
@@ -0,0 +1,134 @@
+"""Tests for columnar.py"""
+
+import json
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+from simple_salesforce import tests
+from simple_salesforce.api import Salesforce
+
+try:
+    import numpy
+    from simple_salesforce.columnar import describe_columns
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+BASE_URL = 'https://na15.salesforce.com/services/data/v29.0/'
+
+DESCRIBES = {
+    'Contact': {'name': 'Contact', 'fields': [
+        {'name': 'Id', 'type': 'id', 'relationshipName': None},
+        {'name': 'NumberOfChildren__c', 'type': 'int',
+         'relationshipName': None},
+        {'name': 'Score__c', 'type': 'double', 'relationshipName': None},
+        {'name': 'Birthdate', 'type': 'date', 'relationshipName': None},
+        {'name': 'AccountId', 'type': 'reference',
+         'relationshipName': 'Account', 'referenceTo': ['Account']}]},
+    'Account': {'name': 'Account', 'fields': [
+        {'name': 'Name', 'type': 'string', 'relationshipName': None},
+        {'name': 'CreatedDate', 'type': 'datetime',
+         'relationshipName': None}]},
+}
+
+QUERY = ('select id, numberofchildren__c, Score__c, Birthdate, '
+         'account.name, Account.CreatedDate FROM Contact')
+
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class TestColumnarQuery(unittest.TestCase):
+    """Tests for query_columns and to_arrow"""
+    def setUp(self):
+        responses.start()
+        self.addCleanup(responses.reset)
+        self.addCleanup(responses.stop)
+        for name, describe in DESCRIBES.items():
+            responses.add(responses.GET,
+                          BASE_URL + 'sobjects/{}/describe'.format(name),
+                          body=json.dumps(describe))
+        responses.add(
+            responses.GET, BASE_URL + 'query/',
+            body=json.dumps({'done': False, 'nextRecordsUrl':
+                             '/services/data/v29.0/query/next', 'records': [
+                                 {'attributes': {'type': 'Contact'},
+                                  'Id': '1', 'NumberOfChildren__c': 2,
+                                  'Score__c': 1.5, 'Birthdate': '1980-01-31',
+                                  'Account': {
+                                      'attributes': {'type': 'Account'},
+                                      'Name': 'Acme', 'CreatedDate':
+                                      '2026-10-14T10:00:00.000+0000'}}]}))
+        responses.add(
+            responses.GET, BASE_URL + 'query/next',
+            body=json.dumps({'done': True, 'records': [
+                {'attributes': {'type': 'Contact'}, 'Id': '2',
+                 'NumberOfChildren__c': None, 'Score__c': None,
+                 'Birthdate': None, 'Account': None}]}))
+        self.client = Salesforce(session_id=tests.SESSION_ID,
+                                 instance_url=tests.SERVER_URL,
+                                 session=requests.Session())
+
+    def test_describe_columns(self):
+        """Test names are canonical and kinds come from describe"""
+        columns = describe_columns(QUERY, lambda name: DESCRIBES[name])
+        self.assertEqual(
+            [(name, kind) for name, _, kind in columns],
+            [('Id', 'string'), ('NumberOfChildren__c', 'int'),
+             ('Score__c', 'float'), ('Birthdate', 'date'),
+             ('Account.Name', 'string'), ('Account.CreatedDate', 'datetime')])
+
+    def test_objects_are_described_once(self):
+        """Test every queried object is described once, however many of its
+        fields are selected
+        """
+        described = []
+
+        def describe(name):
+            """Records the described objects"""
+            described.append(name)
+            return DESCRIBES[name]
+
+        describe_columns(QUERY, describe)
+        self.assertEqual(described, ['Contact', 'Account'])
+
+    def test_subqueries_are_refused(self):
+        """Test unsupported select items raise ValueError"""
+        with self.assertRaises(ValueError):
+            describe_columns('SELECT Id, (SELECT Id FROM Cases) FROM Contact',
+                             lambda name: DESCRIBES[name])
+
+    def test_query_columns(self):
+        """Test pages are appended into typed numpy columns"""
+        columns = self.client.query_columns(QUERY)
+
+        self.assertEqual(list(columns['Id']), ['1', '2'])
+        self.assertEqual(columns['NumberOfChildren__c'].dtype, numpy.int64)
+        self.assertEqual(list(columns['NumberOfChildren__c'].mask),
+                         [False, True])
+        self.assertTrue(numpy.isnan(columns['Score__c'][1]))
+        self.assertEqual(columns['Birthdate'][0],
+                         numpy.datetime64('1980-01-31'))
+        self.assertTrue(numpy.isnat(columns['Account.CreatedDate'][1]))
+        self.assertEqual(list(columns['Account.Name']), ['Acme', None])
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_to_arrow(self):
+        """Test the Arrow table has typed, nullable columns"""
+        table = self.client.to_arrow(QUERY)
+
+        self.assertEqual(table.column_names[-2:],
+                         ['Account.Name', 'Account.CreatedDate'])
+        self.assertEqual(table.schema.field('NumberOfChildren__c').type,
+                         pyarrow.int64())
+        self.assertEqual(table.schema.field('Account.CreatedDate').type,
+                         pyarrow.timestamp('ms', tz='UTC'))
+        self.assertEqual(table.column('Score__c').to_pylist(), [1.5, None])
+        self.assertEqual(table.column('Account.Name').null_count, 1)
@@ -0,0 +1,285 @@
+"""Tests for composite.py"""
+
+import json
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    import httplib as http
+    from urlparse import urlparse, parse_qs
+    from mock import patch
+except ImportError:
+    # Python 3
+    import http.client as http
+    from urllib.parse import urlparse, parse_qs
+    from unittest.mock import patch
+
+from simple_salesforce import tests
+from simple_salesforce.api import (
+    Salesforce,
+    SalesforceMalformedRequest,
+    SalesforceMoreThanOneRecord,
+    SalesforceResourceNotFound
+)
+
+BASE_URL = 'https://na15.salesforce.com/services/data/v42.0/'
+
+
+def _client():
+    """Creates a Salesforce instance authenticated with a session ID"""
+    return Salesforce(session_id=tests.SESSION_ID,
+                      instance_url=tests.SERVER_URL,
+                      session=requests.Session(), version='42.0')
+
+
+class TestSFBatch(unittest.TestCase):
+    """Tests for /composite/batch requests"""
+    def setUp(self):
+        responses.start()
+        self.addCleanup(responses.reset)
+        self.addCleanup(responses.stop)
+        self.payloads = []
+
+        def batch(request):
+            """Answers every subrequest, failing GETs of missing records"""
+            payload = json.loads(request.body)
+            self.payloads.append(payload)
+            results = []
+            for subrequest in payload['batchRequests']:
+                if subrequest['url'].endswith('/missing'):
+                    results.append({'statusCode': 404, 'result': [
+                        {'errorCode': 'NOT_FOUND'}]})
+                else:
+                    results.append({'statusCode': 200, 'result': {
+                        'url': subrequest['url']}})
+            return (200, {}, json.dumps({
+                'hasErrors': any(r['statusCode'] >= 300 for r in results),
+                'results': results}))
+
+        responses.add_callback(responses.POST, BASE_URL + 'composite/batch',
+                               callback=batch)
+
+    def test_batch_splits_every_25_subrequests(self):
+        """Test calls are sent 25 at a time and results keep their order"""
+        with _client().batch() as batch:
+            subrequests = [batch.Contact.get(str(i)) for i in range(30)]
+
+        self.assertEqual([len(p['batchRequests']) for p in self.payloads],
+                         [25, 5])
+        self.assertEqual(subrequests[29].result,
+                         {'url': 'v42.0/sobjects/Contact/29'})
+        self.assertEqual(self.payloads[0]['batchRequests'][0],
+                         {'method': 'GET', 'url': 'v42.0/sobjects/Contact/0'})
+
+    def test_batch_maps_errors_to_exceptions(self):
+        """Test failed subrequests raise like the equivalent SFType call"""
+        batch = _client().batch()
+        found = batch.Contact.get('001')
+        missing = batch.Contact.get('missing')
+        batch.execute()
+
+        self.assertEqual(found.status_code, 200)
+        with self.assertRaises(SalesforceResourceNotFound) as cm:
+            _ = missing.result
+        self.assertEqual(cm.exception.resource_name, 'Contact')
+
+    def test_halt_on_error_skips_later_chunks(self):
+        """Test chunks after a failure are not sent when halting"""
+        batch = _client().batch(halt_on_error=True)
+        batch.Contact.get('missing')
+        for i in range(25):
+            batch.Contact.update(str(i), {'LastName': 'Smith'})
+        subrequests = batch.execute()
+
+        self.assertEqual(len(self.payloads), 1)
+        self.assertTrue(self.payloads[0]['haltOnError'])
+        self.assertEqual(self.payloads[0]['batchRequests'][1]['richInput'],
+                         {'LastName': 'Smith'})
+        self.assertEqual(subrequests[-1].status_code, 412)
+
+
+class TestSFComposite(unittest.TestCase):
+    """Tests for /composite requests"""
+    @responses.activate
+    def test_composite_with_references(self):
+        """Test later subrequests can refer to earlier results"""
+        responses.add(
+            responses.POST, BASE_URL + 'composite',
+            body=json.dumps({'compositeResponse': [
+                {'body': {'id': '001', 'success': True, 'errors': []},
+                 'httpHeaders': {}, 'httpStatusCode': 201,
+                 'referenceId': 'ref0'},
+                {'body': [{'errorCode': 'DUPLICATE_VALUE'}],
+                 'httpHeaders': {}, 'httpStatusCode': 400,
+                 'referenceId': 'ref1'}]}),
+            status=http.OK)
+
+        with _client().composite(all_or_none=True) as composite:
+            account = composite.Account.create({'Name': 'Acme'})
+            contact = composite.Contact.create(
+                {'LastName': 'Smith', 'AccountId': account.ref('id')})
+
+        payload = json.loads(responses.calls[0].request.body)
+        self.assertTrue(payload['allOrNone'])
+        self.assertEqual(payload['compositeRequest'][1], {
+            'method': 'POST',
+            'url': '/services/data/v42.0/sobjects/Contact/',
+            'referenceId': 'ref1',
+            'body': {'LastName': 'Smith', 'AccountId': '@{ref0.id}'}})
+        self.assertEqual(account.result['id'], '001')
+        with self.assertRaises(SalesforceMalformedRequest):
+            _ = contact.result
+
+    def test_composite_limit(self):
+        """Test more than 25 subrequests are refused"""
+        composite = _client().composite()
+        for i in range(25):
+            composite.Contact.get(str(i))
+        with self.assertRaises(ValueError):
+            composite.Contact.get('25')
+
+
+class TestSObjectCollections(unittest.TestCase):
+    """Tests for the /composite/sobjects methods of SFType"""
+    @responses.activate
+    def test_create_many_chunks_records(self):
+        """Test records are typed and sent 200 per request"""
+        def create(request):
+            """Creates every record, failing those without a LastName"""
+            records = json.loads(request.body)['records']
+            return (200, {}, json.dumps([
+                {'id': str(i), 'success': True, 'errors': []}
+                if record.get('LastName') else
+                {'success': False, 'errors': [
+                    {'statusCode': 'DUPLICATE_EXTERNAL_ID'}]}
+                for i, record in enumerate(records)]))
+
+        responses.add_callback(responses.POST, BASE_URL + 'composite/sobjects',
+                               callback=create)
+        records = [{'LastName': 'Smith'}] * 250 + [{}]
+
+        results = _client().Contact.create_many(records)
+
+        self.assertEqual(len(responses.calls), 2)
+        payload = json.loads(responses.calls[0].request.body)
+        self.assertEqual(len(payload['records']), 200)
+        self.assertEqual(payload['records'][0]['attributes'],
+                         {'type': 'Contact'})
+        self.assertEqual(len(results), 251)
+        self.assertTrue(results[0]['success'])
+        self.assertIsInstance(results[-1], SalesforceMoreThanOneRecord)
+
+    @responses.activate
+    def test_upsert_many_url(self):
+        """Test upserts target the external id field of the object"""
+        responses.add(
+            responses.PATCH,
+            BASE_URL + 'composite/sobjects/Contact/My_Id__c',
+            body='[{"id": "003", "success": true, "errors": []}]',
+            status=http.OK)
+
+        results = _client().Contact.upsert_many(
+            'My_Id__c', [{'My_Id__c': '1', 'LastName': 'Smith'}])
+
+        self.assertEqual(results[0]['id'], '003')
+
+    @responses.activate
+    def test_delete_many(self):
+        """Test ids are passed as a comma separated list"""
+        responses.add(
+            responses.DELETE, BASE_URL + 'composite/sobjects',
+            body='[{"id": "1", "success": true, "errors": []}, '
+                 '{"id": "2", "success": false, "errors": '
+                 '[{"statusCode": "ENTITY_IS_DELETED"}]}]',
+            status=http.OK)
+
+        results = _client().Contact.delete_many(['1', '2'])
+
+        self.assertIn('ids=1%2C2', responses.calls[0].request.url)
+        self.assertIn('allOrNone=false', responses.calls[0].request.url)
+        self.assertIsInstance(results[1], SalesforceResourceNotFound)
+
+    @responses.activate
+    def test_get_many_retrieves_chunks_in_order(self):
+        """Test records are retrieved in chunks, returned in the order of the
+        Ids with None for missing ones
+        """
+        def retrieve(request):
+            """Returns the records of existing Ids"""
+            payload = json.loads(request.body)
+            return (200, {}, json.dumps([
+                None if record_id.startswith('x') else
+                {'Id': record_id, 'LastName': 'Smith'}
+                for record_id in payload['ids']]))
+        responses.add_callback(
+            responses.POST, BASE_URL + 'composite/sobjects/Contact',
+            callback=retrieve)
+
+        with patch('simple_salesforce.composite.MAX_RETRIEVE_IDS', 2):
+            records = _client().Contact.get_many(['1', 'x2', '3', '4', '5'],
+                                                 fields=['LastName'])
+
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(
+            [record and record['Id'] for record in records],
+            ['1', None, '3', '4', '5'])
+        payload = json.loads(responses.calls[0].request.body)
+        self.assertEqual(payload['fields'], ['LastName'])
+
+    @responses.activate
+    def test_get_many_queries_before_version_42(self):
+        """Test older API versions retrieve records with SOQL, following
+        the next pages and matching 15 character Ids
+        """
+        old_url = 'https://na15.salesforce.com/services/data/v29.0/'
+        responses.add(
+            responses.GET, old_url + 'query/',
+            body=json.dumps({'done': False,
+                             'nextRecordsUrl': '/services/data/v29.0/query/'
+                                               '01g-2000',
+                             'records': [{'Id': '003000000000002AAA'}]}),
+            status=http.OK)
+        responses.add(
+            responses.GET, old_url + 'query/01g-2000',
+            body=json.dumps({'done': True,
+                             'records': [{'Id': '003000000000001AAA'}]}),
+            status=http.OK)
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        records = client.Contact.get_many(
+            ['003000000000001', '003000000000002AAA', "x' OR Name != '"],
+            fields=['Name'])
+
+        self.assertEqual(
+            [record and record['Id'] for record in records],
+            ['003000000000001AAA', '003000000000002AAA', None])
+        query = parse_qs(urlparse(responses.calls[0].request.url).query)
+        self.assertEqual(
+            query['q'][0],
+            "SELECT Id, Name FROM Contact WHERE Id IN ('003000000000001', "
+            "'003000000000002AAA', 'x\\' OR Name != \\'')")
+
+    @responses.activate
+    def test_writes_require_version_42(self):
+        """Test writes are refused before API version 42.0, without sending
+        any request
+        """
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        for method, args in ((client.Contact.create_many, ([{}],)),
+                             (client.Contact.update_many, ([{'Id': '1'}],)),
+                             (client.Contact.upsert_many, ('Key__c', [{}])),
+                             (client.Contact.delete_many, (['1'],))):
+            with self.assertRaises(ValueError):
+                method(*args)
+        self.assertEqual(len(responses.calls), 0)
@@ -0,0 +1,231 @@
+"""Tests for credentials.py"""
+# pylint: disable=protected-access
+
+import threading
+from time import sleep
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    import httplib as http
+    from mock import patch
+except ImportError:
+    # Python 3
+    import http.client as http
+    from unittest.mock import patch
+
+from simple_salesforce import tests
+from simple_salesforce.api import Salesforce, SalesforceExpiredSession
+from simple_salesforce.credentials import CredentialProvider
+
+LOGIN_URL = 'https://login.salesforce.com/services/Soap/u/29.0'
+CONTACT_URL = ('https://na15.salesforce.com/services/data/v29.0/sobjects'
+               '/Contact/003')
+JOB_URL = 'https://na15.salesforce.com/services/async/29.0/job/750'
+NEW_JOB_URL = 'https://na2.salesforce.com/services/async/29.0/job/750'
+EXPIRED = '[{"errorCode": "INVALID_SESSION_ID", "message": "expired"}]'
+
+
+def _login_response(session_id):
+    """Returns a SOAP login response granting `session_id`"""
+    return tests.LOGIN_RESPONSE_SUCCESS.replace(
+        '<sessionId>{}<'.format(tests.SESSION_ID),
+        '<sessionId>{}<'.format(session_id))
+
+
+class TestCredentialProvider(unittest.TestCase):
+    """Tests for the shared credential provider"""
+
+    def test_concurrent_refreshes_log_in_once(self):
+        """Test threads finding the same session expired refresh it once"""
+        logins = []
+
+        def refresh():
+            """Slow login, so that every thread reports the session"""
+            logins.append(1)
+            sleep(0.05)
+            return 'new', 'na2.salesforce.com'
+
+        provider = CredentialProvider('old', 'na1.salesforce.com',
+                                      refresh=refresh)
+        outcomes = []
+        threads = [threading.Thread(
+            target=lambda: outcomes.append(provider.refresh('old')))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(logins), 1)
+        self.assertEqual(outcomes, [True] * 8)
+        self.assertEqual(provider.get(), ('new', 'na2.salesforce.com'))
+
+    def test_refresh_without_login(self):
+        """Test a session that can't be refreshed is kept"""
+        provider = CredentialProvider('old', 'na1.salesforce.com')
+
+        self.assertFalse(provider.can_refresh)
+        self.assertFalse(provider.refresh('old'))
+        self.assertEqual(provider.session_id, 'old')
+
+    def test_proactive_refresh(self):
+        """Test a session is refreshed shortly before it expires"""
+        with patch('simple_salesforce.credentials.time') as clock:
+            clock.return_value = 1000
+            provider = CredentialProvider(
+                'old', 'na1.salesforce.com',
+                refresh=lambda: ('new', 'na1.salesforce.com'),
+                session_lifetime=600, refresh_margin=60)
+
+            clock.return_value = 1500
+            self.assertEqual(provider.get()[0], 'old')
+
+            clock.return_value = 1550
+            self.assertEqual(provider.get()[0], 'new')
+            self.assertEqual(provider.issued_at, 1550)
+            self.assertEqual(provider.refreshes, 1)
+
+
+class TestSharedCredentials(unittest.TestCase):
+    """Tests for refreshes shared by the handles of a client"""
+
+    @responses.activate
+    def test_expired_session_is_refreshed_for_every_handle(self):
+        """Test a handle finding the session expired logs in again, and
+        handles created earlier use the new session
+        """
+        responses.add(responses.POST, LOGIN_URL,
+                      body=_login_response(tests.SESSION_ID),
+                      status=http.OK)
+        responses.add(responses.POST, LOGIN_URL,
+                      body=_login_response('refreshed'), status=http.OK)
+        responses.add(responses.GET, CONTACT_URL, body=EXPIRED,
+                      status=http.UNAUTHORIZED)
+        responses.add(responses.GET, CONTACT_URL, body='{"Id": "003"}',
+                      status=http.OK)
+        responses.add(responses.GET, JOB_URL, body='{"id": "750"}',
+                      status=http.OK)
+
+        client = Salesforce(username='foo@bar.com', password='password',
+                            security_token='token',
+                            session=requests.Session())
+        bulk = client.bulk
+        contact = client.Contact
+
+        self.assertEqual(contact.get('003')['Id'], '003')
+        bulk.Contact._get_job('750')
+
+        self.assertEqual(client.session_id, 'refreshed')
+        self.assertEqual(
+            responses.calls[3].request.headers['Authorization'],
+            'Bearer refreshed')
+        self.assertEqual(
+            responses.calls[4].request.headers['X-SFDC-Session'],
+            'refreshed')
+
+    @responses.activate
+    def test_lazy_login(self):
+        """Test a lazy client logs in on its first call only"""
+        responses.add(responses.POST, LOGIN_URL,
+                      body=tests.LOGIN_RESPONSE_SUCCESS, status=http.OK)
+        responses.add(responses.GET, CONTACT_URL, body='{"Id": "003"}',
+                      status=http.OK)
+
+        client = Salesforce(username='foo@bar.com', password='password',
+                            security_token='token',
+                            session=requests.Session(), lazy_login=True)
+        contact = client.Contact
+        self.assertEqual(len(responses.calls), 0)
+
+        self.assertEqual(contact.get('003')['Id'], '003')
+        self.assertEqual([call.request.url for call in responses.calls],
+                         [LOGIN_URL, CONTACT_URL])
+        self.assertEqual(client.session_id, tests.SESSION_ID)
+
+    @responses.activate
+    def test_expired_session_without_refresh(self):
+        """Test an expired session is reported when it can't be refreshed"""
+        responses.add(responses.GET, CONTACT_URL, body=EXPIRED,
+                      status=http.UNAUTHORIZED)
+
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        with self.assertRaises(SalesforceExpiredSession):
+            client.Contact.get('003')
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_bulk_invalid_session_is_refreshed(self):
+        """Test the bulk API's InvalidSessionId 400 triggers a refresh"""
+        responses.add(responses.GET, JOB_URL,
+                      body='{"exceptionCode": "InvalidSessionId"}',
+                      status=http.BAD_REQUEST)
+        responses.add(responses.GET, JOB_URL, body='{"id": "750"}',
+                      status=http.OK)
+
+        provider = CredentialProvider(
+            tests.SESSION_ID, 'na15.salesforce.com',
+            refresh=lambda: ('refreshed', 'na15.salesforce.com'))
+        client = Salesforce(credentials=provider,
+                            session=requests.Session())
+
+        self.assertEqual(client.bulk.Contact._get_job('750')['id'], '750')
+        self.assertEqual(
+            responses.calls[1].request.headers['X-SFDC-Session'],
+            'refreshed')
+
+    @responses.activate
+    def test_login_reported_validity(self):
+        """Test the session validity a SOAP login reports drives proactive
+        refreshes
+        """
+        responses.add(responses.POST, LOGIN_URL,
+                      body=tests.LOGIN_RESPONSE_SUCCESS, status=http.OK)
+        responses.add(responses.POST, LOGIN_URL,
+                      body=_login_response('refreshed'), status=http.OK)
+
+        with patch('simple_salesforce.credentials.time') as clock:
+            clock.return_value = 1000
+            client = Salesforce(username='foo@bar.com', password='password',
+                                security_token='token',
+                                session=requests.Session())
+            self.assertEqual(client.credentials.session_seconds_valid, 7200)
+
+            clock.return_value = 1000 + 7200 - 600
+            self.assertEqual(client.session_id, tests.SESSION_ID)
+
+            clock.return_value = 1000 + 7200 - 200
+            self.assertEqual(client.session_id, 'refreshed')
+            self.assertEqual(client.credentials.refreshes, 1)
+
+    @responses.activate
+    def test_bulk_handler_follows_refreshed_instance(self):
+        """Test a bulk handler created before a refresh to another instance
+        calls the new instance
+        """
+        responses.add(responses.GET, NEW_JOB_URL, body='{"id": "750"}',
+                      status=http.OK)
+
+        provider = CredentialProvider(
+            tests.SESSION_ID, 'na15.salesforce.com',
+            refresh=lambda: ('refreshed', 'na2.salesforce.com'))
+        client = Salesforce(credentials=provider,
+                            session=requests.Session())
+        bulk = client.bulk
+        contact = bulk.Contact
+        provider.refresh(tests.SESSION_ID)
+
+        self.assertEqual(contact._get_job('750')['id'], '750')
+        self.assertEqual(bulk.Contact._get_job('750')['id'], '750')
+        self.assertEqual(bulk.bulk_url,
+                         'https://na2.salesforce.com/services/async/29.0/')
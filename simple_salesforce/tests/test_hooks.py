@@ -0,0 +1,221 @@
+"""Tests for hooks.py"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+try:
+    import prometheus_client
+except ImportError:
+    prometheus_client = None
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+        InMemorySpanExporter
+    )
+except ImportError:
+    TracerProvider = None
+
+from simple_salesforce.api import Salesforce
+from simple_salesforce.bulk import PollingStrategy
+from simple_salesforce.hooks import (
+    AFTER_RESPONSE,
+    BEFORE_REQUEST,
+    BULK_BATCH_COMPLETE,
+    BULK_POLL,
+    EVENTS,
+    RETRY,
+    SESSION_REFRESH,
+    Hooks,
+    OpenTelemetryTracer,
+    PrometheusMetrics,
+    endpoint_template
+)
+from simple_salesforce.retry import RetryPolicy
+from simple_salesforce.tests.server import FakeSalesforce, make_records
+
+CONTACT_ENDPOINT = '/services/data/v{version}/sobjects/{object}/{id}'
+
+
+class TestEndpointTemplate(unittest.TestCase):
+    """Tests for endpoint_template"""
+
+    def test_variable_parts_are_replaced(self):
+        """Test versions, objects, Ids and locators become placeholders"""
+        base = 'https://na15.salesforce.com/services/data/v42.0/'
+        self.assertEqual(
+            endpoint_template(base + 'sobjects/Contact/003A0000001abcD'),
+            CONTACT_ENDPOINT)
+        self.assertEqual(
+            endpoint_template(base + 'sobjects/Contact/describe/'),
+            '/services/data/v{version}/sobjects/{object}/describe/')
+        self.assertEqual(
+            endpoint_template(base + 'query/01gD0000002HU6KIAW-2000'),
+            '/services/data/v{version}/query/{locator}')
+        self.assertEqual(
+            endpoint_template('https://na15.salesforce.com/services/async/'
+                              '42.0/job/750D0000000002lIAA/batch'),
+            '/services/async/{version}/job/{id}/batch')
+        self.assertEqual(
+            endpoint_template('https://login.salesforce.com/services/Soap/u/'
+                              '42.0'),
+            '/services/Soap/u/{version}')
+
+
+class TestHooks(unittest.TestCase):
+    """Tests for the events fired by a client"""
+
+    def setUp(self):
+        self.server = FakeSalesforce().start()
+        self.addCleanup(self.server.stop)
+        self.ids = self.server.add_records('Contact', make_records(5))
+        self.hooks = Hooks()
+        self.events = []
+        for name in EVENTS:
+            self.hooks.on(name, self.events.append)
+        self.client = Salesforce(
+            username='foo@bar.com', password='password',
+            security_token='token', session=self.server.session(),
+            version='42.0', retry_policy=RetryPolicy(min_delay=0, jitter=0),
+            hooks=self.hooks)
+
+    def _events(self, name):
+        """Returns the events named `name` fired so far"""
+        return [event for event in self.events if event.name == name]
+
+    def test_attempts_are_reported(self):
+        """Test every attempt fires a before and after event"""
+        del self.events[:]
+        self.client.Contact.update(self.ids[0], {'LastName': 'Brown'})
+
+        before, after = self.events
+        self.assertEqual(before.name, BEFORE_REQUEST)
+        self.assertEqual(after.name, AFTER_RESPONSE)
+        self.assertEqual(after.method, 'PATCH')
+        self.assertEqual(after.endpoint, CONTACT_ENDPOINT)
+        self.assertEqual(after.object_name, 'Contact')
+        self.assertEqual(after.status, 204)
+        self.assertEqual(after.bytes_sent, len(b'{"LastName": "Brown"}'))
+        self.assertEqual(after.attempt, 1)
+        self.assertGreaterEqual(after.elapsed, 0)
+
+    def test_login_is_reported(self):
+        """Test the login call fires events too"""
+        login = self._events(AFTER_RESPONSE)[0]
+
+        self.assertEqual(login.endpoint, '/services/Soap/u/{version}')
+        self.assertEqual(login.status, 200)
+        self.assertGreater(login.bytes_received, 0)
+
+    def test_retries_are_reported(self):
+        """Test a retried attempt fires a retry event"""
+        self.server.fail_next(status=503)
+        del self.events[:]
+        self.client.Contact.get(self.ids[0])
+
+        retry, = self._events(RETRY)
+        self.assertEqual(retry.status, 503)
+        self.assertEqual(retry.attempt, 1)
+        self.assertEqual(retry.details['delay'], 0)
+        self.assertEqual([event.attempt for event in
+                          self._events(AFTER_RESPONSE)], [1, 2])
+
+    def test_session_refreshes_are_reported(self):
+        """Test replacing an expired session fires an event"""
+        self.server.expire_sessions()
+        self.client.Contact.get(self.ids[0])
+
+        refresh, = self._events(SESSION_REFRESH)
+        self.assertEqual(refresh.details['reason'], 'expired')
+        self.assertIsNone(refresh.error)
+
+    def test_bulk_progress_is_reported(self):
+        """Test bulk polls and finished batches fire events"""
+        self.client.bulk.Contact.insert(
+            [{'LastName': 'Jones'}] * 3, batch_size=2,
+            polling=PollingStrategy.fixed(0.01))
+
+        completed = self._events(BULK_BATCH_COMPLETE)
+        self.assertEqual(len(completed), 2)
+        self.assertEqual(set(event.details['state'] for event in completed),
+                         set(['Completed']))
+        self.assertEqual(completed[0].object_name, 'Contact')
+        self.assertEqual(self._events(BULK_POLL)[-1].details['pending'], 0)
+
+    def test_bulk_progress_is_reported_for_big_jobs(self):
+        """Test finished batches fire events when the job status is polled"""
+        self.client.bulk.Contact.insert(
+            [{'LastName': 'Jones'}] * 3, batch_size=1,
+            polling=PollingStrategy(min_interval=0.01, max_interval=0.01,
+                                    job_status_threshold=1))
+
+        completed = self._events(BULK_BATCH_COMPLETE)
+        self.assertEqual(len(completed), 3)
+        self.assertEqual(set(event.details['state'] for event in completed),
+                         set(['Completed']))
+
+    def test_failing_listener_is_ignored(self):
+        """Test an exception in a listener doesn't fail the call"""
+        @self.hooks.on(AFTER_RESPONSE)
+        def fail(_):
+            """Fails"""
+            raise RuntimeError('listener failed')
+
+        self.assertEqual(self.client.Contact.get(self.ids[0])['Id'],
+                         self.ids[0])
+
+    def test_listeners_are_removed(self):
+        """Test a removed listener isn't called anymore"""
+        hooks = Hooks()
+        events = []
+        hooks.on(RETRY, events.append)
+        self.assertTrue(hooks.listens(RETRY))
+        hooks.off(RETRY, events.append)
+
+        self.assertFalse(hooks.listens(RETRY))
+        hooks.emit(RETRY)
+        self.assertEqual(events, [])
+
+    def test_unknown_event_is_rejected(self):
+        """Test listening to an event that doesn't exist fails"""
+        with self.assertRaises(ValueError):
+            self.hooks.on('after_request', self.events.append)
+
+    @unittest.skipIf(prometheus_client is None,
+                     'prometheus_client is not installed')
+    def test_prometheus_metrics(self):
+        """Test attempts and retries are counted"""
+        registry = prometheus_client.CollectorRegistry()
+        PrometheusMetrics(self.hooks, registry=registry)
+        self.server.fail_next(status=503)
+        self.client.Contact.get(self.ids[0])
+
+        labels = {'method': 'GET', 'object': 'Contact',
+                  'endpoint': CONTACT_ENDPOINT}
+        for status, count in (('503', 1), ('200', 1)):
+            self.assertEqual(registry.get_sample_value(
+                'salesforce_requests_total', dict(labels, status=status)),
+                             count)
+        self.assertEqual(registry.get_sample_value(
+            'salesforce_retries_total', labels), 1)
+        self.assertEqual(registry.get_sample_value(
+            'salesforce_request_duration_seconds_count', labels), 2)
+
+    @unittest.skipIf(TracerProvider is None,
+                     'opentelemetry-sdk is not installed')
+    def test_opentelemetry_spans(self):
+        """Test every attempt is traced as a client span"""
+        exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(exporter))
+        OpenTelemetryTracer(self.hooks, tracer=provider.get_tracer(__name__))
+        self.client.Contact.get(self.ids[0])
+
+        span, = exporter.get_finished_spans()
+        self.assertEqual(
+            span.name, 'GET ' + CONTACT_ENDPOINT)
+        self.assertEqual(span.attributes['http.status_code'], 200)
+        self.assertEqual(span.attributes['salesforce.object'], 'Contact')
@@ -0,0 +1,94 @@
+"""Tests for limits.py"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    import httplib as http
+    from mock import patch
+except ImportError:
+    # Python 3
+    import http.client as http
+    from unittest.mock import patch
+
+from simple_salesforce import tests
+from simple_salesforce.api import Salesforce
+from simple_salesforce.limits import ApiUsage
+
+
+class TestApiUsage(unittest.TestCase):
+    """Tests for the ApiUsage class"""
+    def test_update_parses_limit_info(self):
+        """Test usage is read from Sforce-Limit-Info"""
+        usage = ApiUsage()
+        usage.update({'Sforce-Limit-Info':
+                      'api-usage=150/1000; per-app-api-usage=2/250(appName=x)'})
+
+        self.assertEqual((usage.used, usage.limit), (150, 1000))
+        self.assertEqual(usage.remaining, 850)
+        self.assertEqual(usage.fraction, 0.15)
+
+    def test_no_pacing_by_default(self):
+        """Test calls are never delayed without a rate or target"""
+        usage = ApiUsage()
+        usage.update({'Sforce-Limit-Info': 'api-usage=999/1000'})
+        with patch('simple_salesforce.limits.sleep') as sleep:
+            for _ in range(100):
+                usage.acquire()
+        self.assertFalse(sleep.called)
+
+    def test_rate_paces_after_burst(self):
+        """Test the token bucket waits once the burst is spent"""
+        with patch('simple_salesforce.limits.time', return_value=100.0), \
+                patch('simple_salesforce.limits.sleep',
+                      side_effect=StopIteration) as sleep:
+            usage = ApiUsage(rate=2, burst=2)
+            usage.acquire()
+            usage.acquire()
+            with self.assertRaises(StopIteration):
+                usage.acquire()
+        sleep.assert_called_once_with(0.5)
+
+    def test_target_slows_to_sustainable_rate(self):
+        """Test reaching the target paces at the rolling window's rate"""
+        usage = ApiUsage(target=0.5, rate=100)
+        self.assertEqual(usage.current_rate(), 100)
+
+        usage.update({'Sforce-Limit-Info': 'api-usage=50000/86400'})
+
+        self.assertAlmostEqual(usage.current_rate(), 0.5)
+
+
+class TestApiUsageTracking(unittest.TestCase):
+    """Tests for the usage recorded by the client"""
+    @responses.activate
+    def test_usage_is_shared_by_client_and_sftype(self):
+        """Test every call path updates the same ApiUsage"""
+        responses.add(
+            responses.GET,
+            'https://na15.salesforce.com/services/data/v29.0/query/',
+            body='{"records": [], "done": true, "totalSize": 0}',
+            adding_headers={'Sforce-Limit-Info': 'api-usage=10/15000'},
+            status=http.OK)
+        responses.add(
+            responses.GET,
+            'https://na15.salesforce.com/services/data/v29.0/sobjects'
+            '/Contact/003',
+            body='{"Id": "003"}',
+            adding_headers={'Sforce-Limit-Info': 'api-usage=11/15000'},
+            status=http.OK)
+        client = Salesforce(session_id=tests.SESSION_ID,
+                            instance_url=tests.SERVER_URL,
+                            session=requests.Session())
+
+        client.query('SELECT Id FROM Contact')
+        self.assertEqual(client.api_usage.used, 10)
+        client.Contact.get('003')
+        self.assertEqual(client.api_usage.used, 11)
+        self.assertEqual(client.api_usage.remaining, 14989)
@@ -103,3 +103,42 @@ class TestSalesforceLogin(unittest.TestCase):
                 sandbox=True
             )
         self.assertTrue(self.mockrequest.post.called)
+
+    @responses.activate
+    def test_session_validity_and_user_info(self):
+        """Test the session validity and user info of a SOAP login"""
+        responses.add(
+            responses.POST,
+            re.compile(r'^https://.*$'),
+            body=tests.LOGIN_RESPONSE_SUCCESS,
+            status=http.OK
+        )
+
+        result = SalesforceLogin(
+            username='foo@bar.com',
+            password='password',
+            security_token='token',
+            session=requests.Session())
+
+        self.assertEqual(result, (tests.SESSION_ID,
+                                  urlparse(tests.SERVER_URL).netloc))
+        self.assertEqual(result.session_seconds_valid, 7200)
+        self.assertEqual(result.user_info['organizationId'],
+                         '00Di0000000icUBEAY')
+        self.assertEqual(result.user_info['userFullName'], 'Wade Wegner')
+        self.assertIsNone(result.user_info['roleId'])
+
+    def test_failure_without_soap_fault(self):
+        """Test a failed login answered with something else than XML"""
+        return_mock = Mock()
+        return_mock.status_code = 503
+        return_mock.content = return_mock.text = 'Service Unavailable'
+        self.mockrequest.post.return_value = return_mock
+
+        with self.assertRaises(SalesforceAuthenticationFailed) as context:
+            SalesforceLogin(
+                username='myemail@example.com.sandbox',
+                password='password',
+                security_token='token')
+        self.assertEqual(context.exception.code, 503)
+        self.assertIsNotNone(context.exception.__cause__)
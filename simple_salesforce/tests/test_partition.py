@@ -0,0 +1,106 @@
+"""Tests for partition.py"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from simple_salesforce.partition import (
+    bound_query,
+    datetime_boundaries,
+    id_boundaries,
+    id_to_number,
+    number_to_id,
+    range_conditions,
+    restrict_query,
+    split_query
+)
+
+QUERY = ("SELECT Id, (SELECT Id FROM Contacts WHERE Name = 'x') FROM Account "
+         "WHERE Name = 'it\\'s ORDER BY' OR Name LIKE 'a%' ORDER BY Name")
+
+
+class TestSplitQuery(unittest.TestCase):
+    """Tests for the parsing of SOQL queries"""
+    def test_where_clause(self):
+        """Test subqueries and string literals don't end the clauses"""
+        self.assertEqual(split_query(QUERY), (
+            "SELECT Id, (SELECT Id FROM Contacts WHERE Name = 'x')",
+            'FROM Account', "Name = 'it\\'s ORDER BY' OR Name LIKE 'a%'",
+            'ORDER BY Name'))
+
+    def test_without_where_clause(self):
+        """Test conditions are added to queries without a WHERE clause"""
+        self.assertEqual(
+            restrict_query('SELECT Id FROM Account order by Name',
+                           "Id < '001'"),
+            "SELECT Id FROM Account WHERE Id < '001' order by Name")
+
+    def test_restrict_query(self):
+        """Test the original condition is kept as a whole"""
+        self.assertEqual(
+            restrict_query(QUERY, "Id < '001'"),
+            "SELECT Id, (SELECT Id FROM Contacts WHERE Name = 'x') FROM "
+            "Account WHERE (Name = 'it\\'s ORDER BY' OR Name LIKE 'a%') AND "
+            "Id < '001' ORDER BY Name")
+
+    def test_bound_query(self):
+        """Test bounds are read with a single record query"""
+        self.assertEqual(
+            bound_query(QUERY, 'CreatedDate', descending=True),
+            "SELECT CreatedDate FROM Account WHERE (Name = 'it\\'s ORDER BY' "
+            "OR Name LIKE 'a%') AND CreatedDate != null ORDER BY CreatedDate "
+            "DESC LIMIT 1")
+
+    def test_bound_query_skips_nulls(self):
+        """Test records where the field is null don't bound the range"""
+        self.assertEqual(
+            bound_query('SELECT Id FROM Account', 'SystemModstamp'),
+            'SELECT SystemModstamp FROM Account WHERE SystemModstamp != null '
+            'ORDER BY SystemModstamp LIMIT 1')
+
+    def test_unsupported_clauses(self):
+        """Test queries whose result would change are rejected"""
+        for query in ('SELECT Id FROM Account LIMIT 10',
+                      'SELECT Name, COUNT(Id) FROM Account GROUP  BY Name'):
+            with self.assertRaises(ValueError):
+                split_query(query)
+
+
+class TestBoundaries(unittest.TestCase):
+    """Tests for the splitting of ranges"""
+    def test_id_conversion(self):
+        """Test Ids are converted to numbers and back"""
+        self.assertEqual(number_to_id(id_to_number('001e0000003GuNXAA0')),
+                         '001e0000003GuNX')
+        self.assertLess(id_to_number('001e0000003GuNX'),
+                        id_to_number('001e0000003GuNa'))
+
+    def test_id_boundaries(self):
+        """Test Id ranges are split evenly"""
+        self.assertEqual(
+            id_boundaries('001000000000000', '001000000000010', 2),
+            ["'00100000000000V'"])
+
+    def test_datetime_boundaries(self):
+        """Test date time ranges are split evenly, in UTC"""
+        self.assertEqual(
+            datetime_boundaries('2026-01-01T00:00:00.000+0000',
+                                '2026-01-02T02:00:00.000+0200', 4),
+            ['2026-01-01T06:00:00Z', '2026-01-01T12:00:00Z',
+             '2026-01-01T18:00:00Z'])
+
+    def test_range_conditions(self):
+        """Test the first and last ranges are open"""
+        self.assertEqual(range_conditions('Id', ["'a'", "'b'"]),
+                         ["Id < 'a'", "(Id >= 'a' AND Id < 'b')",
+                          "Id >= 'b'"])
+        self.assertEqual(range_conditions('Id', []), [None])
+
+    def test_nullable_range_conditions(self):
+        """Test records where the field is null get a range of their own"""
+        self.assertEqual(
+            range_conditions('CreatedDate', ['2026-01-01T00:00:00Z'],
+                             nullable=True),
+            ['CreatedDate < 2026-01-01T00:00:00Z',
+             'CreatedDate >= 2026-01-01T00:00:00Z', 'CreatedDate = null'])
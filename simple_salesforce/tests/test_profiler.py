@@ -0,0 +1,103 @@
+"""Tests for profiler.py"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from simple_salesforce.api import Salesforce
+from simple_salesforce.bulk import PollingStrategy
+from simple_salesforce.hooks import Hooks
+from simple_salesforce.limits import ApiUsage
+from simple_salesforce.profiler import PHASES, Profiler
+from simple_salesforce.tests.server import FakeSalesforce, make_records
+
+LATENCY = 0.05
+QUERY_MORE = 'GET /services/data/v{version}/query/{locator}'
+
+
+class TestProfiler(unittest.TestCase):
+    """Tests for the timing of calls"""
+
+    def setUp(self):
+        self.server = FakeSalesforce(latency=LATENCY, page_size=10).start()
+        self.addCleanup(self.server.stop)
+        self.ids = self.server.add_records('Contact', make_records(25))
+        hooks = Hooks()
+        self.profiler = Profiler(hooks)
+        self.client = Salesforce(
+            username='foo@bar.com', password='password',
+            security_token='token', session=self.server.session(),
+            version='42.0', hooks=hooks)
+        self.profiler.reset()
+
+    def test_last_call_is_broken_down(self):
+        """Test the server's latency counts as time to first byte, and the
+        body is decoded
+        """
+        self.client.query_more(
+            self.client.query('SELECT Id FROM Contact')['nextRecordsUrl'],
+            True)
+
+        timing = self.profiler.last
+        self.assertEqual(timing.endpoint,
+                         '/services/data/v{version}/query/{locator}')
+        self.assertGreaterEqual(timing.ttfb, LATENCY)
+        self.assertGreater(timing.decode, 0)
+        self.assertGreaterEqual(timing.download, 0)
+        self.assertAlmostEqual(timing.total,
+                               sum(getattr(timing, phase)
+                                   for phase in PHASES))
+
+    def test_timing_is_kept_on_the_response(self):
+        """Test raw responses carry the timing of their call"""
+        # pylint: disable=protected-access
+        result = self.client._call_salesforce(
+            'GET', self.client.base_url + 'sobjects/Contact/' + self.ids[0])
+
+        self.assertIs(result.timing, self.profiler.last)
+        self.assertEqual(result.timing.status, 200)
+
+    def test_phases_are_summed_per_endpoint(self):
+        """Test the report lists every endpoint with its calls"""
+        self.client.query_all('SELECT Id FROM Contact')
+
+        stats = dict(('{} {}'.format(row['method'], row['endpoint']), row)
+                     for row in self.profiler.stats())
+        self.assertEqual(stats[QUERY_MORE]['calls'], 2)
+        self.assertGreaterEqual(stats[QUERY_MORE]['ttfb'], 2 * LATENCY)
+        self.assertGreater(stats[QUERY_MORE]['decode'], 0)
+        self.assertIn(QUERY_MORE, self.profiler.report())
+
+    def test_post_processing_is_timed(self):
+        """Test matching queried records to Ids counts as processing"""
+        # versions without sObject Collections retrieve records by query
+        self.client.sf_version = '41.0'
+        records = self.client.Contact.get_many(self.ids[:5],
+                                               fields=['LastName'])
+
+        self.assertEqual([record['Id'] for record in records], self.ids[:5])
+
+        self.assertGreater(self.profiler.last.process, 0)
+
+    def test_pacing_is_not_timed(self):
+        """Test waiting for the API budget doesn't count as download time"""
+        self.client.api_usage = ApiUsage(rate=4, burst=1)
+        self.client.query('SELECT Id FROM Contact')
+        self.client.query('SELECT Id FROM Contact')
+
+        self.assertLess(self.profiler.last.download, 0.1)
+        self.assertLess(self.profiler.last.total, 0.2)
+
+    def test_bulk_calls_are_timed(self):
+        """Test bulk calls and streamed result downloads are timed"""
+        self.client.bulk.Contact.query('SELECT Id FROM Contact',
+                                       polling=PollingStrategy.fixed(0.01))
+
+        stats = dict((row['endpoint'], row) for row in self.profiler.stats())
+        results = stats['/services/async/{version}/job/{id}/batch/{id}'
+                        '/result']
+        self.assertEqual(results['calls'], 1)
+        self.assertGreater(results['decode'], 0)
+        self.assertGreaterEqual(sum(row['ttfb'] for row in stats.values()),
+                                LATENCY * len(stats))
@@ -0,0 +1,135 @@
+"""Tests for retry.py"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    import httplib as http
+    from mock import patch
+except ImportError:
+    # Python 3
+    import http.client as http
+    from unittest.mock import patch
+
+from simple_salesforce import tests
+from simple_salesforce.api import (
+    Salesforce,
+    SalesforceGeneralError,
+    SalesforceMalformedRequest
+)
+from simple_salesforce.bulk import SFBulkHandler
+from simple_salesforce.retry import RetryPolicy
+
+CONTACT_URL = ('https://na15.salesforce.com/services/data/v29.0/sobjects'
+               '/Contact/')
+LOCKED = '[{"errorCode": "UNABLE_TO_LOCK_ROW", "message": "locked"}]'
+
+
+def _client(policy=None):
+    """Creates a Salesforce instance retrying with `policy`"""
+    return Salesforce(session_id=tests.SESSION_ID,
+                      instance_url=tests.SERVER_URL,
+                      session=requests.Session(),
+                      retry_policy=policy or RetryPolicy(min_delay=0.001,
+                                                         jitter=0))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Tests for retries of REST and bulk calls"""
+    def setUp(self):
+        sleep_patcher = patch('simple_salesforce.retry.sleep')
+        self.sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    @responses.activate
+    def test_lock_errors_are_retried_for_any_method(self):
+        """Test a create that could not lock a row is sent again"""
+        responses.add(responses.POST, CONTACT_URL, body=LOCKED,
+                      status=http.BAD_REQUEST)
+        responses.add(responses.POST, CONTACT_URL, body='{"id": "003"}',
+                      status=http.CREATED)
+
+        result = _client().Contact.create({'LastName': 'Smith'})
+
+        self.assertEqual(result['id'], '003')
+        self.assertEqual(len(responses.calls), 2)
+
+    @responses.activate
+    def test_unknown_outcome_is_not_retried_for_post(self):
+        """Test a create failing with a 500 is not sent twice"""
+        responses.add(responses.POST, CONTACT_URL, body='[]', status=500)
+
+        with self.assertRaises(SalesforceGeneralError):
+            _client().Contact.create({'LastName': 'Smith'})
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_unknown_outcome_is_retried_for_get(self):
+        """Test a GET failing with a 502 is sent again"""
+        responses.add(responses.GET, CONTACT_URL + '003', body='',
+                      status=502)
+        responses.add(responses.GET, CONTACT_URL + '003',
+                      body='{"Id": "003"}', status=http.OK)
+
+        self.assertEqual(_client().Contact.get('003')['Id'], '003')
+
+    @responses.activate
+    def test_retry_after_is_respected(self):
+        """Test the wait is at least the requested Retry-After"""
+        responses.add(responses.GET, CONTACT_URL + '003', body='',
+                      status=503, adding_headers={'Retry-After': '7'})
+        responses.add(responses.GET, CONTACT_URL + '003',
+                      body='{"Id": "003"}', status=http.OK)
+
+        _client().Contact.get('003')
+
+        self.sleep.assert_called_once_with(7.0)
+
+    @responses.activate
+    def test_attempts_are_capped(self):
+        """Test the last failure is raised once attempts run out"""
+        responses.add(responses.POST, CONTACT_URL, body=LOCKED,
+                      status=http.BAD_REQUEST)
+
+        with self.assertRaises(SalesforceMalformedRequest):
+            _client(RetryPolicy(max_attempts=3)).Contact.create({})
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_elapsed_time_is_capped(self):
+        """Test no retry starts past the maximum elapsed time"""
+        responses.add(responses.GET, CONTACT_URL + '003', body='',
+                      status=503, adding_headers={'Retry-After': '120'})
+
+        with self.assertRaises(SalesforceGeneralError):
+            _client(RetryPolicy(max_elapsed=60)).Contact.get('003')
+        self.assertEqual(len(responses.calls), 1)
+
+    def test_connection_errors(self):
+        """Test connection failures only retry idempotent calls"""
+        policy = RetryPolicy()
+        reset = requests.exceptions.ConnectionError()
+        self.assertTrue(policy.is_retryable('GET', error=reset))
+        self.assertFalse(policy.is_retryable('POST', error=reset))
+        self.assertTrue(policy.is_retryable(
+            'POST', error=requests.exceptions.ConnectTimeout()))
+
+    @responses.activate
+    def test_bulk_calls_are_retried(self):
+        """Test the bulk handler uses the retry policy"""
+        bulk_url = 'https://na15.salesforce.com/services/async/29.0/'
+        responses.add(responses.GET, bulk_url + 'job/job', body='',
+                      status=503)
+        responses.add(responses.GET, bulk_url + 'job/job',
+                      body='{"id": "job"}', status=http.OK)
+        handler = SFBulkHandler(tests.SESSION_ID, bulk_url,
+                                session=requests.Session(),
+                                retry_policy=RetryPolicy())
+
+        self.assertEqual(handler.Contact._get_job('job')['id'], 'job')
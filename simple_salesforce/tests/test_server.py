@@ -0,0 +1,93 @@
+"""Tests running the client against the fake Salesforce of server.py"""
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+from simple_salesforce.api import Salesforce
+from simple_salesforce.bulk import PollingStrategy
+from simple_salesforce.retry import RetryPolicy
+from simple_salesforce.tests.server import FakeSalesforce, make_records
+
+
+class TestFakeSalesforce(unittest.TestCase):
+    """Tests for the client talking to a local fake Salesforce"""
+    def setUp(self):
+        self.server = FakeSalesforce(page_size=10, result_size=15).start()
+        self.addCleanup(self.server.stop)
+        self.ids = self.server.add_records('Contact', make_records(25))
+        self.client = Salesforce(
+            username='foo@bar.com', password='password',
+            security_token='token', session=self.server.session(),
+            version='42.0', retry_policy=RetryPolicy(min_delay=0))
+
+    def test_query_all_pages(self):
+        """Test queries are paged and filtered"""
+        result = self.client.query_all(
+            "SELECT Id, LastName FROM Contact WHERE CreatedDate >= "
+            "2026-01-01T00:05:00Z ORDER BY LastName DESC")
+
+        self.assertEqual(len(result['records']), 20)
+        self.assertEqual(result['records'][0]['LastName'], 'Smith 9')
+        self.assertEqual(self.server.requests, 3)
+
+    def test_query_all_parallel(self):
+        """Test partitions cover every record once"""
+        records = self.client.query_all_parallel('SELECT Id FROM Contact',
+                                                 partitions=3)
+
+        self.assertEqual(sorted(record['Id'] for record in records),
+                         self.ids)
+
+    def test_query_all_parallel_nullable_field(self):
+        """Test records where the partitioning field is null are read"""
+        undated = make_records(3)
+        for record in undated:
+            record['SystemModstamp'] = None
+        ids = self.server.add_records('Contact', undated)
+
+        records = self.client.query_all_parallel(
+            'SELECT Id FROM Contact', partitions=3, field='SystemModstamp')
+
+        self.assertEqual(sorted(record['Id'] for record in records),
+                         sorted(self.ids + ids))
+
+    def test_crud(self):
+        """Test records are created, read, updated and deleted"""
+        record_id = self.client.Contact.create({'LastName': 'Jones'})['id']
+        self.client.Contact.update(record_id, {'LastName': 'Brown'})
+        self.assertEqual(self.client.Contact.get(record_id)['LastName'],
+                         'Brown')
+        self.assertEqual(self.client.Contact.delete(record_id), 204)
+
+    def test_expired_session(self):
+        """Test an expired session is replaced by logging in again"""
+        self.server.expire_sessions()
+
+        self.assertEqual(self.client.Contact.get(self.ids[0])['Id'],
+                         self.ids[0])
+        self.assertEqual(self.server.logins, 2)
+
+    def test_failures_are_retried(self):
+        """Test injected failures are retried"""
+        self.server.fail_next(2)
+
+        self.assertEqual(len(self.client.Contact.get_many(
+            self.ids, fields=['LastName'])), 25)
+
+    def test_bulk(self):
+        """Test bulk jobs run their batches"""
+        polling = PollingStrategy(min_interval=0, max_interval=0)
+        results = self.client.bulk.Contact.insert(
+            [{'LastName': str(i)} for i in range(5)], batch_size=2,
+            polling=polling)
+        self.assertTrue(all(result['success'] for result in results))
+
+        records = self.client.bulk.Contact.query('SELECT Id FROM Contact',
+                                                 polling=polling)
+        self.assertEqual(len(records), 30)
+
+        records = list(self.client.bulk.Contact.query_chunked(
+            'SELECT Id FROM Contact', chunk_size=7, polling=polling))
+        self.assertEqual(len(records), 30)
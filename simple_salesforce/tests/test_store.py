@@ -0,0 +1,140 @@
+"""Tests for store.py"""
+# pylint: disable=protected-access
+
+import os
+import shutil
+import stat
+import tempfile
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    import httplib as http
+    from mock import patch
+except ImportError:
+    # Python 3
+    import http.client as http
+    from unittest.mock import patch
+
+from simple_salesforce import tests
+from simple_salesforce.api import Salesforce
+from simple_salesforce.store import (
+    FileSessionStore,
+    SessionStore,
+    StoredLogin,
+    login_key
+)
+
+LOGIN_URL = 'https://login.salesforce.com/services/Soap/u/29.0'
+CONTACT_URL = ('https://na15.salesforce.com/services/data/v29.0/sobjects'
+               '/Contact/003')
+KEY = login_key('foo@bar.com')
+
+
+def _client(store):
+    """Creates a Salesforce instance logging in through `store`"""
+    return Salesforce(username='foo@bar.com', password='password',
+                      security_token='token', session=requests.Session(),
+                      session_store=store)
+
+
+class TestFileSessionStore(unittest.TestCase):
+    """Tests for the session store shared by processes"""
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def test_sessions_are_shared_by_instances(self):
+        """Test a session stored by one instance is read by another"""
+        FileSessionStore(self.path).set(KEY, 'session', 'na1.salesforce.com')
+
+        entry = FileSessionStore(self.path).get(KEY)
+
+        self.assertEqual(entry[:2], ('session', 'na1.salesforce.com'))
+        self.assertIsNone(FileSessionStore(self.path).get('other'))
+
+    def test_session_files_are_private(self):
+        """Test only the owner can read a stored session"""
+        store = FileSessionStore(self.path)
+        store.set(KEY, 'session', 'na1.salesforce.com')
+
+        mode = os.stat(store._file_path(KEY, '.json')).st_mode
+        self.assertEqual(stat.S_IMODE(mode) & 0o077, 0)
+
+    def test_old_sessions_are_ignored(self):
+        """Test sessions older than max_age are not used"""
+        store = FileSessionStore(self.path, max_age=600)
+        with patch('simple_salesforce.store.time') as clock:
+            clock.return_value = 1000
+            store.set(KEY, 'session', 'na1.salesforce.com')
+
+            clock.return_value = 1599
+            self.assertIsNotNone(store.get(KEY))
+            clock.return_value = 1600
+            self.assertIsNone(store.get(KEY))
+
+
+class TestStoredLogin(unittest.TestCase):
+    """Tests for logins going through a session store"""
+
+    def test_expired_session_is_replaced(self):
+        """Test a login returns the stored session, then logs in once it
+        expired
+        """
+        store = SessionStore()
+        store.set(KEY, 'stored', 'na1.salesforce.com')
+        logins = []
+
+        def login():
+            """Counts logins"""
+            logins.append(1)
+            return 'new', 'na1.salesforce.com'
+
+        stored_login = StoredLogin(store, KEY, login)
+
+        self.assertEqual(stored_login(), ('stored', 'na1.salesforce.com'))
+        self.assertEqual(stored_login(), ('new', 'na1.salesforce.com'))
+        self.assertEqual(len(logins), 1)
+        self.assertEqual(store.get(KEY)[0], 'new')
+
+    def test_session_replaced_elsewhere_is_reused(self):
+        """Test a client finding its session expired reuses the session
+        another client stored meanwhile
+        """
+        store = SessionStore()
+        store.set(KEY, 'stored', 'na1.salesforce.com')
+        stored_login = StoredLogin(store, KEY, None)
+        stored_login()
+
+        store.set(KEY, 'other', 'na1.salesforce.com')
+
+        self.assertEqual(stored_login(), ('other', 'na1.salesforce.com'))
+
+    @responses.activate
+    def test_clients_share_a_login(self):
+        """Test clients using the same store log in once, and log in again
+        when the stored session expired
+        """
+        responses.add(responses.POST, LOGIN_URL,
+                      body=tests.LOGIN_RESPONSE_SUCCESS, status=http.OK)
+        responses.add(responses.GET, CONTACT_URL, body='[]',
+                      status=http.UNAUTHORIZED)
+        responses.add(responses.GET, CONTACT_URL, body='{"Id": "003"}',
+                      status=http.OK)
+        store = SessionStore()
+
+        _client(store)
+        client = _client(store)
+        self.assertEqual(len(responses.calls), 1)
+
+        self.assertEqual(client.Contact.get('003')['Id'], '003')
+        self.assertEqual(
+            [call.request.url for call in responses.calls],
+            [LOGIN_URL, CONTACT_URL, LOGIN_URL, CONTACT_URL])
@@ -0,0 +1,153 @@
+"""Tests for sync.py"""
+
+import json
+import re
+from datetime import datetime, timedelta
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest
+
+import responses
+import requests
+
+try:
+    # Python 2.6/2.7
+    from urlparse import urlparse, parse_qs
+except ImportError:
+    # Python 3
+    from urllib.parse import urlparse, parse_qs
+
+from simple_salesforce import tests
+from simple_salesforce.api import Salesforce
+from simple_salesforce.sync import (
+    ChangeSync,
+    DELETE,
+    UPSERT,
+    UTC,
+    parse_datetime
+)
+
+BASE_URL = 'https://na15.salesforce.com/services/data/v42.0/'
+CHANGES_URL = re.compile(
+    re.escape(BASE_URL + 'sobjects/Contact/') + r'(updated|deleted)/.*')
+RETRIEVE_URL = BASE_URL + 'composite/sobjects/Contact'
+SINCE = datetime(2026, 10, 10, tzinfo=UTC)
+UNTIL = datetime(2026, 10, 12, tzinfo=UTC)
+
+# when the records were last updated or deleted
+UPDATED = {'003A': datetime(2026, 10, 10, 6, tzinfo=UTC),
+           '003B': datetime(2026, 10, 10, 18, tzinfo=UTC),
+           '003C': datetime(2026, 10, 11, 6, tzinfo=UTC),
+           '003D': datetime(2026, 10, 11, 6, tzinfo=UTC)}
+DELETED = {'003D': datetime(2026, 10, 11, 12, tzinfo=UTC),
+           '003E': datetime(2026, 10, 11, 18, tzinfo=UTC)}
+
+
+def _format(date):
+    """Formats a date time like Salesforce"""
+    return date.strftime('%Y-%m-%dT%H:%M:%S.000+0000')
+
+
+def _window(request):
+    """Returns the start and end of the window of a request"""
+    query = parse_qs(urlparse(request.url).query)
+    return parse_datetime(query['start'][0]), parse_datetime(query['end'][0])
+
+
+def _changes(request, split_above=None):
+    """Answers Get Updated and Get Deleted requests"""
+    start, end = _window(request)
+    if split_above is not None and end - start > split_above:
+        return 400, {}, json.dumps([{'errorCode': 'EXCEEDED_ID_LIMIT',
+                                     'message': 'too many'}])
+    if '/updated/' in request.url:
+        body = {'ids': sorted(record_id
+                              for record_id, date in UPDATED.items()
+                              if start <= date < end),
+                'latestDateCovered': _format(end)}
+    else:
+        body = {'deletedRecords': [
+            {'id': record_id, 'deletedDate': _format(date)}
+            for record_id, date in sorted(DELETED.items())
+            if start <= date < end],
+                'earliestDateAvailable': '2026-10-01T00:00:00.000+0000',
+                'latestDateCovered': _format(end)}
+    return 200, {}, json.dumps(body)
+
+
+def _retrieve(request):
+    """Answers sObject Collections retrievals, with null for deleted IDs"""
+    ids = json.loads(request.body)['ids']
+    return 200, {}, json.dumps([
+        None if record_id in DELETED else {'Id': record_id, 'LastName': 'x'}
+        for record_id in ids])
+
+
+def _client():
+    """Creates a Salesforce instance"""
+    return Salesforce(session_id=tests.SESSION_ID,
+                      instance_url=tests.SERVER_URL,
+                      session=requests.Session(), version='42.0')
+
+
+class TestChangeSync(unittest.TestCase):
+    """Tests for the change-sync engine"""
+
+    @responses.activate
+    def test_changes_are_streamed_by_window(self):
+        """Test windows yield their deletes, then their existing records"""
+        responses.add_callback(responses.GET, CHANGES_URL, callback=_changes)
+        responses.add_callback(responses.POST, RETRIEVE_URL,
+                               callback=_retrieve)
+
+        sync = ChangeSync(_client().Contact, fields=['Id', 'LastName'])
+        changes = [(change.kind, change.id)
+                   for change in sync.changes(SINCE, UNTIL)]
+
+        self.assertEqual(changes, [(UPSERT, '003A'), (UPSERT, '003B'),
+                                   (DELETE, '003D'), (DELETE, '003E'),
+                                   (UPSERT, '003C')])
+        self.assertEqual(sync.high_water_mark, UNTIL)
+
+    @responses.activate
+    def test_records_are_retrieved_in_batches(self):
+        """Test updated records are retrieved `batch_size` at a time"""
+        responses.add_callback(responses.GET, CHANGES_URL, callback=_changes)
+        responses.add_callback(responses.POST, RETRIEVE_URL,
+                               callback=_retrieve)
+
+        sync = ChangeSync(_client().Contact, fields=['LastName'],
+                          window=timedelta(days=2), batch_size=1)
+        list(sync.changes(SINCE, UNTIL))
+
+        retrievals = [json.loads(call.request.body) for call in
+                      responses.calls if call.request.method == 'POST']
+        # batches are retrieved concurrently
+        self.assertEqual(sorted(body['ids'] for body in retrievals),
+                         [['003A'], ['003B'], ['003C'], ['003D']])
+        self.assertEqual(retrievals[0]['fields'], ['LastName'])
+
+    @responses.activate
+    def test_windows_over_the_id_limit_are_split(self):
+        """Test windows holding too many IDs are listed in halves"""
+        responses.add_callback(
+            responses.GET, CHANGES_URL,
+            callback=lambda request: _changes(request, timedelta(hours=12)))
+        responses.add_callback(responses.POST, RETRIEVE_URL,
+                               callback=_retrieve)
+
+        sync = ChangeSync(_client().Contact, fields=['Id'])
+        ids = [change.id for change in sync.changes(SINCE, UNTIL)]
+
+        self.assertEqual(sorted(ids), ['003A', '003B', '003C', '003D',
+                                       '003E'])
+        self.assertEqual(sync.high_water_mark, UNTIL)
+
+    def test_history_is_limited(self):
+        """Test a mark older than 30 days is rejected"""
+        sync = ChangeSync(_client().Contact, fields=['Id'])
+
+        with self.assertRaises(ValueError):
+            list(sync.changes(UNTIL - timedelta(days=31), UNTIL))
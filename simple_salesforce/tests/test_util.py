@@ -5,9 +5,14 @@ except ImportError:
     import unittest
 
 import datetime
+import subprocess
+import sys
+import time
 import pytz
+from simple_salesforce import tests
 from simple_salesforce.util import (
-    getUniqueElementValueFromXmlString, date_to_iso8601
+    getUniqueElementValueFromXmlString, date_to_iso8601, iter_merged,
+    iter_prefetched, parse_soap_response
 )
 
 
@@ -19,6 +24,30 @@ class TestXMLParser(unittest.TestCase):
             '<?xml version="1.0" encoding="UTF-8"?><foo>bar</foo>', 'foo')
         self.assertEqual(result, 'bar')
 
+    def test_parse_soap_response(self):
+        """Test the leaf values of a SOAP response are read in one pass"""
+        values = parse_soap_response(tests.LOGIN_RESPONSE_SUCCESS)
+
+        self.assertEqual(values['sessionId'], tests.SESSION_ID)
+        self.assertEqual(values['serverUrl'], tests.SERVER_URL)
+        self.assertEqual(values['sessionSecondsValid'], '7200')
+        # the first occurrence wins over the one in userInfo
+        self.assertEqual(values['userId'], '005i0000002MUqLAAW')
+        self.assertIsNone(values['roleId'])
+
+    def test_parse_soap_response_fields(self):
+        """Test namespaces are dropped and entities unescaped"""
+        values = parse_soap_response(
+            b'<?xml version="1.0" encoding="UTF-8"?>'
+            b'<soapenv:Envelope xmlns:soapenv="urn:env" xmlns:sf="urn:sf">'
+            b'<sf:exceptionCode>INVALID_LOGIN</sf:exceptionCode>'
+            b'<sf:exceptionMessage>a &amp; b &lt;c&gt;</sf:exceptionMessage>'
+            b'<sf:other>x</sf:other></soapenv:Envelope>',
+            ['exceptionCode', 'exceptionMessage'])
+
+        self.assertEqual(values, {'exceptionCode': 'INVALID_LOGIN',
+                                  'exceptionMessage': 'a & b <c>'})
+
     def test_date_to_iso8601(self):
         """Test date conversion"""
         date = pytz.UTC.localize(datetime.datetime(2014, 3, 22, 00, 00, 00, 0))
@@ -31,3 +60,97 @@ class TestXMLParser(unittest.TestCase):
         result = date_to_iso8601(date)
         expected = '2014-03-22T00%3A00%3A00-07%3A00'
         self.assertEqual(result, expected)
+
+
+class TestIterMerged(unittest.TestCase):
+    """Test the iterator merging iterables consumed concurrently"""
+    def test_yields_every_item(self):
+        """Test the items of every iterable are yielded in their order"""
+        items = list(iter_merged([range(0, 20), range(20, 30), range(30, 50)],
+                                 2, 3))
+        self.assertEqual(sorted(items), list(range(50)))
+        self.assertEqual([item for item in items if item < 20],
+                         list(range(20)))
+
+    def test_reraises_producer_error(self):
+        """Test errors raised by an iterable surface in the consumer"""
+        def producer():
+            """Fails straight away"""
+            raise ValueError('boom')
+            # pylint: disable=unreachable
+            yield 1
+
+        with self.assertRaises(ValueError):
+            list(iter_merged([range(3), producer()], 2, 1))
+
+    def test_no_iterables(self):
+        """Test merging nothing yields nothing"""
+        self.assertEqual(list(iter_merged([], 2, 1)), [])
+
+
+class TestIterPrefetched(unittest.TestCase):
+    """Test the background prefetching iterator"""
+    def test_preserves_order(self):
+        """Test items are yielded in the order they were produced"""
+        self.assertEqual(list(iter_prefetched(range(50), 3)), list(range(50)))
+
+    def test_without_depth(self):
+        """Test a falsy depth iterates in the calling thread"""
+        self.assertEqual(list(iter_prefetched(iter([1, 2]), 0)), [1, 2])
+
+    def test_reraises_producer_error(self):
+        """Test errors raised by the producer surface in the consumer"""
+        def producer():
+            """Yields one item and then fails"""
+            yield 1
+            raise ValueError('boom')
+
+        items = iter_prefetched(producer(), 2)
+        self.assertEqual(next(items), 1)
+        with self.assertRaises(ValueError):
+            next(items)
+
+    def test_stays_within_depth(self):
+        """Test the producer never runs more than depth items ahead"""
+        produced = []
+
+        def producer():
+            """Records every item handed to the buffer"""
+            for i in range(10):
+                produced.append(i)
+                yield i
+
+        items = iter_prefetched(producer(), 2)
+        self.assertEqual(next(items), 0)
+        time.sleep(0.3)
+        # one consumed, two buffered and one blocked waiting for room
+        self.assertLessEqual(len(produced), 4)
+        self.assertEqual(list(items), list(range(1, 10)))
+
+
+class TestLazyImports(unittest.TestCase):
+    """Test the package imports its login and bulk machinery on first use"""
+    def test_import_skips_login_and_bulk(self):
+        """Test importing the package doesn't import login and bulk"""
+        modules = subprocess.check_output([
+            sys.executable, '-c',
+            'import sys, simple_salesforce; print(" ".join(sys.modules))'])
+        modules = modules.decode('utf-8').split()
+        for module in ('simple_salesforce.login', 'simple_salesforce.bulk',
+                       'simple_salesforce.bulk2', 'simple_salesforce.cache',
+                       'simple_salesforce.partition',
+                       'simple_salesforce.store', 'xml.dom.minidom'):
+            self.assertNotIn(module, modules)
+
+    def test_lazy_names_are_importable(self):
+        """Test the lazily imported names are available from the package"""
+        # pylint: disable=no-name-in-module
+        from simple_salesforce import (
+            FileSessionStore, SFBulkHandler, SalesforceLogin)
+        from simple_salesforce.bulk import SFBulkHandler as bulk_handler
+        from simple_salesforce.login import SalesforceLogin as login
+        from simple_salesforce.store import FileSessionStore as file_store
+
+        self.assertIs(SFBulkHandler, bulk_handler)
+        self.assertIs(SalesforceLogin, login)
+        self.assertIs(FileSessionStore, file_store)
@@ -1,6 +1,21 @@
 """Utility functions for simple-salesforce"""
 
-import xml.dom.minidom
+import importlib
+import io
+import threading
+
+try:
+    import queue
+except ImportError:
+    # Python < 3
+    import Queue as queue
+
+from simple_salesforce.hooks import (
+    RETRY,
+    endpoint_template,
+    object_from_url,
+    send_instrumented
+)
 
 
 # pylint: disable=invalid-name
@@ -13,6 +28,10 @@ def getUniqueElementValueFromXmlString(xmlString, elementName):
         '<?xml version="1.0" encoding="UTF-8"?><foo>bar</foo>', 'foo')
     should return the value 'bar'.
     """
+    # only needed to log in, so not imported with the package
+    # pylint: disable=redefined-outer-name
+    import xml.dom.minidom
+
     xmlStringAsDom = xml.dom.minidom.parseString(xmlString)
     elementsByName = xmlStringAsDom.getElementsByTagName(elementName)
     elementValue = None
@@ -22,6 +41,57 @@ def getUniqueElementValueFromXmlString(xmlString, elementName):
     return elementValue
 
 
+# the xsi:nil attribute of elements without a value
+XSI_NIL = '{http://www.w3.org/2001/XMLSchema-instance}nil'
+
+
+def parse_soap_response(content, fields=None):
+    """Reads the values of the leaf elements of a SOAP response in a single
+    pass, without building a document tree
+
+    Elements are named without their namespace, e.g. `sessionId` or
+    `exceptionCode` (`sf:exceptionCode` in the document). When an element
+    occurs several times, the first occurrence is kept. Entities are
+    unescaped and elements marked `xsi:nil` have the value None.
+
+    Arguments:
+
+    * content -- the body of the response, as bytes or text
+    * fields -- the optional names of the elements to read. Parsing stops
+                once they have all been found.
+
+    Returns a dict of element name to value.
+    """
+    # only needed to log in, so not imported with the package
+    from xml.etree.ElementTree import iterparse
+
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    wanted = None if fields is None else set(fields)
+    values = {}
+    for _, element in iterparse(io.BytesIO(content)):
+        if len(element) == 0:
+            name = element.tag.rpartition('}')[2]
+            if name not in values and (wanted is None or name in wanted):
+                if element.get(XSI_NIL) == 'true':
+                    values[name] = None
+                else:
+                    values[name] = element.text or ''
+                if wanted is not None and wanted.issubset(values):
+                    break
+        # values are copied out, so the tree never has to grow
+        element.clear()
+    return values
+
+
+def raise_from(error, cause):
+    """Raises `error` as caused by the exception `cause`, as
+    `raise error from cause` does on Python 3
+    """
+    error.__cause__ = cause
+    raise error
+
+
 def date_to_iso8601(date):
     """Returns an ISO8601 string from a date"""
     datetimestr = date.strftime('%Y-%m-%dT%H:%M:%S')
@@ -35,6 +105,226 @@ def date_to_iso8601(date):
         ).replace(':', '%3A').replace('+', '%2B')
 
 
+def iter_prefetched(iterable, depth):
+    """Iterates over `iterable` while a background thread stays up to
+    `depth` items ahead of the consumer.
+
+    This allows network waits and decoding performed by `iterable` to
+    overlap with the caller's processing of the current item. Exceptions
+    raised by `iterable` are re-raised in the consuming thread, and the
+    worker stops as soon as the consumer stops iterating.
+
+    Arguments:
+
+    * iterable -- the iterable to consume in the background
+    * depth -- the maximum number of items buffered ahead of the consumer;
+               a falsy value disables prefetching entirely
+    """
+    if not depth:
+        for item in iterable:
+            yield item
+        return
+
+    buffered = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    finished = object()
+
+    def put(entry):
+        """Blocks until `entry` is buffered or the consumer has gone away"""
+        while not stopped.is_set():
+            try:
+                buffered.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fill():
+        """Worker loop feeding the buffer"""
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        # pylint: disable=broad-except
+        except Exception as exc:
+            put((finished, exc))
+            return
+        put((finished, None))
+
+    worker = threading.Thread(target=fill)
+    worker.daemon = True
+    worker.start()
+
+    try:
+        while True:
+            item, error = buffered.get()
+            if item is finished:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+
+
+def iter_merged(iterables, workers, depth):
+    """Iterates over the items of every iterable of `iterables`, which up
+    to `workers` background threads consume concurrently.
+
+    Items are yielded in the order the threads produce them, so items of
+    one iterable keep their order but are interleaved with the others.
+    Exceptions raised by an iterable are re-raised in the consuming thread,
+    and the workers stop as soon as the consumer stops iterating.
+
+    Arguments:
+
+    * iterables -- the list of iterables to consume in the background
+    * workers -- the maximum number of iterables consumed at once
+    * depth -- the maximum number of items buffered ahead of the consumer
+    """
+    buffered = queue.Queue(maxsize=depth)
+    pending = queue.Queue()
+    stopped = threading.Event()
+    finished = object()
+    for iterable in iterables:
+        pending.put(iterable)
+
+    def put(entry):
+        """Blocks until `entry` is buffered or the consumer has gone away"""
+        while not stopped.is_set():
+            try:
+                buffered.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def drain():
+        """Worker loop feeding the buffer from the pending iterables"""
+        while not stopped.is_set():
+            try:
+                iterable = pending.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                for item in iterable:
+                    if not put((item, None)):
+                        return
+            # pylint: disable=broad-except
+            except Exception as exc:
+                put((finished, exc))
+                return
+        put((finished, None))
+
+    running = min(workers, len(iterables))
+    for _ in range(running):
+        worker = threading.Thread(target=drain)
+        worker.daemon = True
+        worker.start()
+
+    try:
+        while running:
+            item, error = buffered.get()
+            if item is finished:
+                if error is not None:
+                    raise error
+                running -= 1
+                continue
+            yield item
+    finally:
+        stopped.set()
+
+
+def lazy_getattr(module_name, lazy_imports):
+    """Returns a module `__getattr__` (PEP 562) importing the names of
+    `lazy_imports`, a dict of name to the module defining it, on first use
+
+    Python < 3.7 ignores module `__getattr__`, so modules supporting it
+    import every lazy name right away there.
+    """
+    def __getattr__(name):
+        """Imports `name` from its module"""
+        if name not in lazy_imports:
+            raise AttributeError('module {!r} has no attribute {!r}'.format(
+                module_name, name))
+        value = getattr(importlib.import_module(lazy_imports[name]), name)
+        setattr(importlib.import_module(module_name), name, value)
+        return value
+    return __getattr__
+
+
+def send_request(session, method, url, api_usage=None, retry_policy=None,
+                 hooks=None, object_name=None, **kwargs):
+    """Sends a request through the requests `session`, paced by and
+    recording usage in `api_usage`, and sent again as allowed by
+    `retry_policy`. Every attempt is paced and recorded, and fires its
+    events on the optional `hooks`, labelled with `object_name`.
+
+    Returns the `requests.Response` of the last attempt.
+    """
+    attempts = [0]
+
+    def request():
+        """Makes one attempt"""
+        result = session.request(method, url, **kwargs)
+        if api_usage is not None:
+            api_usage.update(result.headers)
+        return result
+
+    def send():
+        """Makes one attempt, firing its events"""
+        attempts[0] += 1
+        # paced before the attempt is timed, so that waiting for the budget
+        # isn't reported as time spent on the call
+        if api_usage is not None:
+            api_usage.acquire()
+        return send_instrumented(hooks, method, url, request,
+                                 attempt=attempts[0],
+                                 object_name=object_name, **kwargs)
+
+    def on_retry(result, error, delay):
+        """Fires the event of an attempt about to be sent again"""
+        hooks.emit(RETRY, method=method, url=url,
+                   endpoint=endpoint_template(url),
+                   object_name=object_name or object_from_url(url),
+                   status=None if result is None else result.status_code,
+                   attempt=attempts[0], error=error, delay=delay)
+
+    if retry_policy is None:
+        return send()
+    return retry_policy.call(method, send,
+                             on_retry=None if hooks is None else on_retry)
+
+
+def exception_handler(result, name=""):
+    """Exception router. Determines which error to raise for bad results"""
+    try:
+        response_content = result.json()
+    # pylint: disable=broad-except
+    except Exception:
+        response_content = result.text
+
+    raise exception_for_status(
+        result.url, result.status_code, name, response_content)
+
+
+def exception_for_status(url, status, name, content):
+    """Returns the exception matching an HTTP `status` returned by
+    Salesforce, so that failures reported inside a response body (such as
+    composite subrequests) map to the same classes as failed calls
+    """
+    exc_map = {
+        300: SalesforceMoreThanOneRecord,
+        400: SalesforceMalformedRequest,
+        401: SalesforceExpiredSession,
+        403: SalesforceRefusedRequest,
+        404: SalesforceResourceNotFound,
+    }
+    exc_cls = exc_map.get(status, SalesforceGeneralError)
+
+    return exc_cls(url, status, name, content)
+
+
 class SalesforceError(Exception):
     """Base Salesforce API exception"""
 
@@ -54,3 +344,62 @@ class SalesforceError(Exception):
 
     def __unicode__(self):
         return self.__str__()
+
+
+class SalesforceMoreThanOneRecord(SalesforceError):
+    """
+    Error Code: 300
+    The value returned when an external ID exists in more than one record. The
+    response body contains the list of matching records.
+    """
+    message = u"More than one record for {url}. Response content: {content}"
+
+
+class SalesforceMalformedRequest(SalesforceError):
+    """
+    Error Code: 400
+    The request couldn't be understood, usually because the JSON or XML body
+    contains an error.
+    """
+    message = u"Malformed request {url}. Response content: {content}"
+
+
+class SalesforceExpiredSession(SalesforceError):
+    """
+    Error Code: 401
+    The session ID or OAuth token used has expired or is invalid. The response
+    body contains the message and errorCode.
+    """
+    message = u"Expired session for {url}. Response content: {content}"
+
+
+class SalesforceRefusedRequest(SalesforceError):
+    """
+    Error Code: 403
+    The request has been refused. Verify that the logged-in user has
+    appropriate permissions.
+    """
+    message = u"Request refused for {url}. Response content: {content}"
+
+
+class SalesforceResourceNotFound(SalesforceError):
+    """
+    Error Code: 404
+    The requested resource couldn't be found. Check the URI for errors, and
+    verify that there are no sharing issues.
+    """
+    message = u'Resource {name} Not Found. Response content: {content}'
+
+    def __str__(self):
+        return self.message.format(name=self.resource_name,
+                                   content=self.content)
+
+
+class SalesforceGeneralError(SalesforceError):
+    """
+    A non-specific Salesforce error.
+    """
+    message = u'Error Code {status}. Response content: {content}'
+
+    def __str__(self):
+        return self.message.format(status=self.status, content=self.content)